@@ -12,7 +12,8 @@ from matplotlib import pyplot as plt
 
 import thesUtils as tu
 
-logNameFormat = '{type}.64x32x64.v{v}h{h}.CRR.O3.bench.{c}.json'
+# Log dimensions shared by every configuration.
+logDims = dict(m=64, d=32, n=64, order='CRR', variant='mma')
 
 layouts = [
   ((2, 4), '2x4'),
@@ -22,23 +23,13 @@ layouts = [
 ]
 
 if __name__ == '__main__':
-  # Get data.
-  data = {}
-  for type in tu.orderedTypes:
-    # Holding place ACC data.
-    accData = {}
-
-    # Get the data for each ACC layout.
-    for (v, h), layoutName in layouts:
-      # Read logs for data.
-      log = logNameFormat.format(type=type, v=v, h=h, c='{}')
-
-      # Read logs for data.
-      _, _, cycleStats = tu.getJsonCumulativeStats('logs/all/' + log, 25)
-      accData[layoutName] = cycleStats
-
-    # Save type data.
-    data[type] = accData
+  # Get data: cycles per ACC layout, one subplot per type.
+  store = tu.getResultStore()
+  records = store.mask(rep=list(range(tu.repCount)), clean=True,
+                       layout=[layout for layout, _ in layouts], **logDims)
+  _, _, _, bars, errs = store.pivot('cycles', ('v', 'h'), 'variant', 'type', records,
+                                    rowValues=[layout for layout, _ in layouts],
+                                    facetValues=tu.orderedTypes)
 
   # Set up figure and axes.
   fig = plt.figure()
@@ -49,25 +40,9 @@ if __name__ == '__main__':
   groupLabels = [layout[1] for layout in layouts]
   barLabels = ['runtime']
   for i, type in enumerate(tu.orderedTypes):
-    # Get data for this type.
-    accData = data[type]
-
-    # Set up bar data points.
-    bars = [
-      [accData[layout][0] for layout in accData]
-    ]
-
-    # Set up error data for the bars.
-    errs = [
-      [
-        [accData[layout][1] for layout in accData],
-        [accData[layout][2] for layout in accData]
-      ]
-    ]
-
     # Get axis and start plotting.
     ax = fig.add_subplot(figHeight, figWidth, i + 1)
-    tu.plotGroupedData(ax, groupLabels, barLabels, bars, errs)
+    tu.plotGroupedData(ax, groupLabels, barLabels, bars[i], errs[i])
     ax.set_title(f'\\texttt{{{type}}}')
 
     ax.set_xlabel('Accumulator Layout')
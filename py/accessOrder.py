@@ -13,7 +13,8 @@ from matplotlib.transforms import ScaledTranslation
 
 import thesUtils as tu
 
-logNameFormat = '{type}.8x32x16.vdhd.{aOrd}{bOrd}{cOrd}.O3.bench.{c}.json'
+# Log dimensions shared by every configuration.
+logDims = dict(m=8, d=32, n=16, layout=None, variant='mma', sink=False)
 
 orders = [
   (('C', 'C', 'C'), '$\\textrm{C} = \\textrm{C} \\times \\textrm{C}$'),
@@ -23,23 +24,13 @@ orders = [
 ]
 
 def generatePlot():
-  # Get data.
-  data = {}
-  for type in tu.orderedTypes:
-    # Holding place for access order data.
-    orderData = {}
-
-    # Get the data for each access order.
-    for (aOrd, bOrd, cOrd), orderName in orders:
-      # Read logs for data.
-      log = logNameFormat.format(type=type, aOrd=aOrd, bOrd=bOrd, cOrd=cOrd, c='{}')
-
-      # Save access order data.
-      _, _, cycleStats = tu.getJsonCumulativeStats('logs/all/' + log, 25)
-      orderData[orderName] = cycleStats
-
-    # Save type data.
-    data[type] = orderData
+  # Get data: cycles per access order, one subplot per type.
+  store = tu.getResultStore()
+  records = store.mask(rep=list(range(tu.repCount)), merge=False, **logDims)
+  orderCodes = [aOrd + bOrd + cOrd for (aOrd, bOrd, cOrd), _ in orders]
+  _, _, _, bars, errs = store.pivot('cycles', 'order', 'variant', 'type', records,
+                                    rowValues=orderCodes,
+                                    facetValues=tu.orderedTypes)
 
   # Set up figure and axes.
   fig = plt.figure()
@@ -50,25 +41,9 @@ def generatePlot():
   groupLabels = [order[1] for order in orders]
   barLabels = ['runtime']
   for i, type in enumerate(tu.orderedTypes):
-    # Get data for this type.
-    orderData = data[type]
-
-    # Set up bar data points.
-    bars = [
-      [orderData[order][0] for order in orderData]
-    ]
-
-    # Set up error data for the bars.
-    errs = [
-      [
-        [orderData[order][1] for order in orderData],
-        [orderData[order][2] for order in orderData]
-      ]
-    ]
-
     # Get axis and start plotting.
     ax = fig.add_subplot(figHeight, figWidth, i + 1)
-    tu.plotGroupedData(ax, groupLabels, barLabels, bars, errs)
+    tu.plotGroupedData(ax, groupLabels, barLabels, bars[i], errs[i])
 
     # Set extra info.
     ax.set_title(f'\\texttt{{{type}}}')
@@ -98,11 +73,11 @@ def generateTable():
     # Get the data for each access order.
     for (aOrd, bOrd, cOrd), orderName in orders:
       # Read logs for data.
-      log = logNameFormat.format(type=type, aOrd=aOrd, bOrd=bOrd, cOrd=cOrd, c='{}')
+      logs = tu.selectOne(tu.repCount, type=type, order=aOrd + bOrd + cOrd,
+                          **logDims)
 
       # Save access order data.
-      iterStats, timeStats, cycleStats = \
-        tu.getJsonCumulativeStats('logs/all/' + log, 25)
+      iterStats, timeStats, cycleStats = tu.getJsonListStats(logs)
 
       # Add row with name and data.
       rows.append(
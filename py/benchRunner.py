@@ -0,0 +1,379 @@
+import argparse
+import glob
+import itertools
+import json
+import os
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import thesUtils as tu
+
+# Flags asking Google Benchmark for a json log.
+benchmarkFlags = ['--benchmark_out_format=json']
+
+# PMU events collected by --perf-counters without a list, as libpfm names
+# them. Google Benchmark reports each as a per-iteration entry field.
+defaultPerfCounters = ['CYCLES', 'INSTRUCTIONS', 'L1-DCACHE-LOAD-MISSES', 'BRANCH-MISSES']
+
+def _parseCpuList(cpuList):
+  '''
+  Takes a sysfs CPU list such as '0-3,8'.
+  Returns the list of CPUs.
+  '''
+  cpus = []
+  for part in cpuList.strip().split(','):
+    if '-' in part:
+      first, last = part.split('-')
+      cpus.extend(range(int(first), int(last) + 1))
+    elif part:
+      cpus.append(int(part))
+  return cpus
+
+def sysCacheDomains(level=None, sysDir='/sys/devices/system/cpu'):
+  '''
+  Takes a cache level (default: the highest) and reads the machine's cache
+  topology from sysfs.
+  Returns the list of cache domains at that level, each a sorted list of the
+  CPUs sharing one cache, restricted to the CPUs this process may run on.
+  '''
+  allowed = os.sched_getaffinity(0)
+  caches = {}
+  for cacheDir in glob.glob(os.path.join(sysDir, 'cpu[0-9]*', 'cache', 'index[0-9]*')):
+    with open(os.path.join(cacheDir, 'type'), 'r') as f:
+      if f.read().strip() == 'Instruction':
+        continue
+    with open(os.path.join(cacheDir, 'level'), 'r') as f:
+      cacheLevel = int(f.read())
+    with open(os.path.join(cacheDir, 'shared_cpu_list'), 'r') as f:
+      cpus = tuple(cpu for cpu in _parseCpuList(f.read()) if cpu in allowed)
+    if cpus:
+      caches.setdefault(cacheLevel, set()).add(cpus)
+
+  assert caches, f'No cache topology found in "{sysDir}"'
+  level = max(caches) if level is None else level
+  return sorted(list(cpus) for cpus in caches[level])
+
+def contextCacheDomains(context, level=None):
+  '''
+  Takes a json log's context block and a cache level (default: the highest).
+  Returns the list of cache domains at that level as sysCacheDomains,
+  assuming CPUs sharing a cache are numbered consecutively from 0, as they are
+  for SMT threads on POWER. Domains are restricted to the CPUs this process
+  may run on and dropped if none of their CPUs are left, so a log from
+  another host never pins runs to CPUs this machine lacks.
+  '''
+  caches = [cache for cache in context['caches'] if cache['type'] != 'Instruction']
+  level = max(cache['level'] for cache in caches) if level is None else level
+  sharing = max(cache['num_sharing'] for cache in caches if cache['level'] == level)
+  cpus = context['num_cpus']
+  allowed = os.sched_getaffinity(0)
+  domains = []
+  for first in range(0, cpus, sharing):
+    domain = [cpu for cpu in range(first, min(first + sharing, cpus)) if cpu in allowed]
+    if domain:
+      domains.append(domain)
+  assert domains, 'None of the log\'s CPUs are available to this process'
+  return domains
+
+def expandMatrix(types=tu.orderedTypes, sizes=((8, 32, 16),), layouts=(None,),
+                 orders=('CRR',), variants=('mma',), sinks=(False,),
+                 merges=(False,), opt='O3', threads=(1,)):
+  '''
+  Takes the values of each dimension of an experiment. Sizes are (M, D, N),
+  layouts are (V, H) or None for the default layout and threads are the
+  thread counts to run each kernel at.
+  Returns the list of LogConfigs in the cross product of the dimensions.
+  Handwritten kernels have no optimisation level, sinking or merging.
+  '''
+  configs = []
+  for type, (m, d, n), layout, order, variant, sink, merge, threadCount in \
+      itertools.product(types, sizes, layouts, orders, variants, sinks, merges, threads):
+    layout = None if layout is None else tuple(layout)
+    if variant == 'hand':
+      if sink or merge:
+        continue
+      config = tu.LogConfig(type, m, d, n, layout, order, None, variant, False, False,
+                            threadCount)
+    else:
+      config = tu.LogConfig(type, m, d, n, layout, order, opt, variant, sink, merge,
+                            threadCount)
+    if config not in configs:
+      configs.append(config)
+  return configs
+
+def loadWorkList(workListPath):
+  '''
+  Takes the path of a planReps.py work list.
+  Returns the list of (LogConfig, repetition) jobs it asks for.
+  '''
+  with open(workListPath, 'r') as f:
+    work = json.load(f)
+
+  jobs = []
+  for item in work:
+    config, _ = tu.parseLogName(f"{item['config']}.0.json")
+    jobs.extend((config, rep) for rep in item['reps'])
+  return jobs
+
+class BenchRunner:
+  '''
+  Runs benchmark executables concurrently, writing each repetition's json log
+  to the log directory under the usual log name.
+
+  Finished and failed jobs are recorded in a state file (by default next to
+  the log directory, logs/all -> logs/all.runner.json) so an interrupted
+  campaign restarts where it stopped.
+
+  Given cache domains (see sysCacheDomains), at most one benchmark runs per
+  domain at a time, pinned to as many of the domain's CPUs as it has threads,
+  so concurrent runs never share a cache at that level. Runs with more threads
+  than the largest domain has CPUs fail. The CPUs each run was pinned to are
+  recorded in its log's context, and entries run on more threads than that are
+  dropped from its log.
+
+  Given a toolchain description (e.g. the compiler revision the executables
+  were built with), it is recorded in each log's context as well.
+
+  Given a list of PMU events, Google Benchmark counts them around every
+  benchmark (--benchmark_perf_counters), adding a field per event to each
+  entry.
+  '''
+  def __init__(self, logDir=tu.logDir, exeDir='exe', statePath=None, workers=None,
+               extraArgs=(), domains=None, toolchain=None, perfCounters=None):
+    self.logDir = logDir
+    self.exeDir = exeDir
+    self.statePath = statePath or os.path.normpath(logDir) + '.runner.json'
+    self.extraArgs = list(extraArgs)
+    self.toolchain = toolchain
+    self.perfCounters = perfCounters
+
+    # Free cache domains, if runs are pinned, and a condition signalled
+    # whenever one is freed.
+    self.domains = None
+    self.domainFreed = threading.Condition()
+    if domains is not None:
+      self.domains = [list(domain) for domain in domains]
+      self.domainSize = max(len(domain) for domain in self.domains)
+      workers = min(workers or len(domains), len(domains))
+    self.workers = workers or os.cpu_count()
+
+    self.lock = threading.Lock()
+    self.state = {'done': [], 'failed': {}}
+    if os.path.exists(self.statePath):
+      with open(self.statePath, 'r') as f:
+        self.state = json.load(f)
+
+  def _saveState(self):
+    tmpPath = f'{self.statePath}.{os.getpid()}.tmp'
+    with open(tmpPath, 'w') as f:
+      json.dump(self.state, f, indent=1)
+    os.replace(tmpPath, self.statePath)
+
+  def _record(self, logName, error=None):
+    with self.lock:
+      if error is None:
+        self.state['done'].append(logName)
+        self.state['failed'].pop(logName, None)
+      else:
+        self.state['failed'][logName] = error
+      self._saveState()
+
+  def pending(self, jobs):
+    '''
+    Takes a list of (LogConfig, repetition) jobs.
+    Returns the jobs that have not finished yet.
+    '''
+    done = set(self.state['done'])
+    return [
+      (config, rep) for config, rep in jobs
+      if tu.formatLogName(config, rep) not in done
+      or not os.path.exists(os.path.join(self.logDir, tu.formatLogName(config, rep)))
+    ]
+
+  def command(self, config, outPath, cpus=None):
+    '''
+    Returns the command running one repetition of config into outPath,
+    optionally pinned to a list of CPUs with taskset.
+    Multi-threaded configurations run the single-threaded configuration's
+    executable, whose kernels are registered at several thread counts
+    (->ThreadRange), filtered to the configuration's count.
+    '''
+    exePath = os.path.join(self.exeDir, tu.configName(config._replace(threads=1)))
+    command = [exePath, f'--benchmark_out={outPath}', *benchmarkFlags]
+    if cpus is not None:
+      # Pin with taskset rather than preexec_fn, which is unsafe to fork from
+      # the runner's worker threads.
+      command = ['taskset', '--cpu-list', ','.join(str(cpu) for cpu in cpus)] + command
+    if self.perfCounters:
+      command.append(f'--benchmark_perf_counters={",".join(self.perfCounters)}')
+    if config.threads != 1:
+      command.append(f'--benchmark_filter=/threads:{config.threads}$')
+    return command + self.extraArgs
+
+  def _claimDomain(self, cpus):
+    '''
+    Waits for a free cache domain with at least the given number of CPUs.
+    Returns the domain, removed from the free domains.
+    '''
+    with self.domainFreed:
+      while True:
+        for domain in self.domains:
+          if len(domain) >= cpus:
+            self.domains.remove(domain)
+            return domain
+        self.domainFreed.wait()
+
+  def _releaseDomain(self, domain):
+    with self.domainFreed:
+      self.domains.append(domain)
+      self.domainFreed.notify_all()
+
+  def runJob(self, config, rep):
+    '''
+    Runs one repetition. Returns None on success or an error message.
+    '''
+    logName = tu.formatLogName(config, rep)
+    logPath = os.path.join(self.logDir, logName)
+    tmpPath = f'{logPath}.tmp'
+
+    # Every thread of a run needs a CPU of its own in the domain.
+    if self.domains is not None and config.threads > self.domainSize:
+      error = (f'{config.threads} threads do not fit in cache domains of at most '
+               f'{self.domainSize} CPUs')
+      self._record(logName, error)
+      return error
+
+    # Claim a cache domain to pin the run to.
+    domain = None if self.domains is None else self._claimDomain(config.threads)
+    pinned = None if domain is None else domain[:config.threads]
+
+    try:
+      result = subprocess.run(self.command(config, tmpPath, pinned),
+                              stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                              text=True)
+    except (OSError, subprocess.SubprocessError) as e:
+      error = str(e)
+    else:
+      if result.returncode != 0:
+        error = f'exit code {result.returncode}: {result.stderr.strip()[-200:]}'
+      elif not os.path.exists(tmpPath):
+        error = 'no log written'
+      else:
+        context = {}
+        if domain is not None:
+          context['pinning'] = {'cpus': pinned, 'domain': domain}
+        if self.toolchain is not None:
+          context['toolchain'] = self.toolchain
+        if context:
+          self._rewriteLog(tmpPath, context, None if pinned is None else len(pinned))
+        # Only finished logs get the real name, so readers never see partial
+        # logs.
+        os.replace(tmpPath, logPath)
+        error = None
+    finally:
+      if domain is not None:
+        self._releaseDomain(domain)
+
+    if error is not None and os.path.exists(tmpPath):
+      os.remove(tmpPath)
+    self._record(logName, error)
+    return error
+
+  def _rewriteLog(self, logPath, context, cpus=None):
+    '''
+    Adds fields to a log's context and, given the number of CPUs the run was
+    pinned to, drops the entries run on more threads than that. A
+    ->ThreadRange executable runs every thread count unless filtered, and
+    entries past the pinned CPUs only measure oversubscription.
+    '''
+    with open(logPath, 'r') as f:
+      log = json.load(f)
+    log['context'].update(context)
+    if cpus is not None:
+      log['benchmarks'] = [
+        entry for entry in log['benchmarks'] if entry.get('threads', 1) <= cpus
+      ]
+    with open(logPath, 'w') as f:
+      json.dump(log, f, indent=2)
+
+  def run(self, jobs):
+    '''
+    Takes a list of (LogConfig, repetition) jobs and runs the unfinished ones.
+    Returns a dict of log name -> error message for the jobs that failed.
+    '''
+    os.makedirs(self.logDir, exist_ok=True)
+    jobs = self.pending(jobs)
+    print(f'Running {len(jobs)} job(s) on {self.workers} worker(s).')
+
+    failed = {}
+    with ThreadPoolExecutor(self.workers) as pool:
+      futures = {pool.submit(self.runJob, config, rep): (config, rep) for config, rep in jobs}
+      for i, future in enumerate(futures):
+        config, rep = futures[future]
+        error = future.result()
+        logName = tu.formatLogName(config, rep)
+        if error is not None:
+          failed[logName] = error
+          print(f'[{i + 1}/{len(jobs)}] {logName} failed: {error}')
+        else:
+          print(f'[{i + 1}/{len(jobs)}] {logName}')
+    return failed
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Run a benchmark campaign.')
+  source = parser.add_mutually_exclusive_group(required=True)
+  source.add_argument('--matrix', help='json file of expandMatrix arguments')
+  source.add_argument('--work-list', help='planReps.py work list to run')
+  parser.add_argument('--reps', type=int, default=tu.repCount,
+                      help='repetitions of each configuration in the matrix')
+  parser.add_argument('--jobs', '-j', type=int, default=None,
+                      help='concurrent benchmark runs (default: one per CPU)')
+  parser.add_argument('--exe-dir', default='exe')
+  parser.add_argument('--log-dir', default=tu.logDir)
+  parser.add_argument('--state', help='job state file')
+  parser.add_argument('--pin', action='store_true',
+                      help='pin runs to disjoint cache domains read from sysfs')
+  parser.add_argument('--topology-log',
+                      help='pin runs to cache domains read from this log\'s context')
+  parser.add_argument('--cache-level', type=int,
+                      help='cache level whose domains runs are pinned to (default: highest)')
+  parser.add_argument('--toolchain',
+                      help='toolchain the executables were built with, recorded in each log')
+  parser.add_argument('--perf-counters', nargs='?', const=','.join(defaultPerfCounters),
+                      metavar='EVENTS',
+                      help='comma separated PMU events to count in every benchmark '
+                           f'(default: {",".join(defaultPerfCounters)})')
+  parser.add_argument('--dry-run', action='store_true',
+                      help='list the pending jobs without running them')
+  parser.add_argument('extra', nargs='*', help='extra arguments for every benchmark')
+  args = parser.parse_args()
+
+  if args.matrix:
+    with open(args.matrix, 'r') as f:
+      configs = expandMatrix(**json.load(f))
+    # Run every configuration once per pass, so the runs of one repetition
+    # index share the machine's state and can be paired.
+    jobs = [(config, rep) for rep in range(args.reps) for config in configs]
+  else:
+    jobs = loadWorkList(args.work_list)
+
+  # Find the cache domains to pin runs to.
+  domains = None
+  if args.topology_log:
+    with open(args.topology_log, 'r') as f:
+      domains = contextCacheDomains(json.load(f)['context'], args.cache_level)
+  elif args.pin:
+    domains = sysCacheDomains(args.cache_level)
+
+  perfCounters = None if args.perf_counters is None else args.perf_counters.split(',')
+  runner = BenchRunner(args.log_dir, args.exe_dir, args.state, args.jobs,
+                       args.extra, domains, args.toolchain, perfCounters)
+  if args.dry_run:
+    for config, rep in runner.pending(jobs):
+      logPath = os.path.join(runner.logDir, tu.formatLogName(config, rep))
+      print(' '.join(runner.command(config, logPath)))
+  else:
+    failed = runner.run(jobs)
+    if failed:
+      raise SystemExit(f'{len(failed)} job(s) failed.')
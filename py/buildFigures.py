@@ -0,0 +1,204 @@
+import argparse
+import filecmp
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import thesUtils as tu
+
+# Thesis figures, by output name, and the script generating each.
+figures = {
+  'accessOrder': 'accessOrder.py',
+  'intrHand': 'intrHand.py',
+  'mmaVsx': 'mmaVsx.py',
+  'sinkFloats': 'floatSink.py',
+  'tightAccLayouts': 'tightAccLayout.py',
+}
+
+# Figures of analyses the thesis does not include. They are only built when
+# named and never installed into the thesis.
+extraFigures = {
+  'cacheScaling': 'cacheScaling.py',
+  'speedups': 'speedups.py',
+}
+
+scripts = {**figures, **extraFigures}
+
+# Extensions of each figure's outputs.
+outputExts = ['.pgf', '.png']
+
+# Where the thesis includes the pgf figures from.
+texFigureDir = os.path.join('..', 'tex', 'figures')
+
+# Record of what each figure was last built from.
+manifestPath = 'figures.manifest.json'
+
+def fileHash(path):
+  '''
+  Returns the sha256 digest of a file's contents.
+  '''
+  with open(path, 'rb') as f:
+    return hashlib.sha256(f.read()).hexdigest()
+
+def logStamp(logPath):
+  '''
+  Returns the (mtime, size) of a log, or None if it does not exist.
+  '''
+  if not os.path.exists(logPath):
+    return None
+  stat = os.stat(logPath)
+  return [stat.st_mtime_ns, stat.st_size]
+
+def configLogs(logPaths):
+  '''
+  Takes a list of log paths.
+  Returns a dict of configuration name -> every log of it currently present, so
+  repetitions added since the last build are noticed.
+  '''
+  configs = {}
+  for logPath in logPaths:
+    parsed = tu.parseLogName(logPath)
+    if parsed is None:
+      continue
+    catalog = tu.getLogCatalog(os.path.dirname(logPath))
+    reps = catalog.configs.get(parsed[0], {})
+    configs[tu.configName(parsed[0])] = sorted(reps.values())
+  return configs
+
+def inputsOf(name, logPaths):
+  '''
+  Returns the record of everything figure name is built from.
+  '''
+  return {
+    'script': fileHash(scripts[name]),
+    'utils': fileHash('thesUtils.py'),
+    'logs': {logPath: logStamp(logPath) for logPath in logPaths},
+    'configs': configLogs(logPaths),
+  }
+
+def isStale(name, manifest):
+  '''
+  Returns why figure name must be rebuilt, or None if it is up to date.
+  '''
+  built = manifest.get(name)
+  if built is None:
+    return 'never built'
+
+  for ext in outputExts:
+    if not os.path.exists(name + ext):
+      return f'{name + ext} missing'
+  if name in figures and not os.path.exists(os.path.join(texFigureDir, name + '.pgf')):
+    return 'thesis copy missing'
+
+  current = inputsOf(name, list(built['logs']))
+  for key, reason in [('script', 'script changed'), ('utils', 'thesUtils changed'),
+                      ('logs', 'logs changed'), ('configs', 'repetitions changed')]:
+    if current[key] != built[key]:
+      return reason
+  return None
+
+def renderBatch(names):
+  '''
+  Renders figures names in one process, sharing matplotlib's LaTeX state.
+  Returns a list of (logs read, error message or None) per figure.
+  '''
+  return tu.renderFigures([scripts[name] for name in names])
+
+def installFigure(name):
+  '''
+  Copies figure name's pgf into the thesis if it changed, leaving the thesis
+  copy untouched otherwise so make does not rebuild the pdf.
+  '''
+  source = name + '.pgf'
+  target = os.path.join(texFigureDir, source)
+  if not os.path.exists(target) or not filecmp.cmp(source, target, shallow=False):
+    shutil.copyfile(source, target)
+    return True
+  return False
+
+def touchStamp(stampPath, changed):
+  '''
+  Updates the modification time of the stamp make rebuilds the thesis after
+  if any thesis figure changed or the stamp does not exist yet.
+  '''
+  if changed or not os.path.exists(stampPath):
+    with open(stampPath, 'a'):
+      os.utime(stampPath)
+
+def buildFigures(names, force=False, workers=None, stampPath=None):
+  '''
+  Rebuilds the stale figures among names, rendering them in one batch per
+  worker process, and optionally touches a stamp if a thesis figure changed
+  (see touchStamp).
+  Returns a dict of figure name -> error message for the figures that failed.
+  '''
+  manifest = {}
+  if os.path.exists(manifestPath):
+    with open(manifestPath, 'r') as f:
+      manifest = json.load(f)
+
+  # Bring the log cache up to date once, before the scripts share it.
+  tu.getLogCache(tu.logDir)
+
+  stale = {}
+  for name in names:
+    reason = 'forced' if force else isStale(name, manifest)
+    if reason is not None:
+      stale[name] = reason
+  if not stale:
+    print('Figures are up to date.')
+    if stampPath is not None:
+      touchStamp(stampPath, False)
+    return {}
+
+  # Split the figures into one batch per worker, each rendered in one process.
+  names = list(stale)
+  workers = min(workers or os.cpu_count(), len(names))
+  batches = [names[i::workers] for i in range(workers)]
+  with ProcessPoolExecutor(workers) as pool:
+    results = {}
+    for batch, batchResults in zip(batches, pool.map(renderBatch, batches)):
+      results.update(zip(batch, batchResults))
+
+  failed = {}
+  changed = False
+  for name in names:
+    logPaths, error = results[name]
+    if error is not None:
+      failed[name] = error
+      print(f'{name}: failed ({stale[name]}): {error}')
+      continue
+    manifest[name] = inputsOf(name, logPaths)
+    installed = name in figures and installFigure(name)
+    changed |= installed
+    print(f'{name}: rebuilt ({stale[name]}){", installed" if installed else ""}')
+
+  with open(manifestPath, 'w') as f:
+    json.dump(manifest, f, indent=1)
+  if stampPath is not None:
+    touchStamp(stampPath, changed)
+  return failed
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Rebuild stale thesis figures.')
+  parser.add_argument('names', nargs='*', metavar='figure',
+                      help=f'figures to consider, of {", ".join(scripts)} '
+                           '(default: every thesis figure)')
+  parser.add_argument('--force', action='store_true', help='rebuild even if up to date')
+  parser.add_argument('--jobs', '-j', type=int, default=None,
+                      help='figures built in parallel (default: one per CPU)')
+  parser.add_argument('--stamp',
+                      help='file to touch whenever a thesis figure changes, for make')
+  args = parser.parse_args()
+  for name in args.names:
+    if name not in scripts:
+      parser.error(f'unknown figure {name}')
+
+  # Scripts read logs and write figures relative to this directory.
+  stampPath = None if args.stamp is None else os.path.abspath(args.stamp)
+  os.chdir(os.path.dirname(os.path.abspath(__file__)))
+  failed = buildFigures(args.names or list(figures), args.force, args.jobs, stampPath)
+  if failed:
+    raise SystemExit(f'{len(failed)} figure(s) failed.')
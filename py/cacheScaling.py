@@ -0,0 +1,320 @@
+import argparse
+from collections import namedtuple
+
+import numpy as np
+from matplotlib import pyplot as plt
+
+import thesUtils as tu
+
+# Log dimensions of the kernel size sweeps, as mmaVsxFull.py.
+logDims = dict(layout=None, order='CRR', sink=False, merge=False)
+sweepVariants = [('mma', 'MMA'), ('vector', 'Vector')]
+
+# Kernel sizes of the sweeps.
+sizes = [(8, 8, 16), (16, 8, 16), (32, 8, 32), (64, 8, 64), (128, 8, 128)]
+
+# Bits of each element of C, which is always held as 32-bit accumulator
+# elements.
+outputBits = 32
+
+# Names of the cache levels of tu.cacheLevels, then memory past the last.
+levelNames = ['L1D', 'L2', 'L3', 'Memory']
+
+# Fewest sizes of a sweep a level's slope is fitted from. A single size would
+# fix the slope exactly, however noisy it is.
+minLevelSizes = 2
+
+# Fitted cycles of a sweep: intercept + slopes[level] * ops, where level is the
+# first cache level the working set fits in.
+#   intercept: fixed cycles of every call, NaN where no level was fitted.
+#   slopes: cycles per operation of each level, by name, None where fewer than
+#           minLevelSizes sizes of the sweep lie in the level.
+#   cacheSizes: bytes of each cache level.
+#   interceptErr: CI half-width of the intercept.
+#   slopeErrs: CI half-width of each slope, by name, None where not fitted.
+#   covariance: covariance of the intercept and each level's slope, in the
+#               order of ['intercept'] + levelNames, in squared CI half-widths
+#               and NaN where not fitted.
+#   sizeCounts: number of sizes of the sweep in each level, by name.
+ScalingFit = namedtuple('ScalingFit', [
+  'intercept', 'slopes', 'cacheSizes', 'interceptErr', 'slopeErrs', 'covariance',
+  'sizeCounts',
+])
+
+def workingSet(type, m, d, n):
+  '''
+  Takes an element type from tu.types and the kernel's M, D and N.
+  Returns the bytes of A, B and C the kernel touches.
+  '''
+  bits, _ = tu.types[type]
+  return ((m * d + d * n) * bits + m * n * outputBits) // 8
+
+def kernelOps(m, d, n):
+  '''
+  Returns the operations (multiplies and adds) of an M x D x N kernel.
+  '''
+  return 2 * m * d * n
+
+def cacheLevel(bytes, cacheSizes):
+  '''
+  Takes a working set in bytes and the bytes of each cache level.
+  Returns the index in levelNames of the first level the working set fits in.
+  '''
+  for i, size in enumerate(cacheSizes):
+    if 0 < size and bytes <= size:
+      return i
+  return len(cacheSizes)
+
+def sweepConfigs(type, variant):
+  '''
+  Returns the LogConfigs of a type and variant's sweep that have logs.
+  '''
+  catalog = tu.getLogCatalog()
+  configs = []
+  for m, d, n in sizes:
+    selected = catalog.select(type=type, m=m, d=d, n=n, variant=variant, **logDims)
+    configs += list(selected)
+  return configs
+
+def sweepCacheSizes(configs):
+  '''
+  Takes the LogConfigs of a sweep.
+  Returns the cache sizes their logs' context recorded.
+  '''
+  catalog = tu.getLogCatalog()
+  for config in configs:
+    for logPath in catalog.configs[config].values():
+      context = tu.getJsonContext(logPath)
+      if context is not None and context['cache_sizes'].any():
+        return tuple(int(size) for size in context['cache_sizes'])
+  return (0,) * len(tu.cacheLevels)
+
+def fitScaling(workingSets, ops, cycles, errs, cacheSizes):
+  '''
+  Takes the working sets, operations, mean cycles and their CI half-widths of
+  each size of a sweep and the bytes of each cache level.
+
+  Fits cycles as piecewise linear in the operations, with a slope for each
+  cache level at least minLevelSizes of the sizes lie in and an intercept
+  shared by all levels, minimising the relative residuals so small kernels
+  weigh as much as large ones. The coefficients are left unconstrained, so a
+  negative intercept is reported as fitted. Sizes in levels with too few
+  sizes are left out of the fit.
+
+  The half-widths are propagated through the weighted least squares solution,
+  treating the means as independent.
+
+  Returns a ScalingFit.
+  '''
+  levels = np.array([cacheLevel(ws, cacheSizes) for ws in workingSets])
+  sizeCounts = {name: int((levels == i).sum()) for i, name in enumerate(levelNames)}
+  present = [i for i, name in enumerate(levelNames) if sizeCounts[name] >= minLevelSizes]
+  fitted = np.isin(levels, present)
+  ops = np.asarray(ops, dtype=np.float64)[fitted]
+  cycles = np.asarray(cycles, dtype=np.float64)[fitted]
+  errs = np.asarray(errs, dtype=np.float64)[fitted]
+  levels = levels[fitted]
+
+  slopes = {name: None for name in levelNames}
+  slopeErrs = {name: None for name in levelNames}
+  covariance = np.full((len(levelNames) + 1,) * 2, np.nan)
+  if not present:
+    return ScalingFit(np.nan, slopes, tuple(cacheSizes), None, slopeErrs, covariance,
+                      sizeCounts)
+
+  # Columns: the intercept, then the ops of the sizes in each present level.
+  design = np.column_stack(
+    [np.ones_like(ops)] + [np.where(levels == level, ops, 0) for level in present])
+  weights = 1 / cycles
+  weighted = design * weights[:, np.newaxis]
+  coefs, *_ = np.linalg.lstsq(weighted, cycles * weights, rcond=None)
+
+  # The coefficients are a linear map of the means.
+  linear = np.linalg.pinv(weighted) * weights
+  coefCov = linear @ np.diag(errs ** 2) @ linear.T
+
+  columns = [0] + [level + 1 for level in present]
+  covariance[np.ix_(columns, columns)] = coefCov
+  for j, (level, slope) in enumerate(zip(present, coefs[1:]), 1):
+    slopes[levelNames[level]] = float(slope)
+    slopeErrs[levelNames[level]] = float(np.sqrt(coefCov[j, j]))
+  return ScalingFit(float(coefs[0]), slopes, tuple(cacheSizes),
+                    float(np.sqrt(coefCov[0, 0])), slopeErrs, covariance, sizeCounts)
+
+def predictCycles(fit, type, m, d, n):
+  '''
+  Takes a ScalingFit and an element type and kernel size.
+  Returns a tuple of (predicted cycles, name of the working set's cache
+  level, whether the level's slope was extrapolated). Levels without a fitted
+  slope use the slope of the nearest fitted level below, so their predictions
+  are lower bounds. Predictions are NaN if no level was fitted.
+  '''
+  level = cacheLevel(workingSet(type, m, d, n), fit.cacheSizes)
+  observed = [i for i, name in enumerate(levelNames) if fit.slopes[name] is not None]
+  if not observed:
+    return (np.nan, levelNames[level], True)
+  below = [i for i in observed if i <= level]
+  source = max(below) if below else min(observed)
+  slope = fit.slopes[levelNames[source]]
+  return (fit.intercept + slope * kernelOps(m, d, n), levelNames[level],
+          source != level)
+
+def cliffs(fit):
+  '''
+  Takes a ScalingFit.
+  Returns a list of (from level, to level, slowdown, CI half-width) for every
+  pair of adjacent fitted levels, where slowdown is how many times more cycles
+  per operation the larger level costs. Half-widths come from the delta
+  method.
+  '''
+  observed = [name for name in levelNames if fit.slopes[name] is not None]
+  results = []
+  for low, high in zip(observed, observed[1:]):
+    slowdown = fit.slopes[high] / fit.slopes[low]
+    i = levelNames.index(low) + 1
+    j = levelNames.index(high) + 1
+    cov = fit.covariance
+    relVar = (cov[j, j] / fit.slopes[high] ** 2 + cov[i, i] / fit.slopes[low] ** 2
+              - 2 * cov[i, j] / (fit.slopes[high] * fit.slopes[low]))
+    results.append((low, high, slowdown, slowdown * float(np.sqrt(max(relVar, 0)))))
+  return results
+
+def locatesCliffs(fit):
+  '''
+  Takes a ScalingFit.
+  Returns whether at least two levels were fitted. Otherwise the sweep has too
+  few sizes past a single level to say how cycles scale across the levels.
+  '''
+  return sum(slope is not None for slope in fit.slopes.values()) >= 2
+
+def getScaling():
+  '''
+  Gathers every sweep's cycle stats at once and fits each sweep.
+  Returns a dict of (type, variant) -> (configs, working sets, ops, means,
+  CI half-widths, ScalingFit).
+  '''
+  sweeps = {
+    (type, variant): sweepConfigs(type, variant)
+    for type in tu.orderedTypes for variant, _ in sweepVariants
+  }
+  configs = [config for sweep in sweeps.values() for config in sweep]
+  means, _, halfWidths = tu.batchStats(tu.getConfigSamples(configs, tu.repCount))
+
+  scaling = {}
+  start = 0
+  for key, sweep in sweeps.items():
+    rows = slice(start, start + len(sweep))
+    start += len(sweep)
+    if not sweep:
+      continue
+    workingSets = [workingSet(c.type, c.m, c.d, c.n) for c in sweep]
+    ops = [kernelOps(c.m, c.d, c.n) for c in sweep]
+    cycles = means[rows, tu.statNames.index('cycles')]
+    errs = halfWidths[rows, tu.statNames.index('cycles')]
+    fit = fitScaling(workingSets, ops, cycles, errs, sweepCacheSizes(sweep))
+    scaling[key] = (sweep, workingSets, ops, cycles, errs, fit)
+  return scaling
+
+def generatePlot():
+  scaling = getScaling()
+
+  # Set up figure and axes.
+  fig = plt.figure()
+  figWidth = 2
+  figHeight = (len(tu.orderedTypes) + 1) // 2
+
+  for i, type in enumerate(tu.orderedTypes):
+    ax = fig.add_subplot(figHeight, figWidth, i + 1)
+    for variant, variantName in sweepVariants:
+      if (type, variant) not in scaling:
+        continue
+      sweep, workingSets, ops, cycles, errs, fit = scaling[type, variant]
+      ops = np.asarray(ops)
+
+      # Measured cycles per operation, with the fitted model over the sweep.
+      points = ax.errorbar(workingSets, cycles / ops, yerr=errs / ops, fmt='o',
+                           markersize=3, capsize=1, label=variantName)
+      order = np.argsort(workingSets)
+      modelled = [
+        predictCycles(fit, type, sweep[j].m, sweep[j].d, sweep[j].n)[0] / ops[j]
+        for j in order
+      ]
+      if locatesCliffs(fit):
+        ax.plot(np.asarray(workingSets)[order], modelled, linestyle='--',
+                linewidth=.75, color=points[0].get_color())
+
+    # Mark where the working set outgrows each cache level.
+    cacheSizes = next(iter(scaling.values()))[5].cacheSizes
+    for name, size in zip(levelNames, cacheSizes):
+      if size:
+        ax.axvline(size, color='gray', linewidth=.5, linestyle=':')
+        ax.text(size, 1, f' {name}', transform=ax.get_xaxis_transform(),
+                fontsize=6, va='top')
+
+    ax.set_xscale('log', base=2)
+    ax.set_yscale('log')
+    ax.set_title(type, fontsize=9)
+    ax.set_xlabel('Working Set (bytes)', fontsize=8)
+    ax.set_ylabel('Cycles per Operation', fontsize=8)
+    ax.tick_params(labelsize=6)
+    ax.legend(fontsize='x-small')
+
+  fig.set_size_inches(tu.textWidth, 2.5 * figHeight)
+  fig.tight_layout()
+  fig.savefig('cacheScaling.png')
+  fig.savefig('cacheScaling.pgf')
+
+def parseSize(size):
+  '''
+  Parses an MxDxN kernel size.
+  '''
+  m, d, n = (int(dim) for dim in size.split('x'))
+  return (m, d, n)
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(
+    description='Fit kernel size sweeps against the cache levels.')
+  parser.add_argument('--predict', nargs='*', type=parseSize, default=[],
+                      metavar='MxDxN', help='kernel sizes to predict cycles of')
+  parser.add_argument('--plot', action='store_true', help='also plot the sweeps')
+  args = parser.parse_args()
+
+  for (type, variant), (sweep, workingSets, ops, cycles, errs, fit) in \
+      getScaling().items():
+    if not locatesCliffs(fit):
+      # A single level's line says nothing about the cache levels, so only the
+      # measurements are reported.
+      counts = ', '.join(f'{name} {count}' for name, count in fit.sizeCounts.items()
+                         if count)
+      print(f'{type} {variant}: the sweep cannot support a cache scaling fit, which needs '
+            f'{minLevelSizes} sizes in each of two levels (sizes per level: {counts})')
+      for config, ws, size, mean, err in zip(sweep, workingSets, ops, cycles, errs):
+        name = levelNames[cacheLevel(ws, fit.cacheSizes)]
+        print(f'  {config.m}x{config.d}x{config.n} ({name}): measured {mean / size:.4f} '
+              f'+- {err / size:.4f} cycles per operation')
+      if args.predict:
+        print('  no predictions without a fit')
+      continue
+
+    slopes = ', '.join(
+      f'{name} {slope:.4f} +- {fit.slopeErrs[name]:.4f}'
+      for name, slope in fit.slopes.items() if slope is not None)
+    print(f'{type} {variant}: {fit.intercept:.1f} +- {fit.interceptErr:.1f} cycles '
+          f'+ per op {slopes}')
+    for low, high, slowdown, halfWidth in cliffs(fit):
+      print(f'  {low} -> {high}: {slowdown:.2f}x +- {halfWidth:.2f} cycles per operation')
+
+    # Levels with too few sizes only get their measurements.
+    for config, ws, size, mean, err in zip(sweep, workingSets, ops, cycles, errs):
+      name = levelNames[cacheLevel(ws, fit.cacheSizes)]
+      if fit.slopes[name] is None:
+        print(f'  {name}: not fitted, {fit.sizeCounts[name]} size(s); '
+              f'{config.m}x{config.d}x{config.n} measured {mean / size:.4f} '
+              f'+- {err / size:.4f} cycles per operation')
+    for m, d, n in args.predict:
+      predicted, level, extrapolated = predictCycles(fit, type, m, d, n)
+      note = ', extrapolated' if extrapolated else ''
+      print(f'  {m}x{d}x{n}: {predicted:.1f} cycles ({level}{note})')
+
+  if args.plot:
+    generatePlot()
@@ -0,0 +1,111 @@
+import argparse
+
+import numpy as np
+
+import thesUtils as tu
+
+# Metrics compared, indexing getConfigSamples' samples.
+metrics = {'cpu_time': 1, 'CYCLES': 2}
+
+def compareLogDirs(baselineDir, candidateDir, count=None, correction='holm'):
+  '''
+  Takes two log directories using the same naming scheme.
+  Matches their configurations by parsed name and tests every configuration's
+  metrics for a change from baseline to candidate with Welch's t-test and the
+  Mann-Whitney U test, correcting each test's p-values for multiple
+  comparisons over every configuration and metric.
+  Returns a list of dicts, one per configuration and metric.
+  '''
+  baseline = tu.getLogCatalog(baselineDir).configs
+  candidate = tu.getLogCatalog(candidateDir).configs
+  configs = sorted(set(baseline) & set(candidate), key=tu.configName)
+
+  # Samples shaped (configurations, repetitions, metrics).
+  columns = list(metrics.values())
+  baseSamples = tu.getConfigSamples(configs, count, baselineDir)[:, :, columns]
+  candSamples = tu.getConfigSamples(configs, count, candidateDir)[:, :, columns]
+
+  # Test each (configuration, metric) as its own row.
+  rows = lambda samples: np.moveaxis(samples, 2, 1).reshape(-1, samples.shape[1])
+  baseRows = rows(baseSamples)
+  candRows = rows(candSamples)
+  _, welchP, hedgesG = tu.welchTest(baseRows, candRows)
+  _, mwuP, cliffsDelta = tu.mannWhitneyTest(baseRows, candRows)
+  welchP = tu.adjustPValues(welchP, correction)
+  mwuP = tu.adjustPValues(mwuP, correction)
+  with np.errstate(divide='ignore', invalid='ignore'):
+    baseMeans = np.nanmean(baseRows, axis=1)
+    candMeans = np.nanmean(candRows, axis=1)
+    change = candMeans / baseMeans - 1
+
+  results = []
+  for i, (config, metric) in enumerate(
+      (config, metric) for config in configs for metric in metrics):
+    results.append({
+      'config': tu.configName(config),
+      'metric': metric,
+      'baseline': baseMeans[i],
+      'candidate': candMeans[i],
+      'change': change[i],
+      'welchP': welchP[i],
+      'mannWhitneyP': mwuP[i],
+      'hedgesG': hedgesG[i],
+      'cliffsDelta': cliffsDelta[i],
+    })
+  return results
+
+def significant(result, alpha=0.05, minChange=0.0):
+  '''
+  Takes a compareLogDirs result.
+  Returns whether both tests reject at alpha and the change is at least
+  minChange, relative to the baseline.
+  '''
+  return (result['welchP'] < alpha and result['mannWhitneyP'] < alpha
+          and abs(result['change']) >= minChange)
+
+def formatResult(result):
+  '''
+  Returns a one line summary of a compareLogDirs result.
+  '''
+  return (
+    f'{result["config"]:<44} {result["metric"]:<8} '
+    f'{result["baseline"]:>12.2f} -> {result["candidate"]:>12.2f} '
+    f'{100 * result["change"]:>+8.2f}%  g={result["hedgesG"]:>+7.2f} '
+    f'delta={result["cliffsDelta"]:>+5.2f}  '
+    f'p={result["welchP"]:.1e}/{result["mannWhitneyP"]:.1e}'
+  )
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(
+    description='Compare a candidate log directory against a baseline.')
+  parser.add_argument('baseline')
+  parser.add_argument('candidate')
+  parser.add_argument('--count', type=int, default=None,
+                      help='only compare repetitions below this count')
+  parser.add_argument('--alpha', type=float, default=0.05)
+  parser.add_argument('--min-change', type=float, default=0.0,
+                      help='smallest relative change worth reporting, e.g. 0.01')
+  parser.add_argument('--correction', choices=['holm', 'bh'], default='holm')
+  parser.add_argument('--fail-on-regression', action='store_true',
+                      help='exit with an error if anything regressed')
+  args = parser.parse_args()
+
+  results = compareLogDirs(args.baseline, args.candidate, args.count, args.correction)
+  found = [r for r in results if significant(r, args.alpha, args.min_change)]
+
+  # Larger cycle counts and cpu times are regressions. Biggest changes first.
+  regressions = sorted((r for r in found if r['change'] > 0), key=lambda r: -r['change'])
+  improvements = sorted((r for r in found if r['change'] < 0), key=lambda r: r['change'])
+
+  configs = len({r['config'] for r in results})
+  print(f'Compared {configs} configuration(s), {len(results)} test(s), '
+        f'{args.correction} corrected at alpha {args.alpha}.')
+  print(f'\n{len(regressions)} regression(s):')
+  for result in regressions:
+    print('  ' + formatResult(result))
+  print(f'\n{len(improvements)} improvement(s):')
+  for result in improvements:
+    print('  ' + formatResult(result))
+
+  if args.fail_on_regression and regressions:
+    raise SystemExit(1)
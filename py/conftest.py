@@ -0,0 +1,38 @@
+import json
+import os
+
+import pytest
+
+import stubBench
+import thesUtils as tu
+
+@pytest.fixture
+def logDir(tmp_path):
+  '''
+  Returns the path of an empty log directory.
+  '''
+  path = tmp_path / 'logs'
+  path.mkdir()
+  return str(path)
+
+@pytest.fixture
+def writeLog(logDir):
+  '''
+  Returns a function writing a stub log of a configuration's repetition to
+  logDir, with the cycles of its kernel entries set to the given value if any
+  and the given PMU events counted, and returning the log's path.
+  '''
+  def write(config, rep, cycles=None, events=()):
+    log = stubBench.stubLog(config, tu.configName(config), events=events,
+                            drift=stubBench.stubDrift(rep))
+    if cycles is not None:
+      for entry in log['benchmarks']:
+        if entry['name'].startswith(('intrinsicMult', 'handMult')):
+          entry['CYCLES'] = cycles + (13 if config.variant == 'hand' else 0)
+        else:
+          entry['CYCLES'] = 13
+    logPath = os.path.join(logDir, tu.formatLogName(config, rep))
+    with open(logPath, 'w') as f:
+      json.dump(log, f)
+    return logPath
+  return write
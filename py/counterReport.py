@@ -0,0 +1,68 @@
+import argparse
+
+import numpy as np
+
+import thesUtils as tu
+
+def counterReport(logDir=tu.logDir, metrics=None, count=None, confidence=0.95,
+                  **dims):
+  '''
+  Takes a log directory, the metrics to report (default: cycles and every
+  counter metric) and LogConfig dimensions selecting configurations.
+  Returns a list with an entry per selected configuration whose logs hold PMU
+  counters: a tuple of (configuration name, results), results holding a
+  tuple of (mean, CI lower difference, CI upper difference) per metric, NaN
+  for metrics of counters the logs lack.
+  '''
+  metrics = metrics or ['cycles', *tu.counterMetrics]
+
+  report = []
+  catalog = tu.getLogCatalog(logDir)
+  selected = catalog.select(count, **dims)
+  for config in sorted(selected, key=tu.configName):
+    logPaths = selected[config]
+    # Every counter metric needs instructions, so skip logs without them. The
+    # field exists, all NaN, as soon as any log in the directory counted it.
+    _, fields = tu.getEntryTable(logPaths)
+    instructions = fields.get(tu.fieldName('INSTRUCTIONS'))
+    if instructions is None or np.isnan(instructions).all():
+      continue
+
+    results = []
+    for metric in metrics:
+      try:
+        stats, = tu.getConfigMetricStats(config, logPaths, [metric], confidence)
+      except ValueError:
+        stats = (float('nan'),) * 3
+      results.append(stats)
+    report.append((tu.configName(config), results))
+  return report
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(
+    description='Report PMU counter metrics of every configuration with counters.')
+  parser.add_argument('logDir', nargs='?', default=tu.logDir)
+  parser.add_argument('--metrics', nargs='+',
+                      choices=[*tu.statNames, *tu.throughputMetrics, *tu.counterMetrics],
+                      help='metrics to report (default: cycles and every counter metric)')
+  parser.add_argument('--type', help='only report this element type')
+  parser.add_argument('--count', type=int, default=None,
+                      help='only use repetitions below this count')
+  parser.add_argument('--confidence', type=float, default=0.95)
+  args = parser.parse_args()
+
+  metrics = args.metrics or ['cycles', *tu.counterMetrics]
+  dims = {} if args.type is None else {'type': args.type}
+  report = counterReport(args.logDir, metrics, args.count, args.confidence, **dims)
+  if not report:
+    raise SystemExit('No logs with PMU counters; run them with benchRunner.py --perf-counters.')
+
+  width = max(len(name) for name, _ in report)
+  print(f'{"configuration":<{width}} ' + ' '.join(f'{metric:>20}' for metric in metrics))
+  for name, results in report:
+    cells = [
+      f'{mean:{tu.metricFormats.get(metric, "0.2f")}} +- '
+      f'{upper:{tu.metricFormats.get(metric, "0.2f")}}'
+      for metric, (mean, _, upper) in zip(metrics, results)
+    ]
+    print(f'{name:<{width}} ' + ' '.join(f'{cell:>20}' for cell in cells))
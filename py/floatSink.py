@@ -1,3 +1,5 @@
+import os
+
 import matplotlib
 
 matplotlib.use("pgf")
@@ -12,12 +14,12 @@ from matplotlib import pyplot as plt
 
 import thesUtils as tu
 
-# logNameFormat = '{type}.{m}x{d}x{n}.vdhd.CRR.O3.timed{opt}.txt'
-logNameFormat = '{type}.{m}x{d}x{n}.vdhd.CRR.O3.bench{opt}.{c}.json'
+# Types compared in the figure and table.
+types = ['float', 'i16']
 
 opts = [
-  ('', 'No Load Sinking'),
-  ('.sink', 'Load Sinking')
+  (False, 'No Load Sinking'),
+  (True, 'Load Sinking')
 ]
 
 layouts = [
@@ -25,25 +27,35 @@ layouts = [
   ((32, 8, 32), '$32 \\times 8 \\times 32$')
 ]
 
-def generatePlot():
+def getStats():
+  '''
+  Returns a dict of (type, sink, (m, d, n)) -> (iterations, cpu time, cycles)
+  stats of every configuration in the figure, gathered in one batch.
+  '''
+  keys = [
+    (type, sink, size) for type in types for sink, _ in opts for size, _ in layouts
+  ]
+  requests = []
+  for type, sink, (m, d, n) in keys:
+    config = tu.LogConfig(type, m, d, n, None, 'CRR', 'O3', 'mma', sink, False)
+    requests.append((os.path.join(tu.logDir, tu.formatLogName(config, '{}')), tu.repCount))
+  return dict(zip(keys, tu.getJsonCumulativeStatsBatch(requests)))
+
+def generatePlot(stats=None):
   # Get data.
+  stats = stats or getStats()
   data = {}
-  for type in ['float', 'i16']:
+  for type in types:
     # Holding place optimisation data.
     optData = {}
 
     # Get the data for each ACC layout.
-    for optStr, optName in opts:
+    for sink, optName in opts:
       layoutData = {}
 
-      for (m, d, n), layoutName in layouts:
-        # Read logs for data.
-        # log = logNameFormat.format(type=type, opt=optStr, m=m, d=d, n=n)
-        log = logNameFormat.format(type=type, opt=optStr, m=m, d=d, n=n, c='{}')
-
+      for size, layoutName in layouts:
         # Save layout data.
-        # layoutData[layoutName] = tu.getFileStats('logs/sinkMerge/' + log)
-        _, _, cycleStats = tu.getJsonCumulativeStats('logs/all/' + log, 25)
+        _, _, cycleStats = stats[type, sink, size]
         layoutData[layoutName] = cycleStats
 
       # Save layout data.
@@ -60,7 +72,7 @@ def generatePlot():
   # Start plotting.
   groupLabels = [layout[1] for layout in layouts]
   barLabels = [opt[1] for opt in opts]
-  for i, type in enumerate(['float', 'i16']):
+  for i, type in enumerate(types):
     # Get opt data for this type.
     optData = data[type]
 
@@ -98,17 +110,14 @@ def generatePlot():
   fig.savefig('sinkFloats.pgf')
   fig.savefig('sinkFloats.png')
 
-def generateTable():
+def generateTable(stats=None):
+  stats = stats or getStats()
   rows = []
-  for type in ['float', 'i16']:
+  for type in types:
     for (m, d, n), layoutName in layouts:
-      for optStr, optName in opts:
-        # Read logs for data.
-        log = logNameFormat.format(type=type, opt=optStr, m=m, d=d, n=n, c='{}')
-        log = 'logs/all/' + log
-
+      for sink, optName in opts:
         # Get stats.
-        iterStats, timeStats, cycleStats = tu.getJsonCumulativeStats(log, 25)
+        iterStats, timeStats, cycleStats = stats[type, sink, (m, d, n)]
 
         # Add row with name and data.
         rows.append(
@@ -119,5 +128,6 @@ def generateTable():
   print(tu.tableData(rows))
 
 if __name__ == '__main__':
-  generatePlot()
-  generateTable()
+  stats = getStats()
+  generatePlot(stats)
+  generateTable(stats)
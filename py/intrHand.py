@@ -2,43 +2,36 @@ from matplotlib import pyplot as plt
 
 import thesUtils as tu
 
-# Log file name format.
-handLogNameFormat = 'float.8x32x16.vdhd.CRR.hand.{c}.json'
-regLogNameFormat = 'float.8x32x16.vdhd.CRR.O3.bench.{c}.json'
-sinkLogNameFormat = 'float.8x32x16.vdhd.CRR.O3.bench.sink.{c}.json'
+# Log dimensions of each kernel.
+logDims = dict(type='float', m=8, d=32, n=16, layout=None, order='CRR')
+handLogDims = dict(variant='hand', **logDims)
+regLogDims = dict(variant='mma', sink=False, **logDims)
+sinkLogDims = dict(variant='mma', sink=True, **logDims)
 
-def generatePlot():
-  # Get log names.
-  handLog = handLogNameFormat.format(type=type, c='{}')
-  regLog = regLogNameFormat.format(type=type, c='{}')
-  sinkLog = sinkLogNameFormat.format(type=type, c='{}')
+# Groups of the plot: the (variant, sink) of each kernel and its label.
+kernels = [
+  (('mma', False), 'No Load Sinking'),
+  (('mma', True), 'Load Sinking'),
+  (('hand', False), 'Handwritten'),
+]
 
-  # Get
-  _, _, handCycleStats = tu.getJsonCumDiffStats(
-                              'logs/all/' + handLog, 25, 'handMult', 'fnCall')
-  _, _, regCycleStats = tu.getJsonCumulativeStats('logs/all/' + regLog, 25)
-  _, _, sinkCycleStats = tu.getJsonCumulativeStats('logs/all/' + sinkLog, 25)
+def generatePlot():
+  # Get data: cycles of each kernel. Handwritten kernels are measured without
+  # their call overhead.
+  store = tu.getResultStore()
+  records = store.mask(rep=list(range(tu.repCount)), variant=['mma', 'hand'], merge=False,
+                      **logDims)
+  _, _, _, bars, errs = store.pivot('cycles', ('variant', 'sink'), 'type', None, records,
+                                    rowValues=[kernel for kernel, _ in kernels])
 
   # Set up figure and axes.
   fig = plt.figure()
   figWidth = 1
   figHeight = 1
 
-  groupNames = ['No Load Sinking', 'Load Sinking', 'Handwritten']
+  groupNames = [name for _, name in kernels]
   barNames = ['Cycles']
 
-  bars = [
-    [regCycleStats[0], sinkCycleStats[0], handCycleStats[0]]
-  ]
-
-  # Get error bounds.
-  errs = [
-    [
-      [regCycleStats[1], sinkCycleStats[1], handCycleStats[1]],
-      [regCycleStats[2], sinkCycleStats[2], handCycleStats[2]]
-    ]
-  ]
-
   # Get axis and start plotting.
   ax = fig.add_subplot(figHeight, figWidth, 1)
   tu.plotGroupedData(ax, groupNames, barNames, bars, errs)
@@ -56,17 +49,15 @@ def generateTable():
   # Get data.
   rows = []
   # Read logs for data.
-  handLog = handLogNameFormat.format(type=type, c='{}')
-  regLog = regLogNameFormat.format(type=type, c='{}')
-  sinkLog = sinkLogNameFormat.format(type=type, c='{}')
+  handLogs = tu.selectOne(tu.repCount, **handLogDims)
+  regLogs = tu.selectOne(tu.repCount, **regLogDims)
+  sinkLogs = tu.selectOne(tu.repCount, **sinkLogDims)
 
   # Save handwritten, sunk, and unsunk data.
   handIterStats, handTimeStats, handCycleStats = \
-    tu.getJsonCumDiffStats('logs/all/' + handLog, 25, 'handMult', 'fnCall')
-  regIterStats, regTimeStats, regCycleStats = \
-    tu.getJsonCumulativeStats('logs/all/' + regLog, 25)
-  sinkIterStats, sinkTimeStats, sinkCycleStats = \
-    tu.getJsonCumulativeStats('logs/all/' + sinkLog, 25)
+    tu.getJsonListDiffStats(handLogs, 'handMult', 'fnCall')
+  regIterStats, regTimeStats, regCycleStats = tu.getJsonListStats(regLogs)
+  sinkIterStats, sinkTimeStats, sinkCycleStats = tu.getJsonListStats(sinkLogs)
 
   # Add row with name and data.
   rows.append(
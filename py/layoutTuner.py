@@ -0,0 +1,358 @@
+import argparse
+import json
+import math
+
+import numpy as np
+import scipy.optimize as opt
+import scipy.stats as st
+
+import mmaModel
+import thesUtils as tu
+from benchRunner import BenchRunner
+
+# Dimensions shared by every tuned configuration.
+tuneDims = dict(order='CRR', opt='O3', variant='mma', sink=False, merge=False)
+
+def tuneConfig(type, size, layout):
+  '''
+  Takes an element type, an (M, D, N) size and a (V, H) layout.
+  Returns the LogConfig benchmarking them.
+  '''
+  m, d, n = size
+  return tu.LogConfig(type, m, d, n, layout, tuneDims['order'], tuneDims['opt'],
+                      tuneDims['variant'], tuneDims['sink'], tuneDims['merge'])
+
+def groupOf(config):
+  '''
+  Returns the (type, M, D, N) group a configuration's layout is tuned within.
+  '''
+  return (config.type, config.m, config.d, config.n)
+
+def candidateConfigs(types, sizes):
+  '''
+  Takes lists of element types and (M, D, N) sizes.
+  Returns every tuneConfig of them with a layout from tu.layouts that fits the
+  output without leaving accumulators idle.
+  '''
+  return [
+    tuneConfig(type, (m, d, n), (v, h))
+    for type in types
+    for m, d, n in sizes
+    for v, h in tu.layouts
+    if v * mmaModel.accRows <= m and h * mmaModel.accCols <= n
+  ]
+
+def features(configs):
+  '''
+  Returns the surrogate model's features of each configuration: the log2 of
+  the type's outer-product rank, of M, D and N and of the layout's V and H.
+  '''
+  rows = []
+  for config in configs:
+    _, (_, rank) = tu.types[config.type]
+    v, h = config.layout
+    rows.append([math.log2(x) for x in (rank, config.m, config.d, config.n, v, h)])
+  return np.array(rows).reshape(-1, 6)
+
+def logCost(config, cycles):
+  '''
+  Returns the surrogate model's target: log cycles per operation, comparable
+  across sizes and types.
+  '''
+  return math.log(cycles / (2 * config.m * config.d * config.n))
+
+def measuredCycles(logDir=tu.logDir, count=None):
+  '''
+  Takes a log directory and optionally a repetition count.
+  Returns a dict of tuneConfig -> mean measured cycles for every tunable
+  configuration in the directory with an explicit layout. Default layout
+  (vdhd) logs are left out: they come from another build than the explicit
+  layout they default to, and the model has no features for them.
+  '''
+  measured = {}
+  for config, logPaths in tu.getLogCatalog(logDir).select(count, **tuneDims).items():
+    if not logPaths or config.layout is None:
+      continue
+    (cycles, _, _), = tu.getConfigMetricStats(config, logPaths, ['cycles'])
+    measured[config] = cycles
+  return measured
+
+def syntheticCycles(config, noise=0.02, rng=None):
+  '''
+  Takes a LogConfig and the relative noise to add.
+  Returns a synthetic cycle count for testing the tuner offline: the MMA cycle
+  model's bound, inflated the more the layout's shape differs from the
+  output's and the more accumulators it leaves idle.
+  '''
+  model = mmaModel.modelKernel(config.type, config.m, config.d, config.n,
+                               config.layout, config.order)
+  v, h = config.layout
+  skew = abs(math.log2((v * mmaModel.accRows) / (h * mmaModel.accCols))
+             - math.log2(config.m / config.n))
+  idle = mmaModel.accCount - v * h
+  cycles = model.cycles * (1 + 0.2 * skew) * (1 + 0.1 * idle)
+  if rng is not None:
+    cycles *= rng.lognormal(0, noise)
+  return cycles
+
+class GaussianProcess:
+  '''
+  Gaussian-process regression with a squared exponential kernel, one length
+  scale per feature, plus white noise. Hyperparameters maximise the marginal
+  likelihood of the standardised targets.
+  '''
+  def __init__(self, restarts=4, seed=0):
+    self.restarts = restarts
+    self.rng = np.random.default_rng(seed)
+
+  def _kernel(self, a, b, lengths, scale):
+    sq = (((a[:, np.newaxis, :] - b[np.newaxis, :, :]) / lengths) ** 2).sum(axis=-1)
+    return scale * np.exp(-0.5 * sq)
+
+  def _negLogLikelihood(self, params, x, y):
+    lengths, scale, noise = np.exp(params[:-2]), np.exp(params[-2]), np.exp(params[-1])
+    k = self._kernel(x, x, lengths, scale) + (noise + 1e-8) * np.eye(len(x))
+    try:
+      chol = np.linalg.cholesky(k)
+    except np.linalg.LinAlgError:
+      return 1e10
+    alpha = np.linalg.solve(chol.T, np.linalg.solve(chol, y))
+    return 0.5 * y @ alpha + np.log(np.diag(chol)).sum() + 0.5 * len(x) * math.log(2 * math.pi)
+
+  def fit(self, x, y):
+    '''
+    Takes features shaped (samples, features) and a target per sample.
+    '''
+    self.x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    self.yMean = y.mean()
+    self.yStd = y.std() or 1.0
+    self.y = (y - self.yMean) / self.yStd
+
+    # Log length scales, signal variance and noise variance.
+    features = self.x.shape[1]
+    bounds = [(math.log(0.1), math.log(20))] * features \
+      + [(math.log(0.01), math.log(100)), (math.log(1e-6), math.log(1))]
+    best = None
+    for restart in range(self.restarts):
+      start = np.zeros(features + 2) if restart == 0 else \
+        np.array([self.rng.uniform(low, high) for low, high in bounds])
+      start[-1] = math.log(1e-2) if restart == 0 else start[-1]
+      result = opt.minimize(self._negLogLikelihood, start, (self.x, self.y),
+                            method='L-BFGS-B', bounds=bounds)
+      if best is None or result.fun < best.fun:
+        best = result
+
+    self.lengths = np.exp(best.x[:-2])
+    self.scale = np.exp(best.x[-2])
+    self.noise = np.exp(best.x[-1])
+    k = self._kernel(self.x, self.x, self.lengths, self.scale) \
+      + (self.noise + 1e-8) * np.eye(len(self.x))
+    self.chol = np.linalg.cholesky(k)
+    self.alpha = np.linalg.solve(self.chol.T, np.linalg.solve(self.chol, self.y))
+    return self
+
+  def predict(self, x):
+    '''
+    Takes features shaped (samples, features).
+    Returns a tuple of (mean, standard deviation) arrays of the prediction.
+    '''
+    kStar = self._kernel(np.asarray(x, dtype=np.float64), self.x, self.lengths, self.scale)
+    mean = kStar @ self.alpha
+    v = np.linalg.solve(self.chol, kStar.T)
+    var = np.maximum(self.scale - (v ** 2).sum(axis=0), 0)
+    return (mean * self.yStd + self.yMean, np.sqrt(var) * self.yStd)
+
+def expectedImprovement(mean, std, best, xi=0.01):
+  '''
+  Takes predicted means and standard deviations of a cost to minimise and the
+  best cost to improve on, per candidate.
+  Returns the expected improvement of each candidate over it.
+  '''
+  gain = best - mean - xi
+  with np.errstate(divide='ignore', invalid='ignore'):
+    z = gain / std
+    ei = gain * st.norm.cdf(z) + std * st.norm.pdf(z)
+  return np.where(std > 0, ei, np.maximum(gain, 0))
+
+class LayoutTuner:
+  '''
+  Bayesian optimisation of ACC layouts. A Gaussian process fit to every
+  measured (type, size, layout) predicts log cycles per operation of the
+  unmeasured candidates, and candidates are proposed by their expected
+  improvement on the best layout of their own type and size.
+  '''
+  def __init__(self, candidates, observations=None, seed=0):
+    self.candidates = list(candidates)
+    self.observations = dict(observations or {})
+    self.seed = seed
+
+  def observe(self, config, cycles):
+    self.observations[config] = cycles
+
+  def _predict(self, configs):
+    observed = list(self.observations)
+    gp = GaussianProcess(seed=self.seed).fit(
+      features(observed),
+      [logCost(config, self.observations[config]) for config in observed])
+    return gp.predict(features(configs))
+
+  def propose(self, count):
+    '''
+    Returns up to count unmeasured candidates as a list of (LogConfig,
+    expected improvement, predicted cycles), best first.
+    '''
+    pending = [config for config in self.candidates if config not in self.observations]
+    if not pending or not self.observations:
+      return []
+    mean, std = self._predict(pending)
+
+    # Each group improves on its best measurement, or its best prediction when
+    # none of its layouts were measured.
+    best = {}
+    for config, cost in zip(pending, mean):
+      best[groupOf(config)] = min(best.get(groupOf(config), math.inf), cost)
+    measured = {}
+    for config, cycles in self.observations.items():
+      cost = logCost(config, cycles)
+      measured[groupOf(config)] = min(measured.get(groupOf(config), math.inf), cost)
+    best.update(measured)
+
+    ei = expectedImprovement(mean, std, np.array([best[groupOf(c)] for c in pending]))
+    order = np.argsort(-ei)[:count]
+    return [
+      (pending[i], float(ei[i]),
+       2 * pending[i].m * pending[i].d * pending[i].n * math.exp(mean[i]))
+      for i in order
+    ]
+
+  def bestLayouts(self):
+    '''
+    Returns the best layout of each candidate type and size, as a dict of
+    type -> 'MxDxN' -> dict of the layout, its cycles and whether they were
+    measured or predicted.
+    '''
+    cycles = {config: (c, True) for config, c in self.observations.items()}
+    pending = [config for config in self.candidates if config not in self.observations]
+    if pending and self.observations:
+      mean, _ = self._predict(pending)
+      for config, cost in zip(pending, mean):
+        cycles[config] = (2 * config.m * config.d * config.n * math.exp(cost), False)
+
+    table = {}
+    for config, (c, measured) in sorted(cycles.items(), key=lambda item: tu.configName(item[0])):
+      sizes = table.setdefault(config.type, {})
+      size = f'{config.m}x{config.d}x{config.n}'
+      if size not in sizes or c < sizes[size]['cycles']:
+        sizes[size] = {'layout': list(config.layout), 'cycles': c, 'measured': measured}
+    return table
+
+def workList(proposals, reps):
+  '''
+  Takes proposals from LayoutTuner.propose and the repetitions to run.
+  Returns a benchRunner.py work list for them.
+  '''
+  return [
+    {'config': tu.configName(config), 'reps': list(range(reps)),
+     'expectedImprovement': ei, 'predictedCycles': cycles}
+    for config, ei, cycles in proposals
+  ]
+
+def tuneSynthetic(types, sizes, rounds, batch, noise=0.02, seed=0):
+  '''
+  Runs the tuner offline against syntheticCycles, starting from the default
+  layout of every type and size.
+  Returns a tuple of (LayoutTuner, evaluations, dict of group -> (found
+  layout, true best layout, relative excess cycles of the found layout)).
+  '''
+  rng = np.random.default_rng(seed)
+  candidates = candidateConfigs(types, sizes)
+  tuner = LayoutTuner(candidates, seed=seed)
+  for config in candidates:
+    if config.layout == mmaModel.defaultLayout:
+      tuner.observe(config, syntheticCycles(config, noise, rng))
+
+  for _ in range(rounds):
+    proposals = tuner.propose(batch)
+    if not proposals:
+      break
+    for config, _, _ in proposals:
+      tuner.observe(config, syntheticCycles(config, noise, rng))
+
+  # Compare against the noiseless optimum of each group.
+  truth = {}
+  for config in candidates:
+    cycles = syntheticCycles(config)
+    if groupOf(config) not in truth or cycles < truth[groupOf(config)][1]:
+      truth[groupOf(config)] = (config.layout, cycles)
+  table = tuner.bestLayouts()
+  results = {}
+  for (type, m, d, n), (layout, cycles) in truth.items():
+    found = tuple(table[type][f'{m}x{d}x{n}']['layout'])
+    excess = syntheticCycles(tuneConfig(type, (m, d, n), found)) / cycles - 1
+    results[(type, m, d, n)] = (found, layout, excess)
+  return (tuner, len(tuner.observations), results)
+
+def parseSize(size):
+  m, d, n = (int(x) for x in size.split('x'))
+  return (m, d, n)
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Autotune ACC layouts.')
+  parser.add_argument('--types', nargs='+', default=tu.orderedTypes)
+  parser.add_argument('--sizes', nargs='+', type=parseSize, default=None,
+                      help='MxDxN sizes to tune (default: every measured size)')
+  parser.add_argument('--batch', type=int, default=4,
+                      help='configurations proposed per round')
+  parser.add_argument('--rounds', type=int, default=1,
+                      help='rounds of proposals to run (with --run or --synthetic)')
+  parser.add_argument('--reps', type=int, default=tu.repCount,
+                      help='repetitions of each proposed configuration')
+  parser.add_argument('--log-dir', default=tu.logDir)
+  parser.add_argument('--exe-dir', default='exe')
+  parser.add_argument('--work-list', '-o', help='write the proposals here as a work list')
+  parser.add_argument('--table', help='write the best-layout table here')
+  parser.add_argument('--run', action='store_true',
+                      help='benchmark the proposals each round instead of listing them')
+  parser.add_argument('--synthetic', action='store_true',
+                      help='tune against a synthetic cost function, without logs')
+  parser.add_argument('--seed', type=int, default=0)
+  args = parser.parse_args()
+  if args.rounds < 1:
+    parser.error('--rounds must be at least 1')
+
+  if args.synthetic:
+    sizes = args.sizes or [(8, 32, 16), (16, 32, 8), (32, 32, 32), (64, 32, 64), (128, 8, 128)]
+    tuner, evaluations, results = tuneSynthetic(args.types, sizes, args.rounds,
+                                                args.batch, seed=args.seed)
+    found = sum(excess < 1e-9 for _, _, excess in results.values())
+    print(f'{evaluations} of {len(tuner.candidates)} candidates evaluated, '
+          f'best layout found for {found} of {len(results)} type/size groups.')
+    for (type, m, d, n), (layout, best, excess) in sorted(results.items()):
+      mark = '' if excess < 1e-9 else f' (best {best[0]}x{best[1]}, {100 * excess:.1f}% faster)'
+      print(f'  {type} {m}x{d}x{n}: {layout[0]}x{layout[1]}{mark}')
+  else:
+    measured = measuredCycles(args.log_dir)
+    sizes = args.sizes or sorted(
+      {(c.m, c.d, c.n) for c in tu.getLogCatalog(args.log_dir).select(**tuneDims)})
+    tuner = LayoutTuner(candidateConfigs(args.types, sizes), measured, args.seed)
+    for _ in range(args.rounds if args.run else 1):
+      proposals = tuner.propose(args.batch)
+      work = workList(proposals, args.reps)
+      if not args.run:
+        break
+      jobs = [(config, rep) for config, _, _ in proposals for rep in range(args.reps)]
+      BenchRunner(args.log_dir, args.exe_dir).run(jobs)
+      tu.reloadLogs(args.log_dir)
+      for config, cycles in measuredCycles(args.log_dir).items():
+        tuner.observe(config, cycles)
+
+    if args.work_list:
+      with open(args.work_list, 'w') as f:
+        json.dump(work, f, indent=2)
+    elif not args.run:
+      print(json.dumps(work, indent=2))
+
+  if args.table:
+    with open(args.table, 'w') as f:
+      json.dump(tuner.bestLayouts(), f, indent=2)
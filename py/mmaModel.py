@@ -0,0 +1,162 @@
+import argparse
+import math
+from collections import namedtuple
+
+import thesUtils as tu
+
+# ACC layout used by logs with the default (vdhd) layout.
+defaultLayout = (2, 4)
+
+# Accumulators available per thread.
+accCount = 8
+
+# Rows and columns of the output held by one accumulator.
+accRows = 4
+accCols = 4
+
+# Issue-to-issue latency of outer products on the same accumulator.
+gerLatency = 4
+
+# Instructions of each kind the core can issue per cycle, per thread.
+issueRates = {
+  'gers': 2,
+  'loads': 2,
+  'permutes': 2,
+  'stores': 2,
+  'instructions': 8,
+}
+
+# Matrix access order each operand can be loaded in without gathering: ATile
+# operands are row-major 4 x r blocks, so columns of A hold them contiguously,
+# and BTile operands are column-major r x 4 blocks, held by the rows of B.
+nativeOrders = {'A': 'C', 'B': 'R'}
+
+# Predicted instruction counts and cycle lower bound of one kernel call.
+#   gers: outer-product instructions.
+#   accInits: accumulators zeroed (xxsetaccz) before their first outer product.
+#   disassembles: accumulators moved back to VSRs (xxmfacc).
+#   loads, permutes: vector loads and permutes extracting the operands.
+#   stores: vector stores of the disassembled accumulators.
+#   cycles: lower bound on cycles for the call.
+#   bound: the resource or dependency setting the lower bound.
+KernelModel = namedtuple('KernelModel', [
+  'gers', 'accInits', 'disassembles', 'loads', 'permutes', 'stores', 'cycles',
+  'bound',
+])
+
+def operandCost(order, native, rank):
+  '''
+  Takes the access order of an input matrix, the order its operands can be
+  loaded from directly and the rank r of the type's outer products.
+  Returns a tuple of (loads, permutes) extracting one operand VSR, at best.
+
+  Every operand is a full VSR of data, so needs at least one load. In the
+  native order a load holds whole runs of the operand, which need one permute
+  to interleave unless r is one. Otherwise loads hold pieces of four operands,
+  which a 4 x 4 transpose of two permutes per operand puts in place.
+  '''
+  if order == native:
+    return (1, 0 if rank == 1 else 1)
+  return (1, 2)
+
+def modelKernel(type, m, d, n, layout=None, order='CRR'):
+  '''
+  Takes an element type from tu.types, the kernel's M, D and N, its V x H ACC
+  layout (None for defaultLayout) and its access order as in the log names
+  (A, B, C; C and R for column and row major).
+
+  Models the MMA lowering of tex/method.tex: C is split into sections of
+  (4V) x (4H) elements, each computed by V x H accumulators over ceil(D / r)
+  rank-r outer products per accumulator, reading V operands of A and H of B
+  per step, then disassembled and stored four VSRs per accumulator. The
+  order of C is free as the outer-product operands are swapped instead.
+
+  Returns a KernelModel.
+  '''
+  v, h = layout or defaultLayout
+  assert v * h <= accCount, f'Layout {v}x{h} needs more than {accCount} ACCs'
+  bits, (rows, rank) = tu.types[type]
+  assert rows * rank * bits == tu.vregSize, f'Operands of {type} do not fill a VSR'
+
+  # Sections of C and the outer-product steps of each.
+  sections = math.ceil(m / (accRows * v)) * math.ceil(n / (accCols * h))
+  steps = math.ceil(d / rank)
+  accs = sections * v * h
+
+  # Operands extracted for each step of each section.
+  aOrder, bOrder, _ = order
+  aLoads, aPermutes = operandCost(aOrder, nativeOrders['A'], rank)
+  bLoads, bPermutes = operandCost(bOrder, nativeOrders['B'], rank)
+  counts = {
+    'gers': accs * steps,
+    'loads': sections * steps * (v * aLoads + h * bLoads),
+    'permutes': sections * steps * (v * aPermutes + h * bPermutes),
+    'stores': accs * accRows,
+  }
+  counts['instructions'] = sum(counts.values()) + 2 * accs
+
+  # Each resource bounds the cycles by its issue rate. Accumulator chains are
+  # serial, and sections run concurrently only as far as accumulators allow.
+  bounds = {
+    resource: count / issueRates[resource] for resource, count in counts.items()
+  }
+  concurrent = accCount // (v * h)
+  bounds['ger latency'] = math.ceil(sections / concurrent) * steps * gerLatency
+  bound = max(bounds, key=bounds.get)
+
+  return KernelModel(counts['gers'], accs, accs, counts['loads'],
+                     counts['permutes'], counts['stores'], bounds[bound], bound)
+
+def modelConfig(config):
+  '''
+  Takes a LogConfig.
+  Returns the KernelModel of its kernel, or None for variants not lowered with
+  MMA.
+  '''
+  if config.variant not in ('mma', 'hand'):
+    return None
+  return modelKernel(config.type, config.m, config.d, config.n, config.layout,
+                     config.order)
+
+def modelReport(logDir=tu.logDir, count=None, confidence=0.95):
+  '''
+  Compares the model against the measured cycles of every configuration in
+  the log directory.
+  Returns a list with an entry per configuration: a tuple of (configuration
+  name, KernelModel or None, measured cycle stats, efficiency in percent or
+  None). Efficiency is the modelled lower bound over the measured mean.
+  '''
+  report = []
+  catalog = tu.getLogCatalog(logDir)
+  for config in sorted(catalog.configs, key=tu.configName):
+    logPaths, = catalog.select(count, **config._asdict()).values()
+    _, _, cycleStats = tu.getConfigStats(config, logPaths, confidence)
+    model = modelConfig(config)
+    efficiency = None
+    if model is not None:
+      efficiency = 100 * model.cycles / cycleStats[0]
+    report.append((tu.configName(config), model, cycleStats, efficiency))
+  return report
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(
+    description='Compare the MMA cycle model against measured cycles.')
+  parser.add_argument('logDir', nargs='?', default=tu.logDir)
+  parser.add_argument('--count', type=int, default=tu.repCount,
+                      help='only use repetitions below this count')
+  parser.add_argument('--confidence', type=float, default=0.95)
+  args = parser.parse_args()
+
+  report = modelReport(args.logDir, args.count, args.confidence)
+  width = max(len(name) for name, *_ in report)
+  print(f'{"configuration":<{width}} {"gers":>6} {"loads":>6} {"perms":>6} '
+        f'{"stores":>6} {"model":>8} {"bound":<12} {"measured":>18} {"eff":>6}')
+  for name, model, (mean, _, upper), efficiency in report:
+    measured = f'{mean:.1f} +- {upper:.1f}'
+    if model is None:
+      print(f'{name:<{width}} {"-":>6} {"-":>6} {"-":>6} {"-":>6} {"-":>8} '
+            f'{"-":<12} {measured:>18} {"-":>6}')
+      continue
+    print(f'{name:<{width}} {model.gers:>6} {model.loads:>6} {model.permutes:>6} '
+          f'{model.stores:>6} {model.cycles:>8.1f} {model.bound:<12} '
+          f'{measured:>18} {efficiency:>5.1f}%')
@@ -2,27 +2,26 @@ from matplotlib import pyplot as plt
 
 import thesUtils as tu
 
-# Log file name format.
-mmaLogNameFormat = '{type}.8x32x16.vdhd.CRR.O3.bench.{c}.json'
-vecLogNameFormat = '{type}.8x32x16.vdhd.CCC.O3.vector.bench.{c}.json'
-vec2LogNameFormat = '{type}.8x32x16.vdhd.RRR.O3.vector.bench.{c}.json'
+# Log dimensions of each kernel.
+logDims = dict(m=8, d=32, n=16, layout=None, sink=False, merge=False)
+mmaLogDims = dict(order='CRR', variant='mma', **logDims)
+vecLogDims = dict(order='CCC', variant='vector', **logDims)
+vec2LogDims = dict(order='RRR', variant='vector', **logDims)
 
-def generatePlot():
-  # Get data.
-  data = {}
-  for type in tu.orderedTypes:
-    # Read logs for data.
-    mmaLog = mmaLogNameFormat.format(type=type, c='{}')
-    vecLog = vecLogNameFormat.format(type=type, c='{}')
-    vec2Log = vec2LogNameFormat.format(type=type, c='{}')
+# Bars of the plot: the (order, variant) of each kernel and its label.
+kernels = [
+  (('CRR', 'mma'), 'MMA'),
+  (('CCC', 'vector'), 'VSX, Columns'),
+  (('RRR', 'vector'), 'VSX, Rows'),
+]
 
-    # Save vec and mma data.
-    _, _, mmaCycleStats = tu.getJsonCumulativeStats('logs/all/' + mmaLog, 25)
-    _, _, vecCycleStats = tu.getJsonCumulativeStats('logs/all/' + vecLog, 25)
-    _, _, vec2CycleStats = tu.getJsonCumulativeStats('logs/all/' + vec2Log, 25)
-
-    # Save type data.
-    data[type] = (mmaCycleStats, vecCycleStats, vec2CycleStats)
+def generatePlot():
+  # Get data: cycles of each kernel per type.
+  store = tu.getResultStore()
+  records = store.mask(rep=list(range(tu.repCount)), **logDims)
+  _, _, _, bars, errs = store.pivot('cycles', 'type', ('order', 'variant'), None, records,
+                                    rowValues=tu.orderedTypes,
+                                    colValues=[kernel for kernel, _ in kernels])
 
   # Set up figure and axes.
   fig = plt.figure()
@@ -30,29 +29,7 @@ def generatePlot():
   figHeight = 1
 
   groupNames = tu.orderedTypes
-  barNames = ['MMA', 'VSX, Columns', 'VSX, Rows']
-
-  bars = [
-    [data[type][0][0] for type in groupNames],
-    [data[type][1][0] for type in groupNames],
-    [data[type][2][0] for type in groupNames]
-  ]
-
-  # Get error bounds.
-  errs = [
-    [
-      [data[type][0][1] for type in groupNames],
-      [data[type][0][2] for type in groupNames]
-    ],
-    [
-      [data[type][1][1] for type in groupNames],
-      [data[type][1][2] for type in groupNames]
-    ],
-    [
-      [data[type][2][1] for type in groupNames],
-      [data[type][2][2] for type in groupNames]
-    ]
-  ]
+  barNames = [name for _, name in kernels]
 
   # Get axis and start plotting.
   ax = fig.add_subplot(figHeight, figWidth, 1)
@@ -74,17 +51,15 @@ def generateTable():
   rows = []
   for type in tu.orderedTypes:
     # Read logs for data.
-    mmaLog = mmaLogNameFormat.format(type=type, c='{}')
-    vecLog = vecLogNameFormat.format(type=type, c='{}')
-    vec2Log = vec2LogNameFormat.format(type=type, c='{}')
+    mmaLogs = tu.selectOne(tu.repCount, type=type, **mmaLogDims)
+    vecLogs = tu.selectOne(tu.repCount, type=type, **vecLogDims)
+    vec2Logs = tu.selectOne(tu.repCount, type=type, **vec2LogDims)
 
     # Save vec and mma data.
-    mmaIterStats, mmaTimeStats, mmaCycleStats = \
-      tu.getJsonCumulativeStats('logs/all/' + mmaLog, 25)
-    vecIterStats, vecTimeStats, vecCycleStats = \
-      tu.getJsonCumulativeStats('logs/all/' + vecLog, 25)
+    mmaIterStats, mmaTimeStats, mmaCycleStats = tu.getJsonListStats(mmaLogs)
+    vecIterStats, vecTimeStats, vecCycleStats = tu.getJsonListStats(vecLogs)
     vec2IterStats, vec2TimeStats, vec2CycleStats = \
-      tu.getJsonCumulativeStats('logs/all/' + vec2Log, 25)
+      tu.getJsonListStats(vec2Logs)
 
     # Add row with name and data.
     rows.append(
@@ -2,9 +2,8 @@ from matplotlib import pyplot as plt
 
 import thesUtils as tu
 
-# Log file name format.
-mmaLogNameFormat = '{type}.{m}x{d}x{n}.vdhd.CRR.O3.bench.{c}.json'
-vecLogNameFormat = '{type}.{m}x{d}x{n}.vdhd.CRR.O3.vector.bench.{c}.json'
+# Log dimensions of each kernel.
+logDims = dict(layout=None, order='CRR', sink=False, merge=False)
 
 # Layouts in test with name.
 layouts = [
@@ -15,7 +14,25 @@ layouts = [
   ((128, 8, 128), '128x8x128'),
 ]
 
+def getCycles(rows, facet):
+  '''
+  Takes the dimensions laid out as groups and subplots, each 'type' or
+  ('m', 'd', 'n') for the kernel size.
+  Returns the pivot of the MMA and vector kernels' cycles, as
+  ResultStore.pivot.
+  '''
+  store = tu.getResultStore()
+  records = store.mask(rep=list(range(tu.repCount)), variant=['mma', 'vector'], **logDims)
+  sizes = [layout for layout, _ in layouts]
+  axisValues = {'type': tu.orderedTypes, ('m', 'd', 'n'): sizes}
+  return store.pivot('cycles', rows, 'variant', facet, records,
+                     rowValues=axisValues[rows], colValues=['mma', 'vector'],
+                     facetValues=axisValues[facet])
+
 def plotByType():
+  # Get data: cycles per kernel size, one subplot per type.
+  _, _, _, bars, errs = getCycles(('m', 'd', 'n'), 'type')
+
   # Set up figure and axes.
   fig = plt.figure()
   figWidth = 2
@@ -25,31 +42,9 @@ def plotByType():
   layoutLabels = [layout[1] for layout in layouts]
   barNames = ['MMA', 'Vector']
   for i, type in enumerate(tu.orderedTypes):
-    # Get the data for the type.
-    mmaData, vecData = data[type]
-
-    # Get data points.
-
-    bars = [
-      [mmaData[layoutName][0] for layoutName in layoutLabels],
-      [vecData[layoutName][0] for layoutName in layoutLabels]
-    ]
-
-    # Get error bounds.
-    errs = [
-      [
-        [mmaData[layoutName][1] for layoutName in layoutLabels],
-        [mmaData[layoutName][2] for layoutName in layoutLabels]
-      ],
-      [
-        [vecData[layoutName][1] for layoutName in layoutLabels],
-        [vecData[layoutName][2] for layoutName in layoutLabels]
-      ]
-    ]
-
     # Get axis and start plotting.
     ax = fig.add_subplot(figHeight, figWidth, i + 1)
-    tu.plotGroupedData(ax, layoutLabels, barNames, bars, errs)
+    tu.plotGroupedData(ax, layoutLabels, barNames, bars[i], errs[i])
     ax.set_title(type.capitalize())
 
     # ax.set_xlabel(, fontsize=8)
@@ -60,27 +55,8 @@ def plotByType():
 
 
 if __name__ == '__main__':
-  # Get data.
-  data = {}
-  for type in tu.orderedTypes:
-    # Holding place for vec and mma data.
-    mmaData = {}
-    vecData = {}
-
-    # Get the vec and mma data.
-    for (m, d, n), layoutName in layouts:
-      # Read logs for data.
-      mmaLog = mmaLogNameFormat.format(type=type, m=m, d=d, n=n, c='{}')
-      vecLog = vecLogNameFormat.format(type=type, m=m, d=d, n=n, c='{}')
-
-      # Save vec and mma data.
-      _, _, mmaCycleStats = tu.getJsonCumulativeStats('logs/all/' + mmaLog, 25)
-      mmaData[layoutName] = mmaCycleStats
-      _, _, vecCycleStats = tu.getJsonCumulativeStats('logs/all/' + vecLog, 25)
-      vecData[layoutName] = vecCycleStats
-
-    # Save type data.
-    data[type] = (mmaData, vecData)
+  # Get data: cycles per type, one subplot per kernel size.
+  _, _, _, bars, errs = getCycles('type', ('m', 'd', 'n'))
 
   # Set up figure and axes.
   fig = plt.figure()
@@ -93,31 +69,14 @@ if __name__ == '__main__':
 
 
   # Get data points.
-  for type in groupNames:
-    for layoutName in plots:
-      print(type, layoutName, data[type][0][layoutName][0])
+  for j, type in enumerate(groupNames):
+    for i, layoutName in enumerate(plots):
+      print(type, layoutName, bars[i, 0, j])
 
   for i, plot in enumerate(plots):
-    bars = [
-      [data[type][0][plot][0] for type in groupNames],
-      [data[type][1][plot][0] for type in groupNames]
-    ]
-
-    # Get error bounds.
-    errs = [
-      [
-        [data[type][0][plot][1] for type in groupNames],
-        [data[type][0][plot][2] for type in groupNames]
-      ],
-      [
-        [data[type][1][plot][1] for type in groupNames],
-        [data[type][1][plot][2] for type in groupNames]
-      ]
-    ]
-
     # Get axis and start plotting.
     ax = fig.add_subplot(figHeight, figWidth, i + 1)
-    tu.plotGroupedData(ax, groupNames, barNames, bars, errs)
+    tu.plotGroupedData(ax, groupNames, barNames, bars[i], errs[i])
     ax.set_title(plot)
     ax.set_xlabel('Data Type', fontsize=8)
     ax.set_ylabel('Runtime\n(ns)')
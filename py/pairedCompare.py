@@ -0,0 +1,94 @@
+import argparse
+
+import numpy as np
+
+import speedups
+import thesUtils as tu
+
+def parseConfig(name):
+  '''
+  Parses a configuration name, i.e. a log name without the repetition.
+  '''
+  parsed = tu.parseLogName(f'{name}.0.json')
+  if parsed is None:
+    raise argparse.ArgumentTypeError(f'"{name}" is not a configuration name')
+  return parsed[0]
+
+def comparisonPairs(configs=None):
+  '''
+  Takes an optional list of two or more LogConfigs.
+  Returns a list of (baseline, candidate) pairs: each configuration against
+  the first if given, otherwise every pair of the comparisons in speedups.py.
+  '''
+  if configs:
+    return [(configs[0], config) for config in configs[1:]]
+  return [
+    pair
+    for _, _, barDims in speedups.comparisons
+    for base, cand, dims in barDims
+    for pair in tu.matchConfigs(base, cand, **dims)
+  ]
+
+def comparePaired(pairs, count=tu.repCount, metric='cycles', confidence=0.95,
+                  interval='fieller', maxGap=None):
+  '''
+  Takes a list of (baseline, candidate) pairs and the options of
+  getPairedStats.
+  Returns a list with a dict per pair of its paired difference and speedup,
+  the unpaired speedup from every repetition and the repetitions the
+  unpaired comparison would need to match the paired interval.
+  '''
+  (diffs, diffLower, diffUpper), (ratios, lower, upper), counts = tu.getPairedStats(
+    pairs, count, metric=metric, confidence=confidence, interval=interval, maxGap=maxGap)
+  unpaired, unpairedLower, unpairedUpper = tu.getConfigSpeedups(
+    pairs, count, metric=metric, confidence=confidence, interval=interval)
+
+  with np.errstate(divide='ignore', invalid='ignore'):
+    # Interval widths shrink with the square root of the repetitions.
+    widthRatios = (unpairedLower + unpairedUpper) / (lower + upper)
+    equivalentReps = np.ceil(counts * widthRatios ** 2)
+
+  results = []
+  for i, (baseline, candidate) in enumerate(pairs):
+    results.append({
+      'baseline': tu.configName(baseline),
+      'candidate': tu.configName(candidate),
+      'pairs': int(counts[i]),
+      'difference': (diffs[i], diffLower[i], diffUpper[i]),
+      'speedup': (ratios[i], lower[i], upper[i]),
+      'unpairedSpeedup': (unpaired[i], unpairedLower[i], unpairedUpper[i]),
+      'widthRatio': widthRatios[i],
+      'equivalentReps': equivalentReps[i],
+    })
+  return results
+
+def formatInterval(value, lower, upper):
+  return f'{value:.4f} [{value - lower:.4f}, {value + upper:.4f}]'
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(
+    description='Compare configurations pairing their runs by repetition index.')
+  parser.add_argument('configs', nargs='*', type=parseConfig,
+                      help='configuration names, each compared against the first '
+                           '(default: the comparisons of speedups.py)')
+  parser.add_argument('--count', type=int, default=tu.repCount,
+                      help='only use repetitions below this count')
+  parser.add_argument('--metric', choices=tu.statNames, default='cycles')
+  parser.add_argument('--confidence', type=float, default=0.95)
+  parser.add_argument('--interval', choices=['fieller', 'delta'], default='fieller')
+  parser.add_argument('--max-gap', type=float, default=None,
+                      help='most seconds apart the runs of one repetition may be')
+  args = parser.parse_args()
+  if len(args.configs) == 1:
+    parser.error('give at least two configurations to compare')
+
+  pairs = comparisonPairs(args.configs)
+  for result in comparePaired(pairs, args.count, args.metric, args.confidence,
+                              args.interval, args.max_gap):
+    diff, diffWidth, _ = result['difference']
+    print(f'{result["candidate"]} over {result["baseline"]}, {result["pairs"]} pairs')
+    print(f'  difference {diff:.2f} +- {diffWidth:.2f} {args.metric}')
+    print(f'  paired speedup   {formatInterval(*result["speedup"])}')
+    print(f'  unpaired speedup {formatInterval(*result["unpairedSpeedup"])}')
+    print(f'  unpaired over paired interval width {result["widthRatio"]:.2f}, '
+          f'{result["equivalentReps"]:.0f} unpaired repetitions to match')
@@ -0,0 +1,227 @@
+import argparse
+import datetime
+import hashlib
+import sqlite3
+import time
+
+import numpy as np
+
+import thesUtils as tu
+
+# Default location of the history database.
+historyPath = 'logs/history.sqlite'
+
+# Runs of one host more than this many seconds apart belong to different
+# campaigns.
+campaignGap = 6 * 3600
+
+# One row per ingested run. Rows are only ever added; a log is ingested again
+# only if its contents changed, e.g. because a rerun overwrote it, not when it
+# is merely touched, copied or checked out again. Each run belongs to a
+# campaign: runs of one host ingested together, split wherever campaignGap
+# seconds pass between runs.
+schema = '''
+CREATE TABLE IF NOT EXISTS runs (
+  id INTEGER PRIMARY KEY,
+  digest TEXT NOT NULL UNIQUE,
+  campaign INTEGER NOT NULL,
+  config TEXT NOT NULL,
+  type TEXT NOT NULL,
+  rep INTEGER NOT NULL,
+  host TEXT NOT NULL,
+  date TEXT NOT NULL,
+  timestamp REAL,
+  toolchain TEXT NOT NULL,
+  executable TEXT NOT NULL,
+  num_cpus INTEGER,
+  mhz REAL,
+  file TEXT NOT NULL,
+  ingested REAL NOT NULL,
+  iterations REAL,
+  cpu_time REAL,
+  cycles REAL
+);
+CREATE INDEX IF NOT EXISTS runsConfig ON runs (config, timestamp);
+CREATE INDEX IF NOT EXISTS runsHost ON runs (host, timestamp);
+CREATE INDEX IF NOT EXISTS runsToolchain ON runs (toolchain, timestamp);
+'''
+
+def openHistory(path=historyPath):
+  '''
+  Takes the path of a history database.
+  Returns a connection to it, creating the database if needed.
+  '''
+  conn = sqlite3.connect(path)
+  conn.executescript(schema)
+  return conn
+
+def logDigest(logPath):
+  '''
+  Returns the sha256 digest of a log's contents, identifying its run.
+  '''
+  with open(logPath, 'rb') as f:
+    return hashlib.sha256(f.read()).hexdigest()
+
+def ingestLogs(conn, logDir=tu.logDir, toolchain=None):
+  '''
+  Takes a history connection, a log directory and optionally the toolchain to
+  record for logs whose context does not name one.
+  Adds every log not yet in the history, reading them through the log cache,
+  as new campaigns. Returns the number of runs added.
+  '''
+  known = {digest for digest, in conn.execute('SELECT digest FROM runs')}
+  cache = tu.getLogCache(logDir)
+  catalog = tu.getLogCatalog(logDir)
+  runs = []
+  for config in sorted(catalog.configs, key=tu.configName):
+    reps = catalog.configs[config]
+    logPaths = [reps[rep] for rep in sorted(reps)]
+    digests = [logDigest(logPath) for logPath in logPaths]
+    if all(digest in known for digest in digests):
+      continue
+    contexts = [cache.getContext(logPath) for logPath in logPaths]
+
+    values = tu.evalMetrics(logPaths, tu.configMetrics(config))
+    for rep, context, digest, (iterations, cpuTime, cycles) in zip(
+        sorted(reps), contexts, digests, values):
+      if digest in known:
+        continue
+      known.add(digest)
+      timestamp = tu.contextTimestamp(context['date'])
+      runs.append([
+        digest, None, tu.configName(config), config.type, rep,
+        str(context['host_name']), str(context['date']),
+        None if np.isnan(timestamp) else timestamp,
+        str(context['toolchain']) or toolchain or '', str(context['executable']),
+        int(context['num_cpus']), float(context['mhz_per_cpu']),
+        str(context['fileName']), time.time(), iterations, cpuTime, cycles,
+      ])
+
+  # Number the new campaigns after the existing ones: one per host, split at
+  # gaps of more than campaignGap seconds. Undated runs join their host's
+  # first campaign.
+  campaign, = conn.execute('SELECT COALESCE(MAX(campaign), 0) FROM runs').fetchone()
+  runs.sort(key=lambda run: (run[5], run[7] is not None, run[7] or 0))
+  lastHost = lastTimestamp = None
+  for run in runs:
+    host, timestamp = run[5], run[7]
+    if host != lastHost:
+      campaign += 1
+      lastHost, lastTimestamp = host, None
+    elif None not in (timestamp, lastTimestamp) and timestamp - lastTimestamp > campaignGap:
+      campaign += 1
+    run[1] = campaign
+    if timestamp is not None:
+      lastTimestamp = timestamp
+
+  with conn:
+    before = conn.total_changes
+    conn.executemany('''
+      INSERT OR IGNORE INTO runs (digest, campaign, config, type, rep, host, date,
+        timestamp, toolchain, executable, num_cpus, mhz, file, ingested,
+        iterations, cpu_time, cycles)
+      VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', runs)
+    return conn.total_changes - before
+
+def configHistory(conn, config, metric='cycles', host=None, confidence=0.95):
+  '''
+  Takes a history connection, a configuration name, the metric column to
+  summarise and optionally a host to restrict to.
+  Returns a list with an entry per campaign, in order of the campaign's first
+  run: a tuple of (campaign, host, toolchain, first timestamp, runs, mean, CI
+  half-width).
+  '''
+  assert metric in ('iterations', 'cpu_time', 'cycles'), f'Unknown metric {metric}'
+  query = (f'SELECT campaign, host, toolchain, timestamp, {metric} FROM runs '
+           'WHERE config = ?')
+  params = [config]
+  if host is not None:
+    query += ' AND host = ?'
+    params.append(host)
+  query += ' ORDER BY timestamp'
+
+  campaigns = {}
+  for campaign, runHost, toolchain, timestamp, value in conn.execute(query, params):
+    entry = campaigns.setdefault((campaign, runHost, toolchain), [timestamp, []])
+    entry[1].append(np.nan if value is None else value)
+
+  history = []
+  for (campaign, runHost, toolchain), (first, values) in campaigns.items():
+    means, _, halfWidths = tu.batchStats([values], confidence=confidence)
+    history.append((campaign, runHost, toolchain, first, len(values),
+                    float(means[0]), float(halfWidths[0])))
+  history.sort(key=lambda entry: (entry[3] is None, entry[3] or 0, entry[0]))
+  return history
+
+def trendPlot(conn, configs, outPath, metric='cycles', host=None):
+  '''
+  Takes a history connection, a list of configuration names and where to save
+  the figure.
+  Plots each configuration's metric across its campaigns, relative to its
+  first campaign so configurations of any size share the axis.
+  '''
+  from matplotlib import pyplot as plt
+
+  fig, ax = plt.subplots()
+  labels = {}
+  for config in configs:
+    history = configHistory(conn, config, metric, host)
+    if not history:
+      print(f'No history for {config}.')
+      continue
+    base = history[0][5]
+    x = [
+      labels.setdefault((campaign, h, toolchain), len(labels))
+      for campaign, h, toolchain, *_ in history
+    ]
+    y = [mean / base for *_, mean, _ in history]
+    err = [halfWidth / base for *_, halfWidth in history]
+    ax.errorbar(x, y, yerr=err, marker='o', capsize=2, label=config)
+
+  ax.set_xticks(list(labels.values()))
+  ax.set_xticklabels([f'#{campaign} {toolchain or "?"}\n{h}'
+                      for campaign, h, toolchain in labels],
+                     rotation=15, ha='right')
+  ax.set_ylabel(f'{metric} relative to first campaign')
+  ax.axhline(1, color='gray', linewidth=.5)
+  ax.legend(fontsize='small')
+  fig.set_size_inches(tu.textWidth, 3.5)
+  fig.tight_layout()
+  fig.savefig(outPath)
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Keep a history of benchmark runs.')
+  parser.add_argument('--db', default=historyPath, help='history database')
+  commands = parser.add_subparsers(dest='command', required=True)
+
+  ingest = commands.add_parser('ingest', help='add new runs from a log directory')
+  ingest.add_argument('logDir', nargs='?', default=tu.logDir)
+  ingest.add_argument('--toolchain',
+                      help='toolchain of runs whose logs do not record one')
+
+  show = commands.add_parser('show', help='list a configuration\'s campaigns')
+  show.add_argument('config')
+  show.add_argument('--metric', default='cycles')
+  show.add_argument('--host')
+
+  plot = commands.add_parser('plot', help='plot configurations across campaigns')
+  plot.add_argument('configs', nargs='+')
+  plot.add_argument('--metric', default='cycles')
+  plot.add_argument('--host')
+  plot.add_argument('--output', '-o', default='trend.png')
+  args = parser.parse_args()
+
+  conn = openHistory(args.db)
+  if args.command == 'ingest':
+    added = ingestLogs(conn, args.logDir, args.toolchain)
+    print(f'{added} new run(s) added.')
+  elif args.command == 'show':
+    for campaign, host, toolchain, first, runs, mean, halfWidth in configHistory(
+        conn, args.config, args.metric, args.host):
+      when = '?' if first is None else \
+        datetime.datetime.fromtimestamp(first).isoformat(timespec='seconds')
+      print(f'#{campaign} {when} {host} {toolchain or "?"}: {mean:.2f} +- {halfWidth:.2f} '
+            f'({runs} runs)')
+  else:
+    trendPlot(conn, args.configs, args.output, args.metric, args.host)
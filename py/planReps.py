@@ -0,0 +1,67 @@
+import argparse
+import json
+
+import thesUtils as tu
+
+# Metrics that can be planned for, indexing getConfigSamples' samples.
+metrics = {'iterations': 0, 'cpu_time': 1, 'CYCLES': 2}
+
+def planRepetitions(target, confidence=0.95, metric='CYCLES', maxReps=1000,
+                    logDir=tu.logDir):
+  '''
+  Takes a target CI half-width relative to the mean.
+  Returns a work list with an entry per configuration in the log directory,
+  those needing the most repetitions first. Each entry is a dict of the
+  configuration name, repetitions present, repetitions still needed, the
+  repetition indices to run next and the current relative half-width.
+  '''
+  catalog = tu.getLogCatalog(logDir)
+  configs = sorted(catalog.configs, key=tu.configName)
+  # Every repetition present counts, including those past repCount that
+  # earlier plans asked for.
+  samples = tu.getConfigSamples(configs, logDir=logDir)[:, :, metrics[metric]]
+  have, needed, relWidths = tu.repsNeeded(samples, target=target,
+                                          confidence=confidence, maxReps=maxReps)
+
+  work = []
+  for config, n, need, relWidth in zip(configs, have, needed, relWidths):
+    # New repetitions continue after the highest index present.
+    nextRep = max(catalog.configs[config]) + 1
+    more = int(need - n) if need >= 0 else None
+    work.append({
+      'config': tu.configName(config),
+      'have': int(n),
+      'more': more,
+      'converged': more == 0,
+      'reps': list(range(nextRep, nextRep + (more or 0))),
+      'relHalfWidth': float(relWidth),
+    })
+
+  # Unreachable configurations first, then by repetitions needed.
+  work.sort(key=lambda item: (item['more'] is not None, -(item['more'] or 0), item['config']))
+  return work
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(
+    description='Report how many more repetitions each configuration needs.')
+  parser.add_argument('--target', type=float, default=0.01,
+                      help='target CI half-width relative to the mean')
+  parser.add_argument('--confidence', type=float, default=0.95)
+  parser.add_argument('--metric', choices=list(metrics), default='CYCLES')
+  parser.add_argument('--max-reps', type=int, default=1000)
+  parser.add_argument('--log-dir', default=tu.logDir)
+  parser.add_argument('--output', '-o', help='write the work list here instead of stdout')
+  parser.add_argument('--pending', action='store_true',
+                      help='only list configurations that need more repetitions')
+  args = parser.parse_args()
+
+  work = planRepetitions(args.target, args.confidence, args.metric,
+                         args.max_reps, args.log_dir)
+  if args.pending:
+    work = [item for item in work if not item['converged']]
+
+  if args.output:
+    with open(args.output, 'w') as f:
+      json.dump(work, f, indent=2)
+  else:
+    print(json.dumps(work, indent=2))
@@ -0,0 +1,55 @@
+import argparse
+from collections import Counter
+
+import thesUtils as tu
+
+def qualityReport(logDir=tu.logDir, count=None, confidence=0.95):
+  '''
+  Checks the quality of every run in the log directory.
+  Returns a list with an entry per configuration holding noisy runs: a tuple
+  of (configuration name, runs, excluded runs, reason counts, cycle stats of
+  every run, cycle stats of the clean runs). The clean stats are None when no
+  clean runs remain. A run can break several limits, so reasons can outnumber
+  excluded runs.
+  '''
+  report = []
+  catalog = tu.getLogCatalog(logDir)
+  for config in sorted(catalog.configs, key=tu.configName):
+    logPaths, = catalog.select(count, **config._asdict()).values()
+    clean, excluded = tu.filterLogs(logPaths)
+    if not excluded:
+      continue
+
+    reasons = Counter(reason for found in excluded.values() for reason in found)
+    _, _, allStats = tu.getConfigStats(config, logPaths, confidence)
+    cleanStats = None
+    if clean:
+      _, _, cleanStats = tu.getConfigStats(config, clean, confidence)
+    report.append((tu.configName(config), len(logPaths), len(excluded), reasons,
+                   allStats, cleanStats))
+  return report
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(
+    description='Report noisy runs and the stats without them.')
+  parser.add_argument('logDir', nargs='?', default=tu.logDir)
+  parser.add_argument('--count', type=int, default=None,
+                      help='only check repetitions below this count')
+  parser.add_argument('--confidence', type=float, default=0.95)
+  for limit, value in tu.runQualityLimits.items():
+    parser.add_argument(f'--max-{limit.replace("_", "-")}', type=float, default=value,
+                        dest=limit, help=f'quality limit on {limit} (default {value})')
+  args = parser.parse_args()
+  for limit in tu.runQualityLimits:
+    tu.runQualityLimits[limit] = getattr(args, limit)
+
+  report = qualityReport(args.logDir, args.count, args.confidence)
+  print(f'{len(report)} configuration(s) with noisy runs.')
+  for name, runs, excluded, reasons, allStats, cleanStats in report:
+    print(f'{name}: {excluded} of {runs} runs excluded '
+          f'({", ".join(f"{reason} x{n}" for reason, n in reasons.items())})')
+    print(f'  all:   {allStats[0]:.2f} +- {allStats[2]:.2f} cycles')
+    if cleanStats is None:
+      print('  clean: no clean runs')
+    else:
+      print(f'  clean: {cleanStats[0]:.2f} +- {cleanStats[2]:.2f} cycles')
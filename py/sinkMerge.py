@@ -2,14 +2,14 @@ from matplotlib import pyplot as plt
 
 import thesUtils as tu
 
-# logNameFormat = '{type}.{m}x{d}x{n}.vdhd.CRR.O3.timed{opt}.txt'
-logNameFormat = '{type}.{m}x{d}x{n}.vdhd.CRR.O3.bench{opt}.{c}.json'
+# Log dimensions shared by every configuration.
+logDims = dict(layout=None, order='CRR', variant='mma')
 
 opts = [
-  ('', 'No Opt'),
-  ('.sink', 'Sink'),
-  ('.merge', 'Merge'),
-  ('.sink.merge', 'Sink & Merge'),
+  ((False, False), 'No Opt'),
+  ((True, False), 'Sink'),
+  ((False, True), 'Merge'),
+  ((True, True), 'Sink & Merge'),
 ]
 
 layouts = [
@@ -25,18 +25,17 @@ if __name__ == '__main__':
     optData = {}
 
     # Get the data for each ACC layout.
-    for optStr, optName in opts:
+    for (sink, merge), optName in opts:
       layoutData = {}
 
       for (m, d, n), layoutName in layouts:
         # Read logs for data.
-        # log = logNameFormat.format(type=type, opt=optStr, m=m, d=d, n=n)
-        log = logNameFormat.format(type=type, opt=optStr, m=m, d=d, n=n, c='{}')
+        logs = tu.selectOne(tu.repCount, clean=True, type=type, m=m, d=d, n=n,
+                            sink=sink, merge=merge, **logDims)
 
         # Save layout data.
-        # layoutData[layoutName] = tu.getFileStats('logs/sinkMerge/' + log)
-        _, _, cycleStats = tu.getJsonCumulativeStats('logs/all/' + log, 25)
-        print(log, cycleStats)
+        _, _, cycleStats = tu.getJsonListStats(logs)
+        print(logs[0], cycleStats)
         layoutData[layoutName] = cycleStats
 
       # Save layout data.
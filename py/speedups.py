@@ -0,0 +1,107 @@
+import numpy as np
+from matplotlib import pyplot as plt
+
+import thesUtils as tu
+
+# Comparisons, each a title, the bar labels and the (baseline dimensions,
+# candidate dimensions, dimensions both share) of each bar, as matchConfigs.
+comparisons = [
+  ('MMA over VSX', ['VSX, Columns', 'VSX, Rows'], [
+    (dict(variant='vector', order='CCC'), dict(variant='mma', order='CRR'),
+     dict(m=8, d=32, n=16, layout=None, sink=False, merge=False)),
+    (dict(variant='vector', order='RRR'), dict(variant='mma', order='CRR'),
+     dict(m=8, d=32, n=16, layout=None, sink=False, merge=False)),
+  ]),
+  ('Load Sinking', ['Sunk over Not Sunk'], [
+    (dict(sink=False), dict(sink=True),
+     dict(variant='mma', layout=None, order='CRR', merge=False)),
+  ]),
+  ('Handwritten over Intrinsic', ['No Load Sinking', 'Load Sinking'], [
+    (dict(sink=False), dict(opt=None, variant='hand', sink=False),
+     dict(variant='mma', m=8, d=32, n=16, layout=None, order='CRR')),
+    (dict(sink=True), dict(opt=None, variant='hand', sink=False),
+     dict(variant='mma', m=8, d=32, n=16, layout=None, order='CRR')),
+  ]),
+]
+
+def groupLabel(config):
+  '''
+  Returns the x axis label of a configuration: its type and kernel size.
+  '''
+  return f'{config.type} {config.m}x{config.d}x{config.n}'
+
+def groupKey(config):
+  '''
+  Returns the key ordering configurations by type, then kernel size.
+  '''
+  return (tu.orderedTypes.index(config.type), config.m, config.d, config.n)
+
+def getSpeedups(interval='fieller'):
+  '''
+  Matches every comparison's configurations and computes all their speedups in
+  one batch.
+  Returns a list with an entry per comparison of (title, bar labels, group
+  labels, speedups, errors), speedups and errors laid out for plotGroupedData.
+  '''
+  # Gather every pair of every comparison.
+  pairs = []
+  bars = []
+  for _, _, barDims in comparisons:
+    barPairs = [tu.matchConfigs(base, cand, **dims) for base, cand, dims in barDims]
+    bars.append(barPairs)
+    for matched in barPairs:
+      pairs += matched
+
+  speedups, lower, upper = tu.getConfigSpeedups(pairs, tu.repCount,
+                                                interval=interval)
+
+  # Split the results into bars by the baseline's group.
+  results = []
+  start = 0
+  for (title, barLabels, _), barPairs in zip(comparisons, bars):
+    groupConfigs = sorted({base for matched in barPairs for base, _ in matched}, key=groupKey)
+    groupLabels = list(dict.fromkeys(groupLabel(base) for base in groupConfigs))
+    values = np.full((len(barPairs), len(groupLabels)), np.nan)
+    errs = np.full((len(barPairs), 2, len(groupLabels)), np.nan)
+    for i, matched in enumerate(barPairs):
+      for j, (base, _) in enumerate(matched, start):
+        k = groupLabels.index(groupLabel(base))
+        values[i, k] = speedups[j]
+        errs[i, :, k] = lower[j], upper[j]
+      start += len(matched)
+    results.append((title, barLabels, groupLabels, values, errs))
+  return results
+
+def generatePlot():
+  results = getSpeedups()
+
+  # Set up figure and axes.
+  fig = plt.figure()
+  figWidth = 1
+  figHeight = len(results)
+
+  for i, (title, barLabels, groupLabels, values, errs) in enumerate(results):
+    ax = fig.add_subplot(figHeight, figWidth, i + 1)
+    tu.plotGroupedData(ax, groupLabels, barLabels, values, errs, metric='speedup')
+    ax.axhline(1, color='black', linewidth=.5)
+    ax.tick_params(axis='x', labelsize=6)
+    ax.set_title(title, fontsize=9)
+    ax.legend(loc='upper left', fontsize='x-small')
+
+  fig.set_size_inches(tu.textWidth, 2.5 * len(results))
+  fig.tight_layout()
+  fig.savefig('speedups.png')
+  fig.savefig('speedups.pgf')
+
+def generateTable():
+  for title, barLabels, groupLabels, values, errs in getSpeedups():
+    print(title)
+    for barLabel, barValues, (lower, upper) in zip(barLabels, values, errs):
+      for groupLabel, value, low, high in zip(groupLabels, barValues, lower, upper):
+        if not np.isnan(value):
+          print(f'  {barLabel}, {groupLabel}: {value:.3f} '
+                f'[{value - low:.3f}, {value + high:.3f}]')
+
+if __name__ == '__main__':
+  generatePlot()
+  generateTable()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+import argparse
+import datetime
+import json
+import os
+import random
+import re
+import socket
+import sys
+
+import thesUtils as tu
+
+# Cache hierarchy reported in every stub log, as on the POWER10 machine.
+caches = [
+  {'type': 'Data', 'level': 1, 'size': 32768, 'num_sharing': 4},
+  {'type': 'Instruction', 'level': 1, 'size': 49152, 'num_sharing': 4},
+  {'type': 'Unified', 'level': 2, 'size': 1048576, 'num_sharing': 8},
+  {'type': 'Unified', 'level': 3, 'size': 4194304, 'num_sharing': 8},
+]
+
+# Thread counts every stub kernel is registered at, as with ->ThreadRange(1, 4).
+threadCounts = [1, 2, 4]
+
+# Threads sharing a core's MMA units without slowing each other down.
+mmaUnitsPerCore = 2
+
+# Instructions per cycle of each variant's stub kernel: MMA kernels are bound
+# by outer-product issue, vector kernels issue more, cheaper instructions.
+stubIpc = {'mma': 1.5, 'vector': 3.0, 'hand': 1.8}
+
+# Relative spread of the slowdown every run of one repetition index shares,
+# as the machine's state drifts between passes of a campaign.
+repDrift = 0.03
+
+def stubDrift(rep):
+  '''
+  Returns the factor every stub run of a repetition index is slowed down by.
+  '''
+  return random.Random(rep).gauss(1, repDrift)
+
+def stubCounters(config, cycles, events):
+  '''
+  Takes a LogConfig, the cycles of one kernel call and the PMU events asked
+  for.
+  Returns synthetic per-iteration values of each event but CYCLES, which
+  stub entries always hold: instructions at the variant's stubIpc, an L1D
+  miss per cache line of the working set past 32 KiB, rare branch misses and
+  small counts of any other event.
+  '''
+  bits, _ = tu.types.get(config.type, (32, (4, 1)))
+  workingSet = ((config.m * config.d + config.d * config.n) * bits
+                + config.m * config.n * 32) // 8
+  model = {
+    'INSTRUCTIONS': cycles * stubIpc[config.variant],
+    'L1-DCACHE-LOAD-MISSES': 0.5 + max(0, workingSet - 32768) / 128,
+    'BRANCH-MISSES': 0.05 + cycles / 5000,
+  }
+  return {
+    event: model.get(event, cycles / 100) * random.gauss(1, 0.02)
+    for event in events if event != 'CYCLES'
+  }
+
+def stubEntry(name, cycles, familyIndex=0, threads=1, counters=None):
+  '''
+  Returns a Google Benchmark entry measuring about the given cycles, run on
+  the given number of threads, with the given PMU counter values.
+  '''
+  cycles *= random.gauss(1, 0.01)
+  iterations = max(1, int(1e9 / cycles))
+  cpuTime = cycles / 4
+  name = f'{name}/threads:{threads}'
+  return {
+    'name': name,
+    'family_index': familyIndex,
+    'per_family_instance_index': 0,
+    'run_name': name,
+    'run_type': 'iteration',
+    'repetitions': 1,
+    'repetition_index': 0,
+    'threads': threads,
+    'iterations': iterations,
+    'real_time': cpuTime * random.uniform(1, 1.001),
+    'cpu_time': cpuTime,
+    'time_unit': 'ns',
+    'CYCLES': cycles,
+    'cs': 0.0,
+    **(counters or {}),
+  }
+
+def stubCycles(config, threads):
+  '''
+  Returns the cycles a stub kernel call takes on each of the given number of
+  threads. MMA kernels slow down once threads outnumber the MMA units; vector
+  kernels only slightly, from sharing the load ports.
+  '''
+  bits, (_, rank) = tu.types.get(config.type, (32, (4, 1)))
+  cycles = 8 + config.m * config.d * config.n / (16 * rank)
+  if config.variant == 'vector':
+    return 2 * cycles * (1 + 0.05 * (threads - 1))
+  return cycles * max(1, threads / mmaUnitsPerCore)
+
+def stubLog(config, executable, benchFilter=None, events=(), drift=1):
+  '''
+  Takes a LogConfig, the executable name to report and optionally a
+  --benchmark_filter regex of the benchmarks to run, the PMU events to count
+  and the factor to slow the kernels down by.
+  Returns a fake Google Benchmark json log for the configuration.
+  '''
+  benchmarks = []
+  for count in threadCounts:
+    cycles = stubCycles(config, count) * drift
+    if config.variant == 'hand':
+      # The call alone touches no matrices.
+      callCounters = stubCounters(config._replace(m=0, d=0, n=0), 13, events)
+      benchmarks += [
+        stubEntry('handMult', cycles + 13, 0, count,
+                  {event: value + callCounters[event] for event, value in
+                   stubCounters(config, cycles, events).items()}),
+        stubEntry('fnCall', 13, 1, count, callCounters),
+      ]
+    else:
+      benchmarks.append(stubEntry('intrinsicMult', cycles, 0, count,
+                                  stubCounters(config, cycles, events)))
+  if benchFilter is not None:
+    benchmarks = [entry for entry in benchmarks if re.search(benchFilter, entry['name'])]
+
+  return {
+    'context': {
+      'date': datetime.datetime.now().astimezone().isoformat(timespec='seconds'),
+      'host_name': socket.gethostname(),
+      'executable': executable,
+      'num_cpus': os.cpu_count(),
+      'mhz_per_cpu': 512,
+      'cpu_scaling_enabled': False,
+      'caches': caches,
+      'load_avg': list(os.getloadavg()),
+      'library_build_type': 'release',
+    },
+    'benchmarks': benchmarks,
+  }
+
+def installStubs(exeDir, configs):
+  '''
+  Takes an executable directory and a list of LogConfigs.
+  Links an executable for each configuration to this stub.
+  '''
+  os.makedirs(exeDir, exist_ok=True)
+  stub = os.path.abspath(__file__)
+  for config in configs:
+    exePath = os.path.join(exeDir, tu.configName(config))
+    if not os.path.lexists(exePath):
+      os.symlink(stub, exePath)
+
+if __name__ == '__main__':
+  # Run as a linked benchmark, the configuration comes from the program name.
+  exeName = os.path.basename(sys.argv[0])
+  parsed = tu.parseLogName(f'{exeName}.0.json')
+  if parsed is None:
+    raise SystemExit(f'"{exeName}" is not a benchmark name; link it with installStubs.')
+
+  parser = argparse.ArgumentParser(description='Fake Google Benchmark executable.')
+  parser.add_argument('--benchmark_out')
+  parser.add_argument('--benchmark_out_format', default='json')
+  parser.add_argument('--benchmark_filter')
+  parser.add_argument('--benchmark_perf_counters', default='')
+  args, _ = parser.parse_known_args()
+
+  events = [event for event in args.benchmark_perf_counters.split(',') if event]
+
+  # Runs written to a log share the drift of its repetition index. The runner
+  # writes to the log name with a .tmp suffix.
+  outName = re.sub(r'\.tmp$', '', args.benchmark_out or '')
+  outParsed = tu.parseLogName(outName)
+  drift = 1 if outParsed is None else stubDrift(outParsed[1])
+  log = json.dumps(stubLog(parsed[0], sys.argv[0], args.benchmark_filter, events, drift),
+                   indent=2)
+  if args.benchmark_out:
+    with open(args.benchmark_out, 'w') as f:
+      f.write(log)
+  print(log)
@@ -0,0 +1,71 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+import stubBench
+import thesUtils as tu
+from benchRunner import BenchRunner, expandMatrix
+
+pyDir = os.path.dirname(os.path.abspath(__file__))
+
+mmaConfig = tu.LogConfig('float', 8, 32, 16, None, 'CRR', 'O3', 'mma', False, False)
+handConfig = tu.LogConfig('float', 8, 32, 16, None, 'CRR', None, 'hand', False, False)
+
+def test_expandMatrix():
+  # Layouts come from json as lists, whatever the variant.
+  configs = expandMatrix(types=['float'], layouts=[None, [2, 4]], variants=['mma', 'hand'],
+                         sinks=[False, True])
+  assert len(configs) == 6
+  assert {config.layout for config in configs} == {None, (2, 4)}
+  assert handConfig._replace(layout=(2, 4)) in configs
+  assert len(set(configs)) == len(configs)
+
+def test_stubRunner(tmp_path, logDir):
+  matrix = {'types': ['float'], 'sizes': [[8, 32, 16]], 'variants': ['mma', 'hand'],
+            'sinks': [False]}
+  matrixPath = tmp_path / 'matrix.json'
+  matrixPath.write_text(json.dumps(matrix))
+  stubBench.installStubs(str(tmp_path / 'exe'), [mmaConfig, handConfig])
+
+  subprocess.run(
+    [sys.executable, 'benchRunner.py', '--matrix', str(matrixPath), '--reps', '3',
+     '--log-dir', logDir, '--exe-dir', str(tmp_path / 'exe')],
+    cwd=pyDir, check=True, capture_output=True)
+
+  catalog = tu.getLogCatalog(logDir)
+  assert set(catalog.configs) == {mmaConfig, handConfig}
+  assert all(sorted(reps) == [0, 1, 2] for reps in catalog.configs.values())
+
+  # Hand kernels come out as the kernel alone, as the stub models it.
+  samples = tu.getConfigSamples([mmaConfig, handConfig], logDir=logDir)
+  cycles = np.nanmean(samples[:, :, tu.statNames.index('cycles')], axis=1)
+  expected = stubBench.stubCycles(mmaConfig, 1)
+  assert cycles == pytest.approx([expected, expected], rel=0.1)
+
+  # A rerun only runs what is missing.
+  os.remove(os.path.join(logDir, tu.formatLogName(handConfig, 1)))
+  result = subprocess.run(
+    [sys.executable, 'benchRunner.py', '--matrix', str(matrixPath), '--reps', '3',
+     '--log-dir', logDir, '--exe-dir', str(tmp_path / 'exe')],
+    cwd=pyDir, check=True, capture_output=True, text=True)
+  assert 'Running 1 job(s)' in result.stdout
+
+def test_pinnedRunDropsOversubscribedEntries(tmp_path, logDir):
+  cpu = min(os.sched_getaffinity(0))
+  exeDir = str(tmp_path / 'exe')
+  stubBench.installStubs(exeDir, [mmaConfig])
+  runner = BenchRunner(logDir, exeDir, domains=[[cpu]])
+
+  failed = runner.run([(mmaConfig, 0), (mmaConfig._replace(threads=2), 0)])
+  assert list(failed) == [tu.formatLogName(mmaConfig._replace(threads=2), 0)]
+
+  # The stub registers every thread count, but only one CPU was pinned.
+  with open(os.path.join(logDir, tu.formatLogName(mmaConfig, 0)), 'r') as f:
+    log = json.load(f)
+  assert log['context']['pinning'] == {'cpus': [cpu], 'domain': [cpu]}
+  assert [entry['threads'] for entry in log['benchmarks']] == [1]
+  assert tu.configThreadCounts(mmaConfig, logDir) == [1]
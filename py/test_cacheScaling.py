@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from cacheScaling import cliffs, fitScaling, locatesCliffs
+
+cacheSizes = (4096, 1 << 20, 0)
+
+def test_fitKeepsNegativeIntercept():
+  # Three sizes in L1D and two in L2, with cycles a line per level.
+  workingSets = [1000, 2000, 3000, 50000, 80000]
+  ops = np.array([100, 200, 300, 5000, 8000])
+  slopes = np.array([0.5, 0.5, 0.5, 2, 2])
+  cycles = -20 + slopes * ops
+  fit = fitScaling(workingSets, ops, cycles, np.ones(len(ops)), cacheSizes)
+
+  assert fit.intercept == pytest.approx(-20)
+  assert fit.slopes['L1D'] == pytest.approx(0.5)
+  assert fit.slopes['L2'] == pytest.approx(2)
+  assert locatesCliffs(fit)
+  (low, high, slowdown, _), = cliffs(fit)
+  assert (low, high, slowdown) == ('L1D', 'L2', pytest.approx(4))
+
+def test_singleSizeLevelIsNotFitted():
+  workingSets = [1000, 2000, 3000, 50000]
+  ops = np.array([100, 200, 300, 5000])
+  fit = fitScaling(workingSets, ops, 10 + ops, np.ones(len(ops)), cacheSizes)
+
+  assert fit.sizeCounts['L1D'] == 3 and fit.sizeCounts['L2'] == 1
+  assert fit.slopes['L2'] is None
+  assert not locatesCliffs(fit)
+  assert cliffs(fit) == []
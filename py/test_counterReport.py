@@ -0,0 +1,67 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+import thesUtils as tu
+from benchRunner import defaultPerfCounters
+from counterReport import counterReport
+
+mmaConfig = tu.LogConfig('float', 8, 32, 16, None, 'CRR', 'O3', 'mma', False, False)
+handConfig = tu.LogConfig('float', 8, 32, 16, None, 'CRR', None, 'hand', False, False)
+
+def writeCounterLog(writeLog, config, rep, cycles, instructions, misses):
+  '''
+  Writes a stub log counting defaultPerfCounters, with the kernel entries'
+  counters set to the given values and the call overhead entry's to a tenth
+  of them.
+  '''
+  logPath = writeLog(config, rep, cycles=cycles, events=defaultPerfCounters)
+  with open(logPath, 'r') as f:
+    log = json.load(f)
+  for entry in log['benchmarks']:
+    scale = 0.1 if entry['name'].startswith('fnCall') else 1
+    entry['INSTRUCTIONS'] = instructions * scale
+    entry['L1-DCACHE-LOAD-MISSES'] = misses * scale
+    entry['BRANCH-MISSES'] = scale
+  with open(logPath, 'w') as f:
+    json.dump(log, f)
+
+def test_counterIngestion(logDir, writeLog):
+  for rep in range(3):
+    writeCounterLog(writeLog, mmaConfig, rep, 100, 150 + rep, 3)
+    writeCounterLog(writeLog, handConfig, rep, 100, 200, 4)
+  # Logs without counters are not reported.
+  for rep in range(3):
+    writeLog(mmaConfig._replace(type='i8'), rep, cycles=50)
+
+  # PMU event names are cached under identifier names.
+  entries = tu.getJsonEntries(os.path.join(logDir, tu.formatLogName(mmaConfig, 0)))
+  assert entries['INSTRUCTIONS'][0] == 150
+  assert entries['L1_DCACHE_LOAD_MISSES'][0] == 3
+
+  report = dict(counterReport(logDir))
+  assert set(report) == {tu.configName(mmaConfig), tu.configName(handConfig)}
+  metrics = ['cycles', *tu.counterMetrics]
+
+  # Derived metrics of the kernel entry.
+  results = dict(zip(metrics, report[tu.configName(mmaConfig)]))
+  assert results['cycles'][0] == pytest.approx(100)
+  assert results['ipc'][0] == pytest.approx(151 / 100)
+  assert results['l1dMpki'][0] == pytest.approx(
+    np.mean([1000 * 3 / (150 + rep) for rep in range(3)]))
+
+  # Handwritten kernels subtract the call overhead from every counter.
+  results = dict(zip(metrics, report[tu.configName(handConfig)]))
+  assert results['ipc'][0] == pytest.approx((200 - 20) / 100)
+  assert results['l1dMpki'][0] == pytest.approx(1000 * (4 - 0.4) / (200 - 20))
+  assert results['branchMpki'][0] == pytest.approx(1000 * 0.9 / 180)
+
+  # The result store holds the same derived metrics, NaN without counters.
+  store = tu.getResultStore(logDir)
+  groups, _, ipc, _, _ = store.aggregate('ipc', ['type', 'variant'])
+  assert dict(zip(zip(groups['type'], groups['variant']), ipc)) == {
+    ('float', 'hand'): pytest.approx(1.8),
+    ('float', 'mma'): pytest.approx(1.51),
+  }
@@ -0,0 +1,33 @@
+import pytest
+
+import mmaModel
+from layoutTuner import LayoutTuner, candidateConfigs, measuredCycles, tuneConfig, tuneSynthetic
+
+def test_tuneSynthetic():
+  sizes = [(8, 32, 16), (32, 32, 32), (128, 8, 128)]
+  tuner, evaluations, results = tuneSynthetic(['float', 'i8'], sizes, rounds=4, batch=4)
+  assert evaluations == len(results) + 16
+  assert len(tuner.candidates) > evaluations
+
+  # The offline tuner lands within a few percent of each group's best layout
+  # while measuring only a fraction of the candidates.
+  assert set(results) == {(type, *size) for type in ['float', 'i8'] for size in sizes}
+  assert max(excess for _, _, excess in results.values()) < 0.1
+
+def test_proposeSkipsMeasured():
+  candidates = candidateConfigs(['float'], [(32, 32, 32)])
+  default = tuneConfig('float', (32, 32, 32), mmaModel.defaultLayout)
+  tuner = LayoutTuner(candidates, {default: 1000.0})
+  proposals = tuner.propose(3)
+  assert len(proposals) == 3
+  assert default not in [config for config, _, _ in proposals]
+  assert all(ei >= 0 for _, ei, _ in proposals)
+
+def test_measuredCyclesKeepsDefaultLayoutApart(writeLog, logDir):
+  explicit = tuneConfig('float', (32, 8, 32), mmaModel.defaultLayout)
+  for rep in range(3):
+    writeLog(explicit, rep, cycles=200)
+    writeLog(explicit._replace(layout=None), rep, cycles=100)
+
+  measured = measuredCycles(logDir)
+  assert measured == {explicit: pytest.approx(200)}
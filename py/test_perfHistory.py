@@ -0,0 +1,29 @@
+import os
+import shutil
+
+import thesUtils as tu
+from perfHistory import configHistory, ingestLogs, openHistory
+
+config = tu.LogConfig('float', 8, 32, 16, None, 'CRR', 'O3', 'mma', False, False)
+
+def test_ingestOncePerRun(tmp_path, logDir, writeLog):
+  paths = [writeLog(config, rep, cycles=100 + rep) for rep in range(3)]
+  conn = openHistory(str(tmp_path / 'history.sqlite'))
+  assert ingestLogs(conn, logDir) == 3
+  assert ingestLogs(conn, logDir) == 0
+
+  # Touching a log or checking the logs out elsewhere adds no runs.
+  os.utime(paths[0], ns=(0, 10 ** 9))
+  tu.reloadLogs(logDir)
+  assert ingestLogs(conn, logDir) == 0
+  copyDir = str(tmp_path / 'checkout')
+  shutil.copytree(logDir, copyDir)
+  assert ingestLogs(conn, copyDir) == 0
+
+  # A rerun overwriting a log is a new run.
+  writeLog(config, 1, cycles=200)
+  tu.reloadLogs(logDir)
+  assert ingestLogs(conn, logDir) == 1
+  # It was ingested on its own, so it starts a campaign of its own.
+  history = configHistory(conn, tu.configName(config))
+  assert [(runs, mean) for _, _, _, _, runs, mean, _ in history] == [(3, 101), (1, 200)]
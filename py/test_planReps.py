@@ -0,0 +1,23 @@
+import thesUtils as tu
+from planReps import planRepetitions
+
+config = tu.LogConfig('float', 8, 32, 16, None, 'CRR', 'O3', 'mma', False, False)
+
+def test_replanConverges(logDir, writeLog):
+  # Repetitions up to repCount, noisy enough to need more.
+  for rep in range(tu.repCount):
+    writeLog(config, rep, cycles=100 + 10 * (-1) ** rep)
+
+  item, = planRepetitions(0.02, logDir=logDir)
+  assert item['have'] == tu.repCount and not item['converged']
+  assert item['reps'][0] == tu.repCount
+
+  # Run the planned repetitions, then plan again over every repetition.
+  planned = item['reps']
+  for rep in planned:
+    writeLog(config, rep, cycles=100 + 10 * (-1) ** rep)
+  tu.reloadLogs(logDir)
+
+  item, = planRepetitions(0.02, logDir=logDir)
+  assert item['have'] == tu.repCount + len(planned)
+  assert item['converged'] and item['reps'] == []
@@ -0,0 +1,220 @@
+import os
+
+import numpy as np
+import pytest
+import scipy.stats as st
+
+import thesUtils as tu
+
+def samplesWithGaps(seed=0, configs=4, reps=12):
+  '''
+  Returns normal samples shaped (configurations, repetitions) with a few
+  missing (NaN) repetitions.
+  '''
+  rng = np.random.default_rng(seed)
+  samples = rng.normal(100, 5, (configs, reps)) + np.arange(configs)[:, np.newaxis] * 10
+  samples[1, -3:] = np.nan
+  samples[-1, 0] = np.nan
+  return samples
+
+mmaConfig = tu.LogConfig('float', 8, 32, 16, None, 'CRR', 'O3', 'mma', False, False)
+handConfig = tu.LogConfig('float', 8, 32, 16, None, 'CRR', None, 'hand', False, False)
+
+def test_batchStats():
+  samples = samplesWithGaps()
+  means, sems, halfWidths = tu.batchStats(samples)
+  for i, row in enumerate(samples):
+    row = row[~np.isnan(row)]
+    lower, upper = st.t.interval(0.95, len(row) - 1, row.mean(), st.sem(row))
+    assert means[i] == pytest.approx(row.mean())
+    assert sems[i] == pytest.approx(st.sem(row))
+    assert halfWidths[i] == pytest.approx((upper - lower) / 2)
+
+  # A mask drops repetitions as NaN does, and single repetitions get no error.
+  mask = np.ones(samples.shape, dtype=bool)
+  mask[0, 1:] = False
+  means, sems, halfWidths = tu.batchStats(samples, mask)
+  assert means[0] == samples[0, 0]
+  assert np.isnan(sems[0]) and np.isnan(halfWidths[0])
+
+@pytest.mark.parametrize('interval, method', [('percentile', 'percentile'), ('bca', 'BCa')])
+def test_bootstrapStats(interval, method):
+  samples = samplesWithGaps(configs=2, reps=20)
+  estimates, lower, upper = tu.bootstrapStats(samples, interval=interval,
+                                              resamples=20000)
+  for i, row in enumerate(samples):
+    row = row[~np.isnan(row)]
+    reference = st.bootstrap((row,), np.mean, n_resamples=20000, method=method,
+                             random_state=1).confidence_interval
+    width = reference.high - reference.low
+    assert estimates[i] == pytest.approx(row.mean())
+    assert estimates[i] - lower[i] == pytest.approx(reference.low, abs=0.05 * width)
+    assert estimates[i] + upper[i] == pytest.approx(reference.high, abs=0.05 * width)
+
+  # Medians of the sorted valid samples.
+  estimates, _, _ = tu.bootstrapStats(samples, estimator='median', resamples=100)
+  assert estimates == pytest.approx(np.nanmedian(samples, axis=1))
+
+def test_welchTest():
+  first = samplesWithGaps(seed=1)
+  second = samplesWithGaps(seed=2) + 3
+  t, p, _ = tu.welchTest(first, second)
+  for i in range(len(first)):
+    a = first[i][~np.isnan(first[i])]
+    b = second[i][~np.isnan(second[i])]
+    reference = st.ttest_ind(b, a, equal_var=False)
+    assert t[i] == pytest.approx(reference.statistic)
+    assert p[i] == pytest.approx(reference.pvalue)
+
+def test_mannWhitneyTest():
+  # Rounded samples, so there are ties to correct for.
+  first = np.round(samplesWithGaps(seed=3) / 4)
+  second = np.round(samplesWithGaps(seed=4) / 4 + 1)
+  u, p, delta = tu.mannWhitneyTest(first, second)
+  for i in range(len(first)):
+    a = first[i][~np.isnan(first[i])]
+    b = second[i][~np.isnan(second[i])]
+    reference = st.mannwhitneyu(b, a, method='asymptotic')
+    assert u[i] == pytest.approx(reference.statistic)
+    assert p[i] == pytest.approx(reference.pvalue)
+    assert delta[i] == pytest.approx(2 * u[i] / (len(a) * len(b)) - 1)
+
+def test_adjustPValues():
+  p = np.array([0.01, 0.04, np.nan, 0.03, 0.005])
+  holm = tu.adjustPValues(p, 'holm')
+  assert holm == pytest.approx([0.03, 0.06, np.nan, 0.06, 0.02], nan_ok=True)
+  bh = tu.adjustPValues(p, 'bh')
+  valid = ~np.isnan(p)
+  assert np.isnan(bh[2])
+  assert bh[valid] == pytest.approx(st.false_discovery_control(p[valid], method='bh'))
+
+def test_speedupStats():
+  rng = np.random.default_rng(5)
+  baseline = rng.normal(200, 8, (3, 15))
+  candidate = rng.normal(100, 6, (3, 12))
+  candidate[2] = rng.normal(1, 10, 12)
+  for interval in ('fieller', 'delta'):
+    speedups, lower, upper = tu.speedupStats(baseline, candidate, interval=interval)
+    for i in range(2):
+      a, b = baseline[i], candidate[i]
+      varA = a.var(ddof=1) / len(a)
+      varB = b.var(ddof=1) / len(b)
+      ratio = a.mean() / b.mean()
+      df = (varA + ratio ** 2 * varB) ** 2 / (
+        varA ** 2 / (len(a) - 1) + (ratio ** 2 * varB) ** 2 / (len(b) - 1))
+      t = st.t.ppf(0.975, df)
+      assert speedups[i] == pytest.approx(ratio)
+      if interval == 'delta':
+        halfWidth = t * np.sqrt(varA + ratio ** 2 * varB) / b.mean()
+        assert lower[i] == pytest.approx(halfWidth)
+        assert upper[i] == pytest.approx(halfWidth)
+      else:
+        # Fieller's bounds are where the t-test of a - r * b is just significant.
+        for r in (ratio - lower[i], ratio + upper[i]):
+          assert (a.mean() - r * b.mean()) ** 2 == pytest.approx(
+            t ** 2 * (varA + r ** 2 * varB))
+
+  # A candidate mean indistinguishable from zero leaves Fieller unbounded.
+  _, lower, upper = tu.speedupStats(baseline, candidate)
+  assert np.isnan(lower[2]) and np.isnan(upper[2])
+
+def test_pairedStats():
+  rng = np.random.default_rng(6)
+  drift = rng.normal(0, 10, (2, 10))
+  baseline = 200 + drift + rng.normal(0, 1, (2, 10))
+  candidate = 100 + drift / 2 + rng.normal(0, 1, (2, 10))
+  candidate[1, 4] = np.nan
+  (diffs, diffLower, diffUpper), (speedups, lower, upper) = tu.pairedStats(
+    baseline, candidate)
+  for i in range(2):
+    paired = ~np.isnan(candidate[i])
+    a, b = baseline[i][paired], candidate[i][paired]
+    reference = st.ttest_rel(a, b).confidence_interval()
+    assert diffs[i] == pytest.approx((a - b).mean())
+    assert diffs[i] - diffLower[i] == pytest.approx(reference.low)
+    assert diffs[i] + diffUpper[i] == pytest.approx(reference.high)
+
+    # Paired Fieller bounds solve the t-test of a - r * b with the covariance.
+    t = st.t.ppf(0.975, len(a) - 1)
+    cov = np.cov(a, b) / len(a)
+    assert speedups[i] == pytest.approx(a.mean() / b.mean())
+    for r in (speedups[i] - lower[i], speedups[i] + upper[i]):
+      assert (a.mean() - r * b.mean()) ** 2 == pytest.approx(
+        t ** 2 * (cov[0, 0] - 2 * r * cov[0, 1] + r ** 2 * cov[1, 1]))
+
+  # Pairing removes the shared drift, so it narrows the unpaired interval.
+  _, unpairedLower, unpairedUpper = tu.speedupStats(baseline, candidate)
+  assert np.all(lower + upper < unpairedLower + unpairedUpper)
+
+def test_logCacheInvalidation(logDir, writeLog):
+  paths = [writeLog(mmaConfig, rep, cycles=100 + rep) for rep in range(3)]
+
+  cache = tu.LogCache(logDir, workers=1)
+  assert sorted(cache.index) == sorted(os.path.basename(path) for path in paths)
+  assert os.path.exists(cache.cachePath)
+  assert not cache.refresh()
+
+  # A rewritten log is parsed again.
+  writeLog(mmaConfig, 1, cycles=1000.5)
+  os.utime(paths[1], ns=(0, 10 ** 9))
+  assert cache.refresh()
+  cycles = cache.getEntries(paths[1])['CYCLES']
+  assert 1000.5 in cycles
+
+  # A removed log leaves the cache, and the rows of the others still match.
+  os.remove(paths[0])
+  assert cache.refresh()
+  assert os.path.basename(paths[0]) not in cache.index
+  assert 102 in cache.getEntries(paths[2])['CYCLES']
+
+  # A cache written by another version is ignored.
+  cache.save()
+  assert sorted(tu.LogCache(logDir, workers=1).index) == sorted(cache.index)
+  with open(cache.cachePath, 'wb') as f:
+    np.savez(f, version=tu.cacheVersion - 1)
+  assert sorted(tu.LogCache(logDir, workers=1).index) == sorted(cache.index)
+
+def test_resultStorePivot(logDir, writeLog):
+  cycles = {
+    mmaConfig: [98, 100, 102, 120],
+    mmaConfig._replace(type='i8'): [50, 51, 49],
+    handConfig: [80, 84, 82],
+  }
+  for config, values in cycles.items():
+    for rep, value in enumerate(values):
+      writeLog(config, rep, cycles=value)
+
+  store = tu.getResultStore(logDir)
+  assert len(store) == 10
+  _, rowValues, colValues, means, errs = store.pivot('cycles', rows='type', cols='variant')
+  assert rowValues == ['float', 'i8']
+  assert colValues == ['hand', 'mma']
+
+  # Hand kernels are measured as handMult - fnCall.
+  for config, values in cycles.items():
+    mean, _, halfWidth = tu.batchStats([values])
+    c, r = colValues.index(config.variant), rowValues.index(config.type)
+    assert means[c, r] == pytest.approx(mean[0])
+    assert errs[c, :, r].tolist() == pytest.approx([halfWidth[0]] * 2)
+  assert means.mask[colValues.index('hand'), rowValues.index('i8')]
+
+  # Bootstrap intervals of skewed samples keep their own lower and upper bounds.
+  _, _, _, means, errs = store.pivot('cycles', rows='type', cols='variant',
+                                     interval='percentile')
+  c = colValues.index('mma')
+  assert means[c, 0] == pytest.approx(105)
+  assert errs[c, 0, 0] < errs[c, 1, 0]
+
+def test_getJsonCumulativeStatsBatch(logDir, writeLog):
+  for rep in range(4):
+    writeLog(mmaConfig, rep, cycles=100 + rep)
+    writeLog(handConfig, rep, cycles=80 - rep)
+  mmaPath = os.path.join(logDir, tu.formatLogName(mmaConfig, '{}'))
+  handPath = os.path.join(logDir, tu.formatLogName(handConfig, '{}'))
+
+  mmaStats, handStats = tu.getJsonCumulativeStatsBatch(
+    [(mmaPath, 4), (handPath, 3, 'handMult', 'fnCall')])
+  assert np.array(mmaStats) == pytest.approx(np.array(tu.getJsonCumulativeStats(mmaPath, 4)))
+  assert np.array(handStats) == pytest.approx(
+    np.array(tu.getJsonCumDiffStats(handPath, 3, 'handMult', 'fnCall')))
+  assert handStats[2][0] == pytest.approx(79)
@@ -1,8 +1,15 @@
+import ast
+import datetime
+import hashlib
 import json
 import math
 import numpy as np
 import os
+import re
 import scipy.stats as st
+import shutil
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from scipy.stats.mstats import gmean
 
 version = '2.5.2'
@@ -34,6 +41,12 @@ orderedTypes = [
 layouts = [(1, 1), (2, 1), (1, 2), (2, 2), (4, 1), (1, 4), (4, 2), (2, 4), (8, 1), (1, 8)]
 layouts = sorted(layouts, key=lambda x: x[0] * x[1] + max(x[0], x[1]) + x[1])
 
+# Directory holding every json log.
+logDir = 'logs/all'
+
+# Repetitions of each configuration used in the thesis.
+repCount = 25
+
 def getFileStats(logFile, confidence=0.95):
   '''
   Takes a path to a run log file.
@@ -55,145 +68,2173 @@ def getFileStats(logFile, confidence=0.95):
   lower, upper = st.t.interval(confidence, len(times) - 1, loc=mean, scale=st.sem(times))
   return (mean, mean - lower, upper - mean)
 
-def getJsonStats(logFile):
+# Version of the results cache layout. Bump whenever the stored columns change.
+cacheVersion = 5
+
+# Benchmark entry fields always held in the results cache, NaN where a log
+# lacks them. Every other numeric field a log has (counters, family and
+# instance indices, threads) is cached as well, under its fieldName.
+cacheEntryFields = ['iterations', 'real_time', 'cpu_time', 'CYCLES', 'cs']
+
+def fieldName(name):
+  '''
+  Takes the name of a benchmark entry field, e.g. the PMU event
+  L1-DCACHE-LOAD-MISSES.
+  Returns the name it is cached and used in metrics under: the name with every
+  character that cannot be part of an identifier replaced by _, e.g.
+  L1_DCACHE_LOAD_MISSES.
+  '''
+  name = re.sub(r'\W', '_', name)
+  return f'_{name}' if name[:1].isdigit() else name
+
+# Logs are parsed in a process pool when at least this many need parsing.
+parallelParseThreshold = 64
+
+# Limits beyond which a run is considered noisy.
+#   cs: context switches during any benchmark entry.
+#   load_avg: one minute load average as the run started. The benchmark itself
+#             accounts for about one.
+#   time_divergence: relative difference of real and cpu time of any entry.
+# Runs with CPU frequency scaling enabled are always noisy.
+runQualityLimits = {'cs': 0, 'load_avg': 2.0, 'time_divergence': 0.01}
+
+# Levels of the data caches whose sizes are kept from each log's context.
+cacheLevels = [1, 2, 3]
+
+def readJsonLog(logFile):
   '''
   Takes a path to a json log file.
+  Returns a tuple of (context, entries) holding only the fields kept in the
+  results cache. context is a dict of run context fields and entries is a list
+  of dicts, one per benchmark entry, in file order, of the entry's name and
+  numeric fields.
+  '''
+  with open(logFile, 'r') as f:
+    objects = json.load(f)
+
+  # Keep the run context that identifies the run and can describe its quality.
+  context = objects['context']
+  loadAvg = context.get('load_avg', [])
+  runContext = {
+    'date': context.get('date', ''),
+    'host_name': context.get('host_name', ''),
+    'executable': context.get('executable', ''),
+    'toolchain': context.get('toolchain', ''),
+    'num_cpus': context.get('num_cpus', 0),
+    'mhz_per_cpu': context.get('mhz_per_cpu', 0),
+    'cpu_scaling_enabled': bool(context.get('cpu_scaling_enabled', False)),
+    'load_avg': (list(loadAvg) + [math.nan] * 3)[:3],
+    'cache_sizes': [0] * len(cacheLevels),
+  }
+
+  # Keep the sizes of the data caches, 0 where the context lacks one.
+  for cache in context.get('caches', []):
+    if cache.get('type') in ('Data', 'Unified') and cache.get('level') in cacheLevels:
+      runContext['cache_sizes'][cacheLevels.index(cache['level'])] = cache['size']
+
+  # Keep the measurements of each benchmark entry.
+  entries = []
+  for benchmark in objects['benchmarks']:
+    entry = {field: math.nan for field in cacheEntryFields}
+    for field, value in benchmark.items():
+      if isinstance(value, (int, float)):
+        entry[fieldName(field)] = float(value)
+    entry['name'] = benchmark['name']
+    entries.append(entry)
+
+  return (runContext, entries)
+
+def _tryReadJsonLog(logFile):
+  '''
+  As readJsonLog, but returns the error message as a string instead of raising.
+  '''
+  try:
+    return readJsonLog(logFile)
+  except (OSError, ValueError, KeyError) as e:
+    return str(e)
+
+class LogCache:
+  '''
+  Columnar cache of every json log in a directory.
+
+  The cache is stored next to the log directory (logs/all -> logs/all.cache.npz)
+  and holds one row per log file (file name, mtime, size and run context) and
+  one row per benchmark entry (file index, name and every numeric field, NaN
+  where an entry lacks a field another entry has). Only
+  logs that are new or whose mtime or size changed since the cache was written
+  are parsed again, in a pool of worker processes when there are many of them.
+  '''
+  # Per-file columns and their dtypes.
+  fileDtypes = {
+    'fileName': str,
+    'mtime': np.int64,
+    'size': np.int64,
+    'date': str,
+    'host_name': str,
+    'executable': str,
+    'toolchain': str,
+    'num_cpus': np.int64,
+    'mhz_per_cpu': np.float64,
+    'cpu_scaling_enabled': bool,
+    'load_avg': np.float64,
+    'cache_sizes': np.int64,
+  }
+
+  # Per-entry columns and their dtypes. Numeric entry fields are float64 and
+  # stored as entry.<field>.
+  entryDtypes = {
+    'entryFile': np.int64,
+    'name': str,
+  }
+
+  def __init__(self, logDir, workers=None):
+    self.logDir = logDir
+    self.workers = workers
+    self.cachePath = os.path.normpath(logDir) + '.cache.npz'
+
+    # Columns of the cache and an index of file name -> (file row, entry rows).
+    self.files = self._emptyFiles()
+    self.entries = self._emptyEntries()
+    self.index = {}
+
+    self._load()
+    self.update()
+
+  def _emptyFiles(self):
+    files = {name: np.array([], dtype=dtype) for name, dtype in self.fileDtypes.items()}
+    files['load_avg'] = np.zeros((0, 3))
+    files['cache_sizes'] = np.zeros((0, len(cacheLevels)), dtype=np.int64)
+    return files
+
+  def _emptyEntries(self):
+    entries = {name: np.array([], dtype=dtype) for name, dtype in self.entryDtypes.items()}
+    entries.update({field: np.array([]) for field in cacheEntryFields})
+    return entries
+
+  def _load(self):
+    '''
+    Reads the cache from disk if it exists and matches cacheVersion.
+    '''
+    if not os.path.exists(self.cachePath):
+      return
+
+    try:
+      with np.load(self.cachePath) as stored:
+        if int(stored['version']) != cacheVersion:
+          return
+        files = {name: stored[name] for name in self.fileDtypes}
+        entries = {name: stored[name] for name in self.entryDtypes}
+        for key in stored.files:
+          if key.startswith('entry.'):
+            entries[key[len('entry.'):]] = stored[key]
+    except (OSError, KeyError, ValueError) as e:
+      print(f'Ignoring unreadable cache "{self.cachePath}": {e}')
+      return
+
+    self.files = files
+    self.entries = entries
+    self._reindex()
+
+  def save(self):
+    '''
+    Writes the cache to disk, replacing the previous cache atomically.
+    '''
+    tmpPath = f'{self.cachePath}.{os.getpid()}.tmp'
+    entries = {
+      name if name in self.entryDtypes else f'entry.{name}': column
+      for name, column in self.entries.items()
+    }
+    with open(tmpPath, 'wb') as f:
+      np.savez_compressed(f, version=cacheVersion, **self.files, **entries)
+    os.replace(tmpPath, self.cachePath)
+
+  def _reindex(self):
+    '''
+    Rebuilds the file name -> (file row, entry row slice) index.
+    '''
+    self.qualityFlags = {}
+    entryFile = self.entries['entryFile']
+    starts = np.searchsorted(entryFile, np.arange(len(self.files['fileName'])), 'left')
+    stops = np.searchsorted(entryFile, np.arange(len(self.files['fileName'])), 'right')
+    self.index = {
+      name: (i, slice(start, stop))
+      for i, (name, start, stop) in enumerate(zip(self.files['fileName'], starts, stops))
+    }
+
+  def _parse(self, names):
+    '''
+    Parses the named logs. Returns a list of (name, stat, context, entries) for
+    every log that could be read.
+    '''
+    paths = [os.path.join(self.logDir, name) for name, _ in names]
+    if len(paths) >= parallelParseThreshold and self.workers != 1:
+      with ProcessPoolExecutor(self.workers) as pool:
+        results = list(pool.map(_tryReadJsonLog, paths, chunksize=32))
+    else:
+      results = [_tryReadJsonLog(path) for path in paths]
+
+    parsed = []
+    for (name, stat), result in zip(names, results):
+      if isinstance(result, str):
+        print(f'Could not read "{name}": {result}')
+        continue
+      parsed.append((name, stat, *result))
+    return parsed
+
+  def refresh(self):
+    '''
+    Brings the cache up to date with the log directory.
+    Returns True if anything changed.
+    '''
+    # Stat every log in the directory.
+    stats = {}
+    with os.scandir(self.logDir) as it:
+      for dirEntry in it:
+        if dirEntry.name.endswith('.json') and dirEntry.is_file():
+          stat = dirEntry.stat()
+          stats[dirEntry.name] = (stat.st_mtime_ns, stat.st_size)
+
+    # Find the cached files that are still up to date and the ones to parse.
+    cached = zip(self.files['fileName'], self.files['mtime'], self.files['size'])
+    keep = np.array([stats.get(name) == (mtime, size) for name, mtime, size in cached], dtype=bool)
+    kept = set(self.files['fileName'][keep])
+    stale = sorted((name, stat) for name, stat in stats.items() if name not in kept)
+    if keep.all() and not stale:
+      return False
+
+    parsed = self._parse(stale)
+
+    # Drop the out of date rows, renumbering the entries' file indices.
+    renumber = np.cumsum(keep) - 1
+    entryKeep = keep[self.entries['entryFile']]
+    files = {name: column[keep] for name, column in self.files.items()}
+    entries = {name: column[entryKeep] for name, column in self.entries.items()}
+    entries['entryFile'] = renumber[entries['entryFile']]
+
+    # Append the freshly parsed rows, NaN filling the numeric fields only some
+    # entries have.
+    first = len(files['fileName'])
+    newFiles = {name: [] for name in self.fileDtypes}
+    newEntries = []
+    for i, (name, (mtime, size), context, fileEntries) in enumerate(parsed):
+      newFiles['fileName'].append(name)
+      newFiles['mtime'].append(mtime)
+      newFiles['size'].append(size)
+      for field, value in context.items():
+        newFiles[field].append(value)
+      for entry in fileEntries:
+        newEntries.append(dict(entry, entryFile=first + i))
+
+    for name, dtype in self.fileDtypes.items():
+      column = np.array(newFiles[name], dtype=dtype)
+      files[name] = np.concatenate([files[name], column.reshape(-1, *files[name].shape[1:])])
+
+    fields = set(entries).union(*newEntries)
+    kept = len(entries['entryFile'])
+    for name in [*entries, *sorted(fields - set(entries))]:
+      dtype = self.entryDtypes.get(name, np.float64)
+      old = entries.get(name, np.full(kept, np.nan))
+      column = np.array([entry.get(name, math.nan) for entry in newEntries], dtype=dtype)
+      entries[name] = np.concatenate([old, column])
+
+    self.files = files
+    self.entries = entries
+    self._reindex()
+    return True
+
+  def update(self):
+    '''
+    Refreshes the cache and writes it to disk if anything changed.
+    Returns True if anything changed.
+    '''
+    changed = self.refresh()
+    if changed:
+      self.save()
+    return changed
+
+  def getQualityFlags(self, limits=None):
+    '''
+    Takes run quality limits (default runQualityLimits).
+    Returns a dict of reason -> boolean array over the cached files, True where
+    the file's run breaks the limit.
+    '''
+    limits = runQualityLimits if limits is None else limits
+    key = tuple(sorted(limits.items()))
+    if key in self.qualityFlags:
+      return self.qualityFlags[key]
+
+    # Per-entry checks, reduced to their files.
+    files = len(self.files['fileName'])
+    entryFile = self.entries['entryFile']
+    realTime = self.entries['real_time']
+    cpuTime = self.entries['cpu_time']
+    with np.errstate(divide='ignore', invalid='ignore'):
+      divergence = np.abs(realTime - cpuTime) / cpuTime
+    perFile = lambda flags: np.bincount(entryFile, flags, files) > 0
+
+    flags = {
+      'cs': perFile(self.entries['cs'] > limits['cs']),
+      'load_avg': self.files['load_avg'][:, 0] > limits['load_avg'],
+      'cpu_scaling': self.files['cpu_scaling_enabled'].copy(),
+      'time_divergence': perFile(divergence > limits['time_divergence']),
+    }
+    self.qualityFlags[key] = flags
+    return flags
+
+  def getRunQuality(self, logFile, limits=None):
+    '''
+    Takes a path to a json log file in this cache's directory.
+    Returns the list of reasons its run is noisy, empty for a clean run, or None
+    if the file is not cached.
+    '''
+    found = self.index.get(os.path.basename(logFile))
+    if found is None:
+      return None
+
+    i, _ = found
+    flags = self.getQualityFlags(limits)
+    return [reason for reason, flagged in flags.items() if flagged[i]]
+
+  def getContext(self, logFile):
+    '''
+    Takes a path to a json log file in this cache's directory.
+    Returns a dict of the file's run context, or None if it is not cached.
+    '''
+    found = self.index.get(os.path.basename(logFile))
+    if found is None:
+      return None
+
+    i, _ = found
+    return {name: self.files[name][i] for name in self.fileDtypes}
+
+  def getEntries(self, logFile):
+    '''
+    Takes a path to a json log file in this cache's directory.
+    Returns a dict of entry columns for the file, or None if it is not cached.
+    '''
+    found = self.index.get(os.path.basename(logFile))
+    if found is None:
+      return None
+
+    _, rows = found
+    return {name: column[rows] for name, column in self.entries.items()}
+
+# Open log caches, keyed by absolute log directory.
+_logCaches = {}
+
+def getLogCache(logDir, workers=None):
+  '''
+  Takes a log directory and optionally the number of worker processes used to
+  parse logs (None for one per CPU).
+  Returns the LogCache for the directory, building or updating it on first use
+  in this process.
+  '''
+  key = os.path.abspath(logDir)
+  if key not in _logCaches:
+    _logCaches[key] = LogCache(logDir, workers)
+  return _logCaches[key]
+
+def getRunQuality(logFile, limits=None):
+  '''
+  Takes a path to a json log file and optionally run quality limits.
+  Returns the list of reasons the file's run is noisy, empty for a clean run.
+  '''
+  logDir = os.path.dirname(logFile) or '.'
+  return getLogCache(logDir).getRunQuality(logFile, limits) or []
+
+def filterLogs(logPaths, limits=None):
+  '''
+  Takes a list of json log paths and optionally run quality limits.
+  Returns a tuple of (clean log paths, dict of excluded log path -> reasons).
+  '''
+  clean = []
+  excluded = {}
+  for logPath in logPaths:
+    reasons = getRunQuality(logPath, limits)
+    if reasons:
+      excluded[logPath] = reasons
+    else:
+      clean.append(logPath)
+  return (clean, excluded)
+
+# Log paths read while tracking log access, or None when not tracking.
+_trackedLogs = None
+
+def startLogTracking():
+  '''
+  Starts recording the path of every json log read.
+  '''
+  global _trackedLogs
+  _trackedLogs = set()
+
+def stopLogTracking():
+  '''
+  Stops recording log reads.
+  Returns the sorted list of log paths read since startLogTracking.
+  '''
+  global _trackedLogs
+  tracked = sorted(_trackedLogs or [])
+  _trackedLogs = None
+  return tracked
+
+def getJsonContext(logFile):
+  '''
+  Takes a path to a json log file.
+  Returns a dict of the cached run context of the file, or None if the file
+  does not exist.
+  '''
+  logDir = os.path.dirname(logFile) or '.'
+  return getLogCache(logDir).getContext(logFile)
+
+def getJsonEntries(logFile):
+  '''
+  Takes a path to a json log file.
+  Returns a dict of the cached entry columns for the file, or None if the file
+  does not exist.
+  '''
+  if _trackedLogs is not None:
+    _trackedLogs.add(os.path.normpath(logFile))
+
+  logDir = os.path.dirname(logFile) or '.'
+  return getLogCache(logDir).getEntries(logFile)
+
+# Dimensions of a benchmarked configuration, as encoded in its log name.
+#   type: element type, e.g. 'float' or 'i16'.
+#   m, d, n: kernel size, M x D x N.
+#   layout: ACC layout as (V, H), or None for the default layout (vdhd).
+#   order: access order of A, B and C, e.g. 'CRR'.
+#   opt: optimisation level, e.g. 'O3', or None for handwritten kernels.
+#   variant: 'mma', 'vector' or 'hand'.
+#   sink, merge: whether load sinking and merging were enabled.
+#   threads: threads running the kernel at once, each on its own copy of the
+#            matrices (Google Benchmark's ->Threads).
+LogConfig = namedtuple('LogConfig',
+  ['type', 'm', 'd', 'n', 'layout', 'order', 'opt', 'variant', 'sink', 'merge',
+   'threads'], defaults=[1])
+
+logNamePattern = re.compile(
+  r'^(?P<type>\w+)\.(?P<m>\d+)x(?P<d>\d+)x(?P<n>\d+)\.(?P<layout>vdhd|v\d+h\d+)\.'
+  r'(?P<order>[CR]{3})\.(?:(?P<opt>O\d)\.)?(?P<variant>bench|vector\.bench|hand)'
+  r'(?P<flags>(?:\.sink|\.merge|\.threads\d+)*)\.(?P<rep>\d+)\.json$')
+
+# Log name spelling of each variant.
+variantNames = {'mma': 'bench', 'vector': 'vector.bench', 'hand': 'hand'}
+
+# Benchmarks diffed to measure each variant, for variants whose logs hold an
+# overhead baseline next to the kernel.
+variantDiffBenches = {'hand': ('handMult', 'fnCall')}
+
+def configFieldExpression(config, field):
+  '''
+  Takes a LogConfig and an entry field.
+  Returns the metric expression measuring the field for the configuration's
+  kernel: the field itself, or for variants in variantDiffBenches, the first
+  benchmark's field less the second's.
+  '''
+  benches = variantDiffBenches.get(config.variant)
+  if benches is None:
+    return field
+  first, second = (f'entries[{bench!r}]' for bench in benches)
+  return f'{first}.{field} - {second}.{field}'
+
+def configMetrics(config):
+  '''
+  Takes a LogConfig.
+  Returns the metric expressions (see evalMetrics) measuring its (iterations,
+  cpu time, cycles).
+  '''
+  benches = variantDiffBenches.get(config.variant)
+  if benches is None:
+    return statMetrics
+  return diffMetrics(*benches)
+
+def parseLogName(name):
+  '''
+  Takes a json log file name.
+  Returns a tuple of (LogConfig, repetition index), or None if the name does
+  not follow the log naming scheme.
+  '''
+  match = logNamePattern.match(os.path.basename(name))
+  if match is None:
+    return None
+
+  # Decode the ACC layout.
+  layout = match['layout']
+  if layout == 'vdhd':
+    layout = None
+  else:
+    v, h = layout[1:].split('h')
+    layout = (int(v), int(h))
+
+  variant = {value: key for key, value in variantNames.items()}[match['variant']]
+  flags = match['flags'].split('.')
+  threads = [int(flag[len('threads'):]) for flag in flags if flag.startswith('threads')]
+
+  config = LogConfig(match['type'], int(match['m']), int(match['d']),
+    int(match['n']), layout, match['order'], match['opt'], variant,
+    'sink' in flags, 'merge' in flags, threads[-1] if threads else 1)
+  return (config, int(match['rep']))
+
+def configName(config):
+  '''
+  Takes a LogConfig.
+  Returns the configuration's name, i.e. its log name without the repetition.
+  This is also the name of the benchmark executable.
+  '''
+  layout = 'vdhd' if config.layout is None else 'v{}h{}'.format(*config.layout)
+  parts = [config.type, f'{config.m}x{config.d}x{config.n}', layout, config.order]
+  if config.opt is not None:
+    parts.append(config.opt)
+  parts.append(variantNames[config.variant])
+  if config.sink:
+    parts.append('sink')
+  if config.merge:
+    parts.append('merge')
+  if config.threads != 1:
+    parts.append(f'threads{config.threads}')
+  return '.'.join(parts)
+
+def formatLogName(config, rep):
+  '''
+  Takes a LogConfig and a repetition index.
+  Returns the json log file name for that repetition.
+  '''
+  return f'{configName(config)}.{rep}.json'
+
+class LogCatalog:
+  '''
+  Index of the configurations and repetitions present in a log directory.
+
+  Built once from the directory's LogCache, so selecting logs never probes the
+  file system.
+  '''
+  def __init__(self, logDir):
+    self.logDir = logDir
+
+    # Map each configuration to its {repetition: path}.
+    self.configs = {}
+    for name in sorted(getLogCache(logDir).index):
+      parsed = parseLogName(name)
+      if parsed is None:
+        continue
+      config, rep = parsed
+      self.configs.setdefault(config, {})[rep] = os.path.join(logDir, name)
+
+  def select(self, count=None, clean=False, **dims):
+    '''
+    Takes LogConfig dimensions to match, e.g. select(type='i16', layout=(2, 4)),
+    optionally a repetition count to only keep repetitions below it and whether
+    to drop noisy runs (see filterLogs). Multi-threaded configurations are
+    only selected when threads is given.
+    Returns a dict of LogConfig -> list of log paths ordered by repetition.
+    '''
+    unknown = set(dims) - set(LogConfig._fields)
+    assert not unknown, f'Unknown log dimensions: {unknown}'
+    dims.setdefault('threads', 1)
+
+    selected = {}
+    for config, reps in self.configs.items():
+      if all(getattr(config, dim) == value for dim, value in dims.items()):
+        selected[config] = [
+          reps[rep] for rep in sorted(reps) if count is None or rep < count
+        ]
+        if clean:
+          selected[config], _ = filterLogs(selected[config])
+    return selected
+
+  def selectOne(self, count=None, clean=False, **dims):
+    '''
+    As select, but the dimensions must match exactly one configuration.
+    Returns the list of log paths ordered by repetition.
+    '''
+    selected = self.select(count, clean, **dims)
+    assert len(selected) > 0, f'No logs match {dims}'
+    assert len(selected) == 1, \
+      f'Logs for more than one configuration match {dims}: ' \
+      f'{[configName(config) for config in selected]}'
+    return next(iter(selected.values()))
+
+# Open log catalogs, keyed by absolute log directory.
+_logCatalogs = {}
+
+def getLogCatalog(logDir=logDir):
+  '''
+  Takes a log directory.
+  Returns the LogCatalog for the directory, building it on first use.
+  '''
+  key = os.path.abspath(logDir)
+  if key not in _logCatalogs:
+    _logCatalogs[key] = LogCatalog(logDir)
+  return _logCatalogs[key]
+
+def reloadLogs(logDir=logDir):
+  '''
+  Takes a log directory.
+  Brings its LogCache up to date with logs written since it was loaded and
+  rebuilds its LogCatalog if anything changed.
+  Returns True if anything changed.
+  '''
+  changed = getLogCache(logDir).update()
+  if changed:
+    _logCatalogs.pop(os.path.abspath(logDir), None)
+  return changed
+
+def select(count=None, clean=False, **dims):
+  '''
+  LogCatalog.select on the default log directory.
+  '''
+  return getLogCatalog().select(count, clean, **dims)
+
+def selectOne(count=None, clean=False, **dims):
+  '''
+  LogCatalog.selectOne on the default log directory.
+  '''
+  return getLogCatalog().selectOne(count, clean, **dims)
+
+# Suffix Google Benchmark gives the names of entries run on several threads.
+threadSuffixPattern = re.compile(r'/threads:\d+$')
+
+def threadEntries(entries, threads=None):
+  '''
+  Takes a log's entries, as from getJsonEntries, and a thread count.
+  Returns the indices of the entries run at that thread count, or at the
+  lowest thread count in the log if threads is None.
+  '''
+  counts = entries.get('threads')
+  if counts is None:
+    counts = np.ones(len(entries['name']))
+  counts = np.nan_to_num(counts, nan=1)
+  if threads is None:
+    threads = counts.min() if len(counts) else 1
+  return np.flatnonzero(counts == threads)
+
+def getJsonStats(logFile, threads=None):
+  '''
+  Takes a path to a json log file and optionally the thread count whose entry
+  to read (default: the lowest in the log).
   Returns a tuple of (iterations, cpu time, cycles).
   '''
-  if not os.path.exists(logFile):
+  entries = getJsonEntries(logFile)
+  if entries is None:
     print(f'The file "{logFile}" does not exist.')
     print('Returning zeroes.')
     return (0, 0, 0)
 
-  with open(logFile, 'r') as f:
-    objects = json.load(f)
-
-  benchmarks = objects['benchmarks']
-  assert len(benchmarks) == 1, 'Too many benchmark entries'
-  benchmark = benchmarks[0]
+  selected = threadEntries(entries, threads)
+  assert len(selected) == 1, 'Too many benchmark entries'
+  entry, = selected
 
-  iterations = benchmark['iterations']
-  cycles = benchmark['CYCLES']
-  cpu_time = benchmark['cpu_time']
+  iterations = int(entries['iterations'][entry])
+  cycles = float(entries['CYCLES'][entry])
+  cpu_time = float(entries['cpu_time'][entry])
 
   return (iterations, cpu_time, cycles)
 
-def getJsonDiffStats(logFile, firstBenchName, secondBenchName):
+def getJsonDiffStats(logFile, firstBenchName, secondBenchName, threads=None):
   '''
-  Takes a path to a json log file and the name of two benchmarks for which the
-  difference in statistics should be returned
+  Takes a path to a json log file, the name of two benchmarks for which the
+  difference in statistics should be returned and optionally the thread count
+  whose entries to read (default: the lowest in the log).
   Returns a tuple of (iterations diff, cpu time diff, cycles diff).
   '''
   assert firstBenchName != secondBenchName, \
     'Benchmark diff names cannot be the same'
 
-  if not os.path.exists(logFile):
+  entries = getJsonEntries(logFile)
+  if entries is None:
     print(f'The file "{logFile}" does not exist.')
     print('Returning zeroes.')
     return (0, 0, 0)
 
-  with open(logFile, 'r') as f:
-    objects = json.load(f)
+  # Names of the entries run at the thread count, without their thread suffix.
+  selected = threadEntries(entries, threads)
+  names = [threadSuffixPattern.sub('', name) for name in entries['name'][selected]]
 
-  benchmarks = objects['benchmarks']
-  assert len(benchmarks) == 2, 'Too many benchmark entries'
+  # Verify benchmarks were found.
+  assert firstBenchName in names, 'First benchmark not found'
+  assert secondBenchName in names, 'Second benchmark not found'
+  assert len(names) == len(set(names)), 'Duplicate benchmark entries'
+  first = selected[names.index(firstBenchName)]
+  second = selected[names.index(secondBenchName)]
 
-  firstBench = None
-  secondBench = None
+  iterations = int(entries['iterations'][first])
+  cycles = float(entries['CYCLES'][first] - entries['CYCLES'][second])
+  cpu_time = float(entries['cpu_time'][first] - entries['cpu_time'][second])
 
-  # Check first benchmark.
-  if benchmarks[0]['name'] == firstBenchName:
-    firstBench = benchmarks[0]
-  elif benchmarks[0]['name'] == secondBenchName:
-    secondBench = benchmarks[0]
+  return (iterations, cpu_time, cycles)
 
-  # Check second benchmark.
-  if benchmarks[1]['name'] == firstBenchName:
-    firstBench = benchmarks[1]
-  elif benchmarks[1]['name'] == secondBenchName:
-    secondBench = benchmarks[1]
+# Metrics of getJsonStats: (iterations, cpu time, cycles) of a log's only entry.
+statMetrics = ['iterations', 'cpu_time', 'CYCLES']
 
-  # Verify benchmarks were found.
-  assert firstBench is not None, 'First benchmark not found'
-  assert secondBench is not None, 'Second benchmark not found'
+def diffMetrics(firstBench, secondBench):
+  '''
+  Takes the names of two benchmark entries.
+  Returns the metrics of getJsonDiffStats: the first entry's iterations and its
+  cpu time and cycles less the second entry's.
+  '''
+  first = f'entries[{firstBench!r}]'
+  second = f'entries[{secondBench!r}]'
+  return [
+    f'{first}.iterations',
+    f'{first}.cpu_time - {second}.cpu_time',
+    f'{first}.CYCLES - {second}.CYCLES',
+  ]
+
+# Functions callable in metric expressions.
+metricFunctions = {
+  'abs': np.abs,
+  'sqrt': np.sqrt,
+  'log': np.log,
+  'log2': np.log2,
+  'exp': np.exp,
+  'min': np.fmin,
+  'max': np.fmax,
+}
 
+# Operators usable in metric expressions.
+_metricOperators = {
+  ast.Add: np.add,
+  ast.Sub: np.subtract,
+  ast.Mult: np.multiply,
+  ast.Div: np.true_divide,
+  ast.Pow: np.power,
+  ast.USub: np.negative,
+  ast.UAdd: np.positive,
+}
 
-  iterations = firstBench['iterations']
-  cycles = firstBench['CYCLES'] - secondBench['CYCLES']
-  cpu_time = firstBench['cpu_time'] - secondBench['cpu_time']
+def getEntryTable(logPaths, threads=None):
+  '''
+  Takes a list of json log paths and optionally a thread count.
+  Only the entries each log ran at that thread count (default: the log's
+  lowest, see threadEntries) are kept, named without their /threads:n suffix.
+  Returns a tuple of (names, fields). names lists every benchmark entry name in
+  the logs, in the order first seen, and fields is a dict of field -> array
+  shaped (logs, entries), NaN where a log lacks the entry or the field.
+  Missing logs are all NaN.
+  '''
+  logEntries = []
+  for logPath in logPaths:
+    entries = getJsonEntries(logPath)
+    if entries is None:
+      print(f'The file "{logPath}" does not exist.')
+      print('Returning NaN.')
+    else:
+      selected = threadEntries(entries, threads)
+      entries = {field: column[selected] for field, column in entries.items()}
+      entries['name'] = [threadSuffixPattern.sub('', str(name)) for name in entries['name']]
+    logEntries.append(entries)
 
-  return (iterations, cpu_time, cycles)
+  found = [entries for entries in logEntries if entries is not None]
+  names = list(dict.fromkeys(name for entries in found for name in entries['name']))
+  fieldNames = dict.fromkeys(
+    field for entries in found for field in entries if field not in ('entryFile', 'name')
+  )
+  columns = {name: j for j, name in enumerate(names)}
+  fields = {field: np.full((len(logPaths), len(names)), np.nan) for field in fieldNames}
+  for i, entries in enumerate(logEntries):
+    if entries is None:
+      continue
+    entryColumns = [columns[name] for name in entries['name']]
+    for field in entries:
+      if field in fields:
+        fields[field][i, entryColumns] = entries[field]
 
-def getJsonCumulativeStats(fmtLogPath, count, confidence=0.95):
+  return (names, fields)
+
+def _metricEntry(node, names):
   '''
-  Takes a log path with containing a single formattable field for count.
+  Returns the column of the entry a metric expression node names, or None if
+  the node does not name an entry.
+  '''
+  if isinstance(node, ast.Name) and node.id in names:
+    return names.index(node.id)
+  if isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name) \
+      and node.value.id == 'entries':
+    key = node.slice
+    if not isinstance(key, ast.Constant):
+      raise ValueError('Entries must be indexed by a name or position')
+    if isinstance(key.value, str):
+      if key.value not in names:
+        raise ValueError(f'No benchmark entry "{key.value}"')
+      return names.index(key.value)
+    if not -len(names) <= key.value < len(names):
+      raise ValueError(f'No benchmark entry at position {key.value}')
+    return key.value % len(names)
+  return None
+
+def _evalMetric(node, names, fields, field, bench, variables):
   '''
-  # Holding place for data.
-  iterList = []
-  timeList = []
-  cycleList = []
+  Evaluates a metric expression node over every log at once.
+  Returns an array of one value per log, or a scalar for constants.
+  '''
+  evaluate = lambda child: _evalMetric(child, names, fields, field, bench, variables)
+
+  def column(fieldName, entry):
+    if fieldName not in fields:
+      raise ValueError(f'No field "{fieldName}" in the logs')
+    return fields[fieldName][:, entry]
+
+  if isinstance(node, ast.Expression):
+    return evaluate(node.body)
+  if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+    return float(node.value)
+  if isinstance(node, ast.BinOp) and type(node.op) in _metricOperators:
+    return _metricOperators[type(node.op)](evaluate(node.left), evaluate(node.right))
+  if isinstance(node, ast.UnaryOp) and type(node.op) in _metricOperators:
+    return _metricOperators[type(node.op)](evaluate(node.operand))
+  if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) \
+      and node.func.id in metricFunctions and not node.keywords:
+    return metricFunctions[node.func.id](*(evaluate(arg) for arg in node.args))
+  if isinstance(node, ast.Name) and node.id in variables:
+    return variables[node.id]
 
-  # Gather data.
-  for i in range(count):
-    logPath = fmtLogPath.format(i)
-    iterations, cpuTime, cycles = getJsonStats(logPath)
-    iterList.append(iterations)
-    timeList.append(cpuTime)
-    cycleList.append(cycles)
+  # Fields of a named entry: handMult.CYCLES or entries['BM/8'].CYCLES.
+  if isinstance(node, ast.Attribute):
+    entry = _metricEntry(node.value, names)
+    if entry is None:
+      raise ValueError(f'"{ast.unparse(node.value)}" is not a benchmark entry')
+    return column(node.attr, entry)
 
-  mean = lambda l: sum(l) / len(l)
-  def ci(l):
-    m = mean(l)
-    lower, upper = st.t.interval(confidence, len(l) - 1, loc=m, scale=st.sem(l))
-    return (m - lower, upper - m)
+  # An entry alone stands for its value of the default field.
+  entry = _metricEntry(node, names)
+  if entry is not None:
+    if field is None:
+      raise ValueError(f'No field given for entry "{ast.unparse(node)}"')
+    return column(field, entry)
 
-  iterResults = (mean(iterList), *ci(iterList))
-  timeResults = (mean(timeList), *ci(timeList))
-  cycleResults = (mean(cycleList), *ci(cycleList))
+  # A field alone is read from the default entry.
+  if isinstance(node, ast.Name) and node.id in fields:
+    if bench is not None:
+      if bench not in names:
+        raise ValueError(f'No benchmark entry "{bench}"')
+      return column(node.id, names.index(bench))
+    if len(names) != 1:
+      raise ValueError(f'Field "{node.id}" is ambiguous over entries {names}')
+    return column(node.id, 0)
+
+  raise ValueError(f'Cannot evaluate "{ast.unparse(node)}" in a metric')
+
+def evalMetrics(logPaths, metrics, field=None, bench=None, variables=None,
+                threads=None):
+  '''
+  Takes a list of json log paths and a list of metric expressions, optionally
+  the field an entry alone stands for, the entry a field alone is read from,
+  a dict of variable name -> value, either a number or an array with a value
+  per log, and the thread count whose entries to use (see getEntryTable).
+
+  A metric is an arithmetic expression (+, -, *, /, **, metricFunctions) over
+    - entry fields: handMult.CYCLES, entries['BM/8'].cpu_time, entries[0].cs,
+    - fields of the default entry: CYCLES / iterations, where the default is
+      bench or the logs' only entry,
+    - entries, standing for their value of field: handMult - fnCall,
+    - variables: ops / CYCLES.
+  Any numeric entry field in the logs can be used, counters included.
+
+  Returns an array shaped (logs, metrics), evaluated across every log at once
+  and NaN where a log lacks what a metric needs.
+  '''
+  names, fields = getEntryTable(logPaths, threads)
+  values = np.full((len(logPaths), len(metrics)), np.nan)
+  if not names:
+    return values
+
+  for j, metric in enumerate(metrics):
+    tree = ast.parse(metric, mode='eval')
+    values[:, j] = _evalMetric(tree, names, fields, field, bench, variables or {})
+  return values
+
+def batchStats(samples, mask=None, confidence=0.95):
+  '''
+  Takes an array of samples shaped (configurations, repetitions) or
+  (configurations, repetitions, metrics). Missing repetitions are marked either
+  by NaN samples or by False in mask, shaped (configurations, repetitions) or
+  like samples.
+
+  Returns a tuple of (means, standard errors, CI half-widths), each shaped
+  (configurations) or (configurations, metrics). The half-widths are those of
+  the Student-t interval, so each CI is mean +- half-width. Configurations with
+  fewer than two repetitions get NaN errors.
+  '''
+  samples = np.asarray(samples, dtype=np.float64)
+  valid = ~np.isnan(samples)
+  if mask is not None:
+    mask = np.asarray(mask, dtype=bool)
+    if mask.ndim < samples.ndim:
+      mask = mask[..., np.newaxis]
+    valid &= mask
+
+  with np.errstate(divide='ignore', invalid='ignore'):
+    # Means over the valid repetitions.
+    n = valid.sum(axis=1)
+    means = np.where(valid, samples, 0).sum(axis=1) / n
+
+    # Sample standard deviation and standard error.
+    deviations = np.where(valid, samples - np.expand_dims(means, 1), 0)
+    variances = (deviations ** 2).sum(axis=1) / (n - 1)
+    sems = np.sqrt(variances / n)
+
+    # Student-t half-widths.
+    halfWidths = st.t.ppf((1 + confidence) / 2, n - 1) * sems
+
+  return (means, sems, halfWidths)
+
+def _validSamples(samples, mask=None):
+  '''
+  Takes samples and a mask as batchStats.
+  Returns the samples with missing repetitions set to NaN.
+  '''
+  samples = np.array(samples, dtype=np.float64)
+  if mask is not None:
+    mask = np.asarray(mask, dtype=bool)
+    if mask.ndim < samples.ndim:
+      mask = mask[..., np.newaxis]
+    samples[~np.broadcast_to(mask, samples.shape)] = np.nan
+  return samples
 
-  return (iterResults, timeResults, cycleResults)
+# Resampled values held in memory at once by bootstrapStats.
+bootstrapChunkSize = 1 << 22
+
+def _sortedEstimates(sortedSamples, n, estimator, trim):
+  '''
+  Takes samples sorted along the last axis with missing (NaN) samples last, the
+  number of valid samples in each row, the estimator ('mean', 'median' or
+  'trimmed') and the proportion trimmed from each end by 'trimmed'.
+  Returns the estimate of each row.
+  '''
+  n = np.asarray(n)
+  if estimator == 'median':
+    low = np.take_along_axis(sortedSamples, np.expand_dims((n - 1) // 2, -1), -1)
+    high = np.take_along_axis(sortedSamples, np.expand_dims(n // 2, -1), -1)
+    return ((low + high) / 2)[..., 0]
+
+  # Means are trimmed means that trim nothing.
+  assert estimator in ('mean', 'trimmed'), f'Unknown estimator "{estimator}"'
+  cut = np.floor(trim * n).astype(np.int64) if estimator == 'trimmed' else np.zeros_like(n)
+  positions = np.arange(sortedSamples.shape[-1])
+  keep = (positions >= np.expand_dims(cut, -1)) & (positions < np.expand_dims(n - cut, -1))
+  return np.where(keep, sortedSamples, 0).sum(axis=-1) / (n - 2 * cut)
+
+def _rowQuantiles(sortedValues, q):
+  '''
+  Takes values sorted along the last axis and a quantile for each row.
+  Returns each row's linearly interpolated quantile.
+  '''
+  position = q * (sortedValues.shape[-1] - 1)
+  low = np.clip(np.floor(position).astype(np.int64), 0, sortedValues.shape[-1] - 1)
+  high = np.clip(low + 1, 0, sortedValues.shape[-1] - 1)
+  lowValues = np.take_along_axis(sortedValues, low[..., np.newaxis], -1)[..., 0]
+  highValues = np.take_along_axis(sortedValues, high[..., np.newaxis], -1)[..., 0]
+  return lowValues + (position - low) * (highValues - lowValues)
+
+def bootstrapStats(samples, mask=None, estimator='mean', interval='percentile',
+                   confidence=0.95, resamples=2000, trim=0.1, seed=0):
+  '''
+  Takes an array of samples shaped (configurations, repetitions) or
+  (configurations, repetitions, metrics), with missing repetitions marked as in
+  batchStats.
+
+  estimator is 'mean', 'median' or 'trimmed' (trimming trim of the samples
+  from each end) and interval is 'percentile' or 'bca' for a percentile or
+  bias-corrected and accelerated bootstrap CI. Every configuration and metric
+  is resampled at once as one (rows x resamples x repetitions) array.
+
+  Returns a tuple of (estimates, CI lower differences, CI upper differences),
+  each shaped (configurations) or (configurations, metrics), matching the
+  (mean, lower, upper) results of the other stats functions.
+  '''
+  assert interval in ('percentile', 'bca'), f'Unknown interval "{interval}"'
+  samples = _validSamples(samples, mask)
+
+  # Work on rows of (configuration, metric), sorted with missing samples last.
+  shape = (samples.shape[0], *samples.shape[2:])
+  reps = samples.shape[1]
+  rows = np.moveaxis(samples, 1, -1).reshape(-1, reps)
+  rows = np.sort(rows, axis=-1)
+  n = (~np.isnan(rows)).sum(axis=-1)
+
+  with np.errstate(divide='ignore', invalid='ignore'):
+    estimates = _sortedEstimates(rows, n, estimator, trim)
+
+    # Resample each row from its valid samples in chunks of rows.
+    rng = np.random.default_rng(seed)
+    bootEstimates = np.empty((len(rows), resamples))
+    chunkRows = max(1, bootstrapChunkSize // (resamples * max(reps, 1)))
+    for start in range(0, len(rows), chunkRows):
+      chunk = slice(start, start + chunkRows)
+      chunkN = n[chunk, np.newaxis, np.newaxis]
+      picks = (rng.random((len(rows[chunk]), resamples, reps)) * chunkN).astype(np.int64)
+      resampled = np.take_along_axis(rows[chunk, np.newaxis, :], picks, -1)
+      resampled[np.broadcast_to(np.arange(reps) >= chunkN, resampled.shape)] = np.nan
+      resampled.sort(axis=-1)
+      bootEstimates[chunk] = _sortedEstimates(resampled, n[chunk, np.newaxis], estimator, trim)
+    bootEstimates.sort(axis=-1)
+
+    alpha = (1 - confidence) / 2
+    qLower = np.full(len(rows), alpha)
+    qUpper = np.full(len(rows), 1 - alpha)
+    if interval == 'bca':
+      # Bias correction from the share of resamples below the estimate.
+      below = (bootEstimates < estimates[:, np.newaxis]).mean(axis=-1)
+      z0 = st.norm.ppf(below)
+
+      # Acceleration from the jackknife estimates, dropping each sample in turn.
+      jackRows = np.repeat(rows[:, np.newaxis, :], reps, axis=1)
+      jackRows[:, np.arange(reps), np.arange(reps)] = np.nan
+      jackRows.sort(axis=-1)
+      jackEstimates = _sortedEstimates(jackRows, (n - 1)[:, np.newaxis], estimator, trim)
+      jackValid = np.arange(reps) < n[:, np.newaxis]
+      jackMean = np.where(jackValid, jackEstimates, 0).sum(axis=-1) / n
+      jackDiffs = np.where(jackValid, jackMean[:, np.newaxis] - jackEstimates, 0)
+      accel = (jackDiffs ** 3).sum(axis=-1) / (6 * ((jackDiffs ** 2).sum(axis=-1)) ** 1.5)
+      accel = np.nan_to_num(accel)
+
+      def adjust(q):
+        z = z0 + st.norm.ppf(q)
+        return st.norm.cdf(z0 + z / (1 - accel * z))
+      qLower = adjust(qLower)
+      qUpper = adjust(qUpper)
+
+    lower = _rowQuantiles(bootEstimates, np.nan_to_num(qLower, nan=alpha))
+    upper = _rowQuantiles(bootEstimates, np.nan_to_num(qUpper, nan=1 - alpha))
+
+  # Rows with fewer than two samples have no interval.
+  lower[n < 2] = np.nan
+  upper[n < 2] = np.nan
+
+  return tuple(
+    values.reshape(shape)
+    for values in (estimates, estimates - lower, upper - estimates)
+  )
+
+def intervalStats(samples, mask=None, confidence=0.95, estimator='mean',
+                  interval='t', **bootstrapOptions):
+  '''
+  Takes samples as batchStats, the estimator ('mean', 'median' or 'trimmed')
+  and the interval ('t' for Student-t, or 'percentile' or 'bca' bootstrap).
+  Returns a tuple of (estimates, CI lower differences, CI upper differences).
+  '''
+  if interval == 't':
+    assert estimator == 'mean', 'Student-t intervals are only for means'
+    means, _, halfWidths = batchStats(samples, mask, confidence)
+    return (means, halfWidths, halfWidths)
+
+  return bootstrapStats(samples, mask, estimator, interval, confidence,
+                        **bootstrapOptions)
+
+def welchTest(first, second):
+  '''
+  Takes two sample arrays shaped as for batchStats, with the same number of
+  configurations, missing repetitions marked by NaN.
+  Returns a tuple of (t statistics, two-sided p-values, Hedges' g effect
+  sizes) of Welch's unequal variance t-test of every configuration, positive
+  where second has the larger mean.
+  '''
+  first = np.asarray(first, dtype=np.float64)
+  second = np.asarray(second, dtype=np.float64)
+  with np.errstate(divide='ignore', invalid='ignore'):
+    n1 = (~np.isnan(first)).sum(axis=1)
+    n2 = (~np.isnan(second)).sum(axis=1)
+    m1 = np.nanmean(first, axis=1)
+    m2 = np.nanmean(second, axis=1)
+    v1 = np.nanvar(first, axis=1, ddof=1)
+    v2 = np.nanvar(second, axis=1, ddof=1)
+
+    # Welch's t and the Welch-Satterthwaite degrees of freedom.
+    se1 = v1 / n1
+    se2 = v2 / n2
+    t = (m2 - m1) / np.sqrt(se1 + se2)
+    df = (se1 + se2) ** 2 / (se1 ** 2 / (n1 - 1) + se2 ** 2 / (n2 - 1))
+    p = 2 * st.t.sf(np.abs(t), df)
+
+    # Hedges' g from the pooled standard deviation.
+    pooled = np.sqrt(((n1 - 1) * v1 + (n2 - 1) * v2) / (n1 + n2 - 2))
+    correction = 1 - 3 / (4 * (n1 + n2) - 9)
+    g = correction * (m2 - m1) / pooled
+
+  return (t, p, g)
+
+def mannWhitneyTest(first, second):
+  '''
+  Takes two sample arrays as welchTest.
+  Returns a tuple of (U statistics of second, two-sided p-values, Cliff's
+  delta effect sizes) of the Mann-Whitney U test of every configuration, using
+  the tie-corrected normal approximation. Deltas are positive where second
+  tends to be larger.
+  '''
+  first = np.asarray(first, dtype=np.float64)
+  second = np.asarray(second, dtype=np.float64)
+  n1 = (~np.isnan(first)).sum(axis=1)
+  n2 = (~np.isnan(second)).sum(axis=1)
+  n = n1 + n2
+
+  # Rank both samples together. Missing samples get NaN ranks.
+  combined = np.concatenate([first, second], axis=1)
+  ranks = st.rankdata(combined, axis=1, nan_policy='omit')
+  rankSum2 = np.nansum(ranks[:, first.shape[1]:], axis=1)
+  u = rankSum2 - n2 * (n2 + 1) / 2
+
+  # Tie correction from the sizes of each group of tied values.
+  ordered = np.sort(combined, axis=1)
+  starts = np.ones_like(ordered, dtype=bool)
+  starts[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+  runIds = np.cumsum(starts, axis=1) - 1
+  runSizes = np.zeros_like(ordered)
+  np.add.at(runSizes, (np.arange(len(ordered))[:, np.newaxis], runIds),
+            ~np.isnan(ordered))
+  ties = (runSizes ** 3 - runSizes).sum(axis=1)
+
+  with np.errstate(divide='ignore', invalid='ignore'):
+    mean = n1 * n2 / 2
+    sd = np.sqrt(n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1))))
+    z = (np.abs(u - mean) - 0.5) / sd
+    p = np.minimum(1, 2 * st.norm.sf(z))
+    delta = 2 * u / (n1 * n2) - 1
+
+  return (u, p, delta)
+
+def _bootstrapMeans(rows, n, resamples, rng):
+  '''
+  Takes rows of samples sorted with missing (NaN) samples last and the number
+  of valid samples in each row.
+  Returns the means of resamples bootstrap resamples of each row, shaped
+  (rows, resamples).
+  '''
+  reps = rows.shape[-1]
+  means = np.empty((len(rows), resamples))
+  chunkRows = max(1, bootstrapChunkSize // (resamples * max(reps, 1)))
+  for start in range(0, len(rows), chunkRows):
+    chunk = slice(start, start + chunkRows)
+    chunkN = n[chunk, np.newaxis, np.newaxis]
+    picks = (rng.random((len(rows[chunk]), resamples, reps)) * chunkN).astype(np.int64)
+    resampled = np.take_along_axis(rows[chunk, np.newaxis, :], picks, -1)
+    keep = np.arange(reps) < chunkN
+    means[chunk] = np.where(keep, resampled, 0).sum(axis=-1) / chunkN[..., 0]
+  return means
+
+def speedupStats(baseline, candidate, confidence=0.95, interval='fieller',
+                 resamples=2000, seed=0):
+  '''
+  Takes two independent sample arrays of a cost such as cycles, shaped as for
+  batchStats with configurations matched by index, missing repetitions marked
+  by NaN, and the interval: 'fieller', 'delta' or 'bootstrap'.
+
+  The speedup of each candidate over its baseline is the ratio of their means,
+  baseline over candidate, so it is above one where the candidate is faster.
+  Fieller's interval inverts the t-test of baseline - speedup * candidate and
+  is unbounded (NaN) where the candidate mean is not significantly non-zero.
+  The delta method's interval is the ratio +- t times its linearised standard
+  error. Both use Welch-Satterthwaite degrees of freedom. The bootstrap
+  interval is the percentile interval of ratios of independently resampled
+  means.
+
+  Returns a tuple of (speedups, CI lower differences, CI upper differences),
+  each shaped (configurations) or (configurations, metrics).
+  '''
+  assert interval in ('fieller', 'delta', 'bootstrap'), \
+    f'Unknown interval "{interval}"'
+  baseline = np.asarray(baseline, dtype=np.float64)
+  candidate = np.asarray(candidate, dtype=np.float64)
+  assert baseline.shape[0] == candidate.shape[0], \
+    'Different number of baseline and candidate configurations'
+
+  with np.errstate(divide='ignore', invalid='ignore'):
+    nBase = (~np.isnan(baseline)).sum(axis=1)
+    nCand = (~np.isnan(candidate)).sum(axis=1)
+    meanBase = np.nanmean(baseline, axis=1)
+    meanCand = np.nanmean(candidate, axis=1)
+    speedups = meanBase / meanCand
+
+    if interval == 'bootstrap':
+      # Resample every row of both arrays at once and take the ratio quantiles.
+      rng = np.random.default_rng(seed)
+      def bootMeans(samples):
+        rows = np.sort(np.moveaxis(samples, 1, -1).reshape(-1, samples.shape[1]), axis=-1)
+        return _bootstrapMeans(rows, (~np.isnan(rows)).sum(axis=-1), resamples, rng)
+      ratios = np.sort(bootMeans(baseline) / bootMeans(candidate), axis=-1)
+      alpha = (1 - confidence) / 2
+      lower = _rowQuantiles(ratios, np.full(len(ratios), alpha)).reshape(speedups.shape)
+      upper = _rowQuantiles(ratios, np.full(len(ratios), 1 - alpha)).reshape(speedups.shape)
+    else:
+      # Squared standard errors of each mean.
+      varBase = np.nanvar(baseline, axis=1, ddof=1) / nBase
+      varCand = np.nanvar(candidate, axis=1, ddof=1) / nCand
+
+      # Welch-Satterthwaite degrees of freedom of baseline - speedup * candidate.
+      scaledCand = speedups ** 2 * varCand
+      df = (varBase + scaledCand) ** 2 / (
+        varBase ** 2 / (nBase - 1) + scaledCand ** 2 / (nCand - 1))
+      t = st.t.ppf((1 + confidence) / 2, df)
+
+      if interval == 'delta':
+        halfWidths = t * np.sqrt(varBase + scaledCand) / np.abs(meanCand)
+        lower = speedups - halfWidths
+        upper = speedups + halfWidths
+      else:
+        g = t ** 2 * varCand / meanCand ** 2
+        root = t / np.abs(meanCand) * np.sqrt(varBase * (1 - g) + scaledCand)
+        lower = np.where(g < 1, (speedups - root) / (1 - g), np.nan)
+        upper = np.where(g < 1, (speedups + root) / (1 - g), np.nan)
+
+  # Configurations with fewer than two samples on either side have no interval.
+  few = (nBase < 2) | (nCand < 2)
+  lower[few] = np.nan
+  upper[few] = np.nan
+  return (speedups, speedups - lower, upper - speedups)
+
+def pairedStats(baseline, candidate, confidence=0.95, interval='fieller'):
+  '''
+  Takes two sample arrays of a cost such as cycles, shaped as for batchStats
+  with configurations matched by index and repetitions matched by index, e.g.
+  from getPairedSamples, missing repetitions marked by NaN, and the speedup
+  interval: 'fieller' or 'delta'.
+
+  Only repetitions present in both arrays are used. Drift shared by a
+  repetition's baseline and candidate cancels in their difference, so the
+  intervals use the variance of the differences, or the covariance of the two,
+  rather than the sum of both variances as speedupStats. Both have n - 1
+  degrees of freedom for n pairs.
+
+  Returns a tuple of (differences, speedups), each a tuple of (values, CI
+  lower differences, CI upper differences) shaped (configurations) or
+  (configurations, metrics). Differences are baseline - candidate and speedups
+  baseline over candidate, as speedupStats, so both are positive or above one
+  where the candidate is faster.
+  '''
+  assert interval in ('fieller', 'delta'), f'Unknown interval "{interval}"'
+  baseline = np.asarray(baseline, dtype=np.float64)
+  candidate = np.asarray(candidate, dtype=np.float64)
+  assert baseline.shape == candidate.shape, \
+    'Baseline and candidate samples are not matched'
+
+  # Drop repetitions without a partner.
+  paired = ~np.isnan(baseline) & ~np.isnan(candidate)
+  baseline = np.where(paired, baseline, np.nan)
+  candidate = np.where(paired, candidate, np.nan)
+
+  with np.errstate(divide='ignore', invalid='ignore'):
+    n = paired.sum(axis=1)
+    t = st.t.ppf((1 + confidence) / 2, n - 1)
+
+    # Mean difference and its Student-t interval.
+    diffs = baseline - candidate
+    meanDiff = np.nanmean(diffs, axis=1)
+    diffWidths = t * np.sqrt(np.nanvar(diffs, axis=1, ddof=1) / n)
+
+    # Squared standard errors and covariance of the two means.
+    meanBase = np.nanmean(baseline, axis=1)
+    meanCand = np.nanmean(candidate, axis=1)
+    varBase = np.nanvar(baseline, axis=1, ddof=1) / n
+    varCand = np.nanvar(candidate, axis=1, ddof=1) / n
+    cov = np.nansum((baseline - np.expand_dims(meanBase, 1))
+                    * (candidate - np.expand_dims(meanCand, 1)), axis=1) / (n - 1) / n
+    speedups = meanBase / meanCand
+
+    if interval == 'delta':
+      halfWidths = t * np.sqrt(varBase - 2 * speedups * cov + speedups ** 2 * varCand) \
+        / np.abs(meanCand)
+      lower = speedups - halfWidths
+      upper = speedups + halfWidths
+    else:
+      # Roots of (meanBase - r * meanCand)^2 = t^2 * var(meanBase - r * meanCand).
+      q = t ** 2
+      a = meanCand ** 2 - q * varCand
+      b = meanBase * meanCand - q * cov
+      c = meanBase ** 2 - q * varBase
+      root = np.sqrt(b ** 2 - a * c)
+      bounded = a > 0
+      lower = np.where(bounded, (b - root) / a, np.nan)
+      upper = np.where(bounded, (b + root) / a, np.nan)
+
+  # Configurations with fewer than two pairs have no interval.
+  few = n < 2
+  diffWidths[few] = np.nan
+  lower[few] = np.nan
+  upper[few] = np.nan
+  return ((meanDiff, diffWidths, diffWidths),
+          (speedups, speedups - lower, upper - speedups))
+
+def adjustPValues(p, method='holm'):
+  '''
+  Takes an array of p-values and a multiple comparison correction: 'holm'
+  (Holm-Bonferroni, family-wise error rate) or 'bh' (Benjamini-Hochberg,
+  false discovery rate). NaN p-values are left out of the family.
+  Returns the adjusted p-values, shaped as p.
+  '''
+  assert method in ('holm', 'bh'), f'Unknown correction "{method}"'
+  p = np.asarray(p, dtype=np.float64)
+  flat = p.ravel()
+  valid = np.flatnonzero(~np.isnan(flat))
+  m = len(valid)
+  order = valid[np.argsort(flat[valid], kind='stable')]
+  ranked = flat[order]
+
+  if method == 'holm':
+    adjusted = np.maximum.accumulate((m - np.arange(m)) * ranked)
+  else:
+    adjusted = np.minimum.accumulate((m / np.arange(m, 0, -1) * ranked[::-1]))[::-1]
+
+  result = np.full_like(flat, np.nan)
+  result[order] = np.minimum(adjusted, 1)
+  return result.reshape(p.shape)
+
+class RunningStats:
+  '''
+  Welford accumulator of the running mean and variance of a vector of metrics,
+  updated one repetition at a time.
+  '''
+  def __init__(self, metricCount):
+    self.n = 0
+    self.mean = np.zeros(metricCount)
+    self.m2 = np.zeros(metricCount)
+
+  def add(self, sample):
+    '''
+    Takes one repetition's metrics and folds them into the running stats.
+    '''
+    sample = np.asarray(sample, dtype=np.float64)
+    self.n += 1
+    delta = sample - self.mean
+    self.mean += delta / self.n
+    self.m2 += delta * (sample - self.mean)
+
+  def variance(self):
+    '''
+    Returns the sample variance of each metric, NaN with fewer than two samples.
+    '''
+    if self.n < 2:
+      return np.full_like(self.mean, np.nan)
+    return self.m2 / (self.n - 1)
+
+  def sem(self):
+    '''
+    Returns the standard error of each metric's mean.
+    '''
+    return np.sqrt(self.variance() / max(self.n, 1))
+
+  def halfWidth(self, confidence=0.95):
+    '''
+    Returns the Student-t CI half-width of each metric's mean, as batchStats.
+    '''
+    if self.n < 2:
+      return np.full_like(self.mean, np.nan)
+    return st.t.ppf((1 + confidence) / 2, self.n - 1) * self.sem()
+
+def _statsResults(estimates, lowers, uppers):
+  '''
+  Takes the estimates and CI differences of the (iterations, cpu time, cycles)
+  metrics of one configuration.
+  Returns a tuple of (iterations, cpu time, cycles) results, each of which is a
+  tuple of (mean, CI lower difference, CI upper difference).
+  '''
+  return tuple(
+    (float(estimate), float(lower), float(upper))
+    for estimate, lower, upper in zip(estimates, lowers, uppers)
+  )
+
+def _cumulativeStats(statList, confidence, estimator='mean', interval='t'):
+  '''
+  Takes a list of per-log metric tuples, e.g. (iterations, cpu time, cycles).
+  Returns a tuple with a result per metric, each of which is a tuple of
+  (mean, CI lower difference, CI upper difference).
+  '''
+  results = intervalStats([statList], confidence=confidence,
+                          estimator=estimator, interval=interval)
+  return _statsResults(*(values[0] for values in results))
+
+def getJsonListMetricStats(logPaths, metrics, confidence=0.95, field=None,
+                           bench=None, variables=None, estimator='mean',
+                           interval='t', threads=None):
+  '''
+  Takes a list of json log paths, a list of metric expressions and optionally
+  their default field, entry, variables and thread count (see evalMetrics) and
+  the estimator and interval to use (see intervalStats).
+  Returns a tuple with a result per metric, each of which is a tuple of
+  (mean, CI lower difference, CI upper difference). Logs missing a metric's
+  inputs are left out of its stats.
+  '''
+  assert len(logPaths) > 0, 'No logs to gather stats from'
+  samples = evalMetrics(logPaths, metrics, field, bench, variables, threads)
+  return _cumulativeStats(samples, confidence, estimator, interval)
+
+def getJsonListStats(logPaths, confidence=0.95, estimator='mean', interval='t'):
+  '''
+  Takes a list of json log paths, e.g. from selectOne, and optionally the
+  estimator and interval to use (see intervalStats).
+  Returns a tuple of (iterations, cpu time, cycles) results, each of which is a
+  tuple of (mean, CI lower difference, CI upper difference).
+  '''
+  return getJsonListMetricStats(logPaths, statMetrics, confidence,
+                                estimator=estimator, interval=interval)
+
+def getJsonListDiffStats(logPaths, firstBench, secondBench, confidence=0.95,
+                         estimator='mean', interval='t'):
+  '''
+  As getJsonListStats, but gathers getJsonDiffStats for the two benchmarks.
+  '''
+  return getJsonListMetricStats(logPaths, diffMetrics(firstBench, secondBench),
+                                confidence, estimator=estimator, interval=interval)
+
+def getJsonCumulativeStats(fmtLogPath, count, confidence=0.95):
+  '''
+  Takes a log path with containing a single formattable field for count.
+  '''
+  logPaths = [fmtLogPath.format(i) for i in range(count)]
+  return getJsonListStats(logPaths, confidence)
 
 def getJsonCumDiffStats(fmtLogPath, count, firstBench, secondBench, confidence=0.95):
   '''
   Takes a log path with containing a single formattable field for count.
 
   Differs from getJsonCumulativeStats only in that it calls getJsonDiffStats
-  instead of getJsonStats. Probably a better way to factor this.
+  instead of getJsonStats.
   '''
-  # Holding place for data.
-  iterList = []
-  timeList = []
-  cycleList = []
+  logPaths = [fmtLogPath.format(i) for i in range(count)]
+  return getJsonListDiffStats(logPaths, firstBench, secondBench, confidence)
 
-  # Gather data.
-  for i in range(count):
-    logPath = fmtLogPath.format(i)
-    iterations, cpuTime, cycles = getJsonDiffStats(logPath, firstBench, secondBench)
-    iterList.append(iterations)
-    timeList.append(cpuTime)
-    cycleList.append(cycles)
+def getJsonCumulativeStatsBatch(requests, confidence=0.95, workers=None):
+  '''
+  Takes a list of requests, each either (fmtLogPath, count) as for
+  getJsonCumulativeStats or (fmtLogPath, count, firstBench, secondBench) as for
+  getJsonCumDiffStats, and optionally the number of worker processes.
 
-  mean = lambda l: sum(l) / len(l)
-  def ci(l):
-    m = mean(l)
-    lower, upper = st.t.interval(confidence, len(l) - 1, loc=m, scale=st.sem(l))
-    return (m - lower, upper - m)
+  Every log directory involved is loaded up front, parsing all uncached logs
+  concurrently, before any statistics are gathered.
+  Returns the per-request results, in request order.
+  '''
+  # Load every log directory, parsing the stale logs in parallel.
+  logDirs = {os.path.dirname(request[0]) or '.' for request in requests}
+  for requestDir in sorted(logDirs):
+    getLogCache(requestDir, workers)
 
-  iterResults = (mean(iterList), *ci(iterList))
-  timeResults = (mean(timeList), *ci(timeList))
-  cycleResults = (mean(cycleList), *ci(cycleList))
+  # Gather every request's samples into one (requests, repetitions, metrics)
+  # array, padding with NaN.
+  samples = np.full((len(requests), max((r[1] for r in requests), default=0), 3), np.nan)
+  for i, (fmtLogPath, count, *benches) in enumerate(requests):
+    logPaths = [fmtLogPath.format(c) for c in range(count)]
+    metrics = diffMetrics(*benches) if benches else statMetrics
+    samples[i, :count] = evalMetrics(logPaths, metrics)
 
-  return (iterResults, timeResults, cycleResults)
+  # Compute every request's stats at once.
+  means, _, halfWidths = batchStats(samples, confidence=confidence)
+  return [_statsResults(m, h, h) for m, h in zip(means, halfWidths)]
 
-def plotGroupedData(ax, groupLabels, barLabels, bars, errs):
+def getConfigStats(config, logPaths, confidence=0.95, **statOptions):
+  '''
+  Takes a LogConfig and the list of its json log paths.
+  Returns getJsonListStats for the logs, or getJsonListDiffStats for variants
+  in variantDiffBenches.
+  '''
+  return getJsonListMetricStats(logPaths, configMetrics(config), confidence,
+                                **statOptions)
+
+# Outer products issued per cycle and output elements each one updates.
+mmaGersPerCycle = 2
+accElements = 16
+
+def peakOpsPerCycle(type):
+  '''
+  Takes an element type from types.
+  Returns the operations (multiplies and adds) per cycle at the MMA peak.
+  '''
+  _, (_, rank) = types[type]
+  return 2 * accElements * rank * mmaGersPerCycle
+
+# Names of the (iterations, cpu time, cycles) metrics of configMetrics.
+statNames = ['iterations', 'cpuTime', 'cycles']
+
+# Throughput metrics, as expressions over a configuration's cycles and the
+# variables of configVariables.
+#   opsPerCycle: multiplies and adds per cycle.
+#   gops: billions of operations per second at the clock the run recorded.
+#   peakFraction: fraction of the MMA peak operations per cycle.
+throughputMetrics = {
+  'opsPerCycle': 'ops / ({cycles})',
+  'gops': 'ops / ({cycles}) * mhz / 1000',
+  'peakFraction': 'ops / ({cycles}) / peakOps',
+}
+
+# Metrics derived from PMU counters (see benchRunner.py's --perf-counters), as
+# expressions over the {fields} of a configuration's kernel (see
+# configFieldExpression), named as fieldName names the events.
+#   ipc: instructions per cycle.
+#   l1dMpki: L1 data cache load misses per thousand instructions.
+#   branchMpki: branch misses per thousand instructions.
+counterMetrics = {
+  'ipc': '{INSTRUCTIONS} / {CYCLES}',
+  'l1dMpki': '1000 * {L1_DCACHE_LOAD_MISSES} / {INSTRUCTIONS}',
+  'branchMpki': '1000 * {BRANCH_MISSES} / {INSTRUCTIONS}',
+}
+
+# Axis and table label and table format of every named metric.
+metricLabels = {
+  'iterations': '$n$',
+  'cpuTime': 'CPU Time (\\SI{}{\\textit{\\nano\\second}})',
+  'cycles': 'Cycles',
+  'opsPerCycle': 'Operations per Cycle',
+  'gops': 'GOPS',
+  'peakFraction': 'Fraction of MMA Peak',
+  'speedup': 'Speedup',
+  'ipc': 'Instructions per Cycle',
+  'l1dMpki': 'L1D Misses per 1000 Instructions',
+  'branchMpki': 'Branch Misses per 1000 Instructions',
+}
+metricFormats = {
+  'cycles': '0.2f',
+  'opsPerCycle': '0.2f',
+  'gops': '0.2f',
+  'peakFraction': '0.3f',
+  'speedup': '0.3f',
+  'ipc': '0.3f',
+  'l1dMpki': '0.2f',
+  'branchMpki': '0.2f',
+}
+
+def configVariables(config, logPaths):
+  '''
+  Takes a LogConfig and the list of its json log paths.
+  Returns the variables of its throughput metrics: ops, the operations of one
+  kernel call, peakOps, the peak operations per cycle, and mhz, the clock of
+  each log's run.
+  '''
+  mhz = np.full(len(logPaths), np.nan)
+  for i, logPath in enumerate(logPaths):
+    context = getJsonContext(logPath)
+    if context is not None and context['mhz_per_cpu'] > 0:
+      mhz[i] = context['mhz_per_cpu']
+  return {
+    'ops': 2 * config.m * config.d * config.n,
+    'peakOps': peakOpsPerCycle(config.type),
+    'mhz': mhz,
+  }
+
+def configMetricExpressions(config, metrics):
+  '''
+  Takes a LogConfig and a list of metric names from statNames,
+  throughputMetrics and counterMetrics.
+  Returns the metric expressions measuring them for the configuration.
+  '''
+  expressions = dict(zip(statNames, configMetrics(config)))
+  for name, expression in throughputMetrics.items():
+    expressions[name] = expression.format(cycles=expressions['cycles'])
+  for name, expression in counterMetrics.items():
+    expressions[name] = re.sub(
+      r'\{(\w+)\}', lambda field: f'({configFieldExpression(config, field[1])})',
+      expression)
+  return [expressions[metric] for metric in metrics]
+
+def getConfigMetricStats(config, logPaths, metrics, confidence=0.95, **statOptions):
+  '''
+  Takes a LogConfig, the list of its json log paths and a list of metric names
+  from statNames, throughputMetrics and counterMetrics.
+  Returns a tuple with a result per metric, each of which is a tuple of
+  (mean, CI lower difference, CI upper difference).
+  '''
+  return getJsonListMetricStats(logPaths, configMetricExpressions(config, metrics),
+                                confidence, variables=configVariables(config, logPaths),
+                                **statOptions)
+
+def getJsonListThroughputStats(logPaths, confidence=0.95, **statOptions):
+  '''
+  Takes a list of json log paths of one configuration, e.g. from selectOne.
+  Returns a tuple of (operations per cycle, GOPS, fraction of MMA peak)
+  results, each of which is a tuple of (mean, CI lower difference, CI upper
+  difference).
+  '''
+  assert len(logPaths) > 0, 'No logs to gather stats from'
+  config, _ = parseLogName(logPaths[0])
+  return getConfigMetricStats(config, logPaths, list(throughputMetrics),
+                              confidence, **statOptions)
+
+def getConfigSamples(configs, count=None, logDir=logDir, threads=None):
+  '''
+  Takes a list of LogConfigs, optionally a repetition count to only keep
+  repetitions below it, the log directory and the thread count whose entries
+  to use (see getEntryTable).
+  Returns an array of (iterations, cpu time, cycles) samples shaped
+  (configurations, repetitions, 3), indexed by repetition index and NaN where
+  a repetition is missing. Variants in variantDiffBenches are measured as the
+  difference of their two benchmarks.
+  '''
+  catalog = getLogCatalog(logDir)
+  reps = [catalog.configs.get(config, {}) for config in configs]
+  repCount = max((max(r) + 1 for r in reps if r), default=0)
+  if count is not None:
+    repCount = min(repCount, count)
+
+  samples = np.full((len(configs), repCount, 3), np.nan)
+  for i, (config, configReps) in enumerate(zip(configs, reps)):
+    kept = sorted(rep for rep in configReps if rep < repCount)
+    if kept:
+      logPaths = [configReps[rep] for rep in kept]
+      samples[i, kept] = evalMetrics(logPaths, configMetrics(config), threads=threads)
+  return samples
+
+def matchConfigs(baselineDims, candidateDims, logDir=logDir, **dims):
+  '''
+  Takes the LogConfig dimensions selecting the baseline configurations, the
+  dimensions turning a baseline into its candidate, e.g. matchConfigs(
+  dict(variant='vector', order='CCC'), dict(variant='mma', order='CRR')), and
+  optionally dimensions both must match.
+  Returns a list of (baseline, candidate) LogConfig pairs, one for every
+  baseline whose candidate has logs, ordered by baseline name.
+  '''
+  catalog = getLogCatalog(logDir)
+  pairs = []
+  for baseline in sorted(catalog.select(**baselineDims, **dims), key=configName):
+    candidate = baseline._replace(**candidateDims)
+    if candidate in catalog.configs:
+      pairs.append((baseline, candidate))
+  return pairs
+
+def getConfigSpeedups(pairs, count=None, logDir=logDir, metric='cycles',
+                      confidence=0.95, interval='fieller', **speedupOptions):
+  '''
+  Takes a list of (baseline, candidate) LogConfig pairs, e.g. from
+  matchConfigs, optionally a repetition count as getConfigSamples, and the
+  cost metric from statNames to compare.
+  Returns a tuple of (speedups, CI lower differences, CI upper differences)
+  of every candidate over its baseline, shaped (pairs), from speedupStats.
+  '''
+  baselines, candidates = zip(*pairs) if pairs else ((), ())
+  samples = getConfigSamples(list(baselines) + list(candidates), count, logDir)
+  samples = samples[..., statNames.index(metric)]
+  return speedupStats(samples[:len(pairs)], samples[len(pairs):], confidence,
+                      interval, **speedupOptions)
+
+def contextTimestamp(date):
+  '''
+  Takes a Google Benchmark context date.
+  Returns it as seconds since the epoch, or NaN if it cannot be parsed.
+  '''
+  try:
+    return datetime.datetime.fromisoformat(str(date)).timestamp()
+  except ValueError:
+    return np.nan
+
+def getConfigTimestamps(configs, count=None, logDir=logDir):
+  '''
+  Takes a list of LogConfigs and optionally a repetition count as
+  getConfigSamples.
+  Returns an array of the context date of every repetition as seconds since
+  the epoch, shaped (configurations, repetitions) as getConfigSamples and NaN
+  where a repetition is missing or its date cannot be parsed.
+  '''
+  catalog = getLogCatalog(logDir)
+  reps = [catalog.configs.get(config, {}) for config in configs]
+  repCount = max((max(r) + 1 for r in reps if r), default=0)
+  if count is not None:
+    repCount = min(repCount, count)
+
+  timestamps = np.full((len(configs), repCount), np.nan)
+  for i, configReps in enumerate(reps):
+    for rep, logPath in configReps.items():
+      context = getJsonContext(logPath) if rep < repCount else None
+      if context is not None:
+        timestamps[i, rep] = contextTimestamp(context['date'])
+  return timestamps
+
+def completeBlocks(samples, timestamps, maxGap=None):
+  '''
+  Takes samples shaped as getConfigSamples of configurations compared as one
+  block design, each repetition index a block, their timestamps from
+  getConfigTimestamps and optionally the most seconds a block's runs may lie
+  apart.
+  Returns a mask shaped (repetitions) of the blocks every configuration has a
+  run in, with those runs within maxGap of each other. Runs whose date cannot
+  be parsed are matched by index alone.
+  '''
+  samples = np.asarray(samples, dtype=np.float64)
+  complete = ~np.isnan(samples.reshape(*samples.shape[:2], -1)).all(axis=-1)
+  complete = complete.all(axis=0)
+  if maxGap is not None and timestamps.size:
+    dated = ~np.isnan(timestamps)
+    spread = (np.where(dated, timestamps, -np.inf).max(axis=0)
+              - np.where(dated, timestamps, np.inf).min(axis=0))
+    complete &= ~(spread > maxGap)
+  return complete
+
+def getPairedSamples(configs, count=None, logDir=logDir, maxGap=None, threads=None):
+  '''
+  Takes a list of two or more LogConfigs to compare, optionally a repetition
+  count and thread count as getConfigSamples and the most seconds apart the
+  runs of one repetition index may be (see completeBlocks).
+
+  Repetition c of every configuration is run in the same pass of a campaign,
+  so drift of the machine's state is shared by the runs of each repetition
+  index. Keeping only the repetitions every configuration has lets that drift
+  cancel in pairedStats.
+
+  Returns samples as getConfigSamples, NaN in every configuration where a
+  repetition is not a complete block.
+  '''
+  samples = getConfigSamples(configs, count, logDir, threads)
+  timestamps = getConfigTimestamps(configs, count, logDir)
+  samples[:, ~completeBlocks(samples, timestamps, maxGap)] = np.nan
+  return samples
+
+def getPairedStats(pairs, count=None, logDir=logDir, metric='cycles',
+                   confidence=0.95, interval='fieller', maxGap=None):
+  '''
+  Takes a list of (baseline, candidate) LogConfig pairs, e.g. from
+  matchConfigs, optionally a repetition count as getConfigSamples, the cost
+  metric from statNames to compare and the most seconds apart a pair's runs
+  may be (see completeBlocks).
+  Matches each pair's repetitions as getPairedSamples.
+  Returns a tuple of (differences, speedups, pair counts) of every candidate
+  over its baseline, differences and speedups from pairedStats shaped (pairs).
+  '''
+  baselines, candidates = zip(*pairs) if pairs else ((), ())
+  configs = list(baselines) + list(candidates)
+  samples = getConfigSamples(configs, count, logDir)[..., statNames.index(metric)]
+  timestamps = getConfigTimestamps(configs, count, logDir)
+
+  # Keep the complete blocks of each pair.
+  baseSamples = samples[:len(pairs)]
+  candSamples = samples[len(pairs):]
+  for i in range(len(pairs)):
+    block = [i, len(pairs) + i]
+    complete = completeBlocks(samples[block], timestamps[block], maxGap)
+    baseSamples[i, ~complete] = np.nan
+    candSamples[i, ~complete] = np.nan
+
+  differences, speedups = pairedStats(baseSamples, candSamples, confidence, interval)
+  counts = (~np.isnan(baseSamples)).sum(axis=1)
+  return (differences, speedups, counts)
+
+def configThreadCounts(config, logDir=logDir):
+  '''
+  Takes a LogConfig.
+  Returns the sorted thread counts it was run at: those of the configurations
+  differing from it only in threads, and those the entries of its
+  single-threaded logs ran at.
+  '''
+  catalog = getLogCatalog(logDir)
+  base = config._replace(threads=1)
+  counts = {other.threads for other in catalog.configs if other._replace(threads=1) == base}
+  for logPath in catalog.configs.get(base, {}).values():
+    entries = getJsonEntries(logPath)
+    if entries is not None and 'threads' in entries:
+      counts.update(int(threads) for threads in entries['threads'] if not np.isnan(threads))
+  return sorted(counts)
+
+def threadSamples(config, threadCounts, count=None, logDir=logDir):
+  '''
+  Takes a LogConfig, a list of thread counts and optionally a repetition count
+  as getConfigSamples.
+  Returns samples as getConfigSamples shaped (thread counts, repetitions, 3).
+  Each thread count is read from the logs of the configuration run at that
+  count if there are any, otherwise from the entries the single-threaded
+  configuration's logs ran at that count.
+  '''
+  catalog = getLogCatalog(logDir)
+  rows = []
+  for threads in threadCounts:
+    threaded = config._replace(threads=threads)
+    if threaded in catalog.configs:
+      rows.append(getConfigSamples([threaded], count, logDir)[0])
+    else:
+      rows.append(getConfigSamples([config._replace(threads=1)], count, logDir, threads)[0])
+
+  samples = np.full((len(rows), max((len(row) for row in rows), default=0), 3), np.nan)
+  for i, row in enumerate(rows):
+    samples[i, :len(row)] = row
+  return samples
+
+def threadScalingStats(samples, threadCounts, confidence=0.95, interval='fieller',
+                       **speedupOptions):
+  '''
+  Takes samples of a cost such as cycles shaped (thread counts, repetitions),
+  e.g. a metric of threadSamples, and the thread count of each row. The first
+  row is the reference, normally one thread.
+
+  Every thread runs the kernel on its own matrices, so throughput is threads
+  over cycles. The speedup of each count is its throughput over the
+  reference's, with intervals as speedupStats, and the efficiency is the
+  speedup per thread added, one for perfect scaling.
+
+  Returns a tuple of (speedups, efficiencies), each a tuple of (values, CI
+  lower differences, CI upper differences) shaped (thread counts).
+  '''
+  samples = np.asarray(samples, dtype=np.float64)
+  scale = np.asarray(threadCounts, dtype=np.float64) / threadCounts[0]
+  reference = np.broadcast_to(samples[:1], samples.shape)
+  speedups, lower, upper = speedupStats(reference, samples / scale[:, np.newaxis],
+                                        confidence, interval, **speedupOptions)
+
+  # The reference is exactly one.
+  lower[0] = upper[0] = 0
+  speedups = (speedups, lower, upper)
+  return (speedups, tuple(values / scale for values in speedups))
+
+def repsNeeded(samples, mask=None, target=0.01, confidence=0.95, maxReps=1000):
+  '''
+  Takes samples as batchStats and a target CI half-width relative to the mean.
+  Assuming the variance stays as measured, finds the smallest repetition count
+  whose Student-t half-width meets the target.
+  Returns a tuple of (current counts, needed counts, relative half-widths).
+  Needed counts are the current count where the target is already met, even
+  past maxReps, and -1 where it cannot be met within maxReps.
+  '''
+  means, sems, halfWidths = batchStats(samples, mask, confidence)
+  samples = np.asarray(samples, dtype=np.float64)
+  valid = ~np.isnan(samples)
+  if mask is not None:
+    mask = np.asarray(mask, dtype=bool)
+    valid &= mask[..., np.newaxis] if mask.ndim < samples.ndim else mask
+  n = valid.sum(axis=1)
+
+  with np.errstate(divide='ignore', invalid='ignore'):
+    relWidths = halfWidths / np.abs(means)
+
+    # Half-widths at every candidate count: t(k - 1) * sd / sqrt(k).
+    sds = sems * np.sqrt(n)
+    candidates = np.arange(2, maxReps + 1)
+    tValues = st.t.ppf((1 + confidence) / 2, candidates - 1)
+    candidateWidths = (
+      np.expand_dims(sds / np.abs(means), -1) * tValues / np.sqrt(candidates)
+    )
+
+  # First candidate meeting the target, never fewer than we already have.
+  meets = (candidateWidths <= target) & (candidates >= np.expand_dims(n, -1))
+  needed = np.where(meets.any(axis=-1), candidates[meets.argmax(axis=-1)], -1)
+  needed = np.where((n >= 2) & (relWidths <= target), n, needed)
+  return (n, np.where(n < 2, 2, needed), relWidths)
+
+class ResultStore:
+  '''
+  Struct-of-arrays store of every repetition in a log directory: one record
+  per log, with fixed-width dimension codes and float64 metric columns.
+
+  The store is kept next to the log directory (logs/all -> logs/all.store/),
+  one .npy file per column plus the vocabulary of the categorical dimensions,
+  and loaded memory-mapped. Queries and aggregations work on whole columns,
+  so they never build per-run Python objects and only touch the pages they
+  read.
+  '''
+  # Dimension columns and their dtypes. Categorical dimensions hold codes into
+  # the store's vocabulary and layouts are split into v and h, 0 for the
+  # default layout.
+  dimDtypes = {
+    'type': np.uint8,
+    'm': np.int32,
+    'd': np.int32,
+    'n': np.int32,
+    'v': np.int8,
+    'h': np.int8,
+    'order': np.uint8,
+    'opt': np.uint8,
+    'variant': np.uint8,
+    'sink': np.bool_,
+    'merge': np.bool_,
+    'threads': np.int16,
+    'rep': np.int32,
+    'clean': np.bool_,
+  }
+  categoricalDims = ['type', 'order', 'opt', 'variant']
+
+  # Version of the store's layout. Stores of other versions are rebuilt.
+  version = 4
+
+  # Metric columns, as in statNames and counterMetrics. Counter metrics are NaN
+  # for logs without the counters.
+  metricNames = statNames + list(counterMetrics)
+
+  def __init__(self, path, columns, vocab, source=None):
+    self.path = path
+    self.columns = columns
+    self.vocab = vocab
+    self.source = source
+
+  def __len__(self):
+    return len(self.columns['rep'])
+
+  @classmethod
+  def build(cls, logDir, path=None):
+    '''
+    Takes a log directory and optionally where to write the store.
+    Writes the store of every log in the directory, a configuration at a time
+    straight into memory-mapped columns, and returns it loaded.
+    '''
+    path = path or os.path.normpath(logDir) + '.store'
+    catalog = getLogCatalog(logDir)
+    configs = sorted(catalog.configs, key=configName)
+    total = sum(len(catalog.configs[config]) for config in configs)
+    vocab = {
+      dim: sorted({getattr(config, dim) for config in configs}, key=str)
+      for dim in cls.categoricalDims
+    }
+
+    tmpPath = f'{path}.{os.getpid()}.tmp'
+    os.makedirs(tmpPath)
+    dtypes = {**cls.dimDtypes, **{name: np.float64 for name in cls.metricNames}}
+    columns = {
+      name: np.lib.format.open_memmap(os.path.join(tmpPath, f'{name}.npy'), 'w+',
+                                      dtype, (total,))
+      for name, dtype in dtypes.items()
+    }
+
+    start = 0
+    for config in configs:
+      reps = sorted(catalog.configs[config])
+      rows = slice(start, start + len(reps))
+      for dim in cls.categoricalDims:
+        columns[dim][rows] = vocab[dim].index(getattr(config, dim))
+      for dim in ('m', 'd', 'n', 'sink', 'merge', 'threads'):
+        columns[dim][rows] = getattr(config, dim)
+      columns['v'][rows], columns['h'][rows] = config.layout or (0, 0)
+      columns['rep'][rows] = reps
+      logPaths = [catalog.configs[config][rep] for rep in reps]
+      _, noisy = filterLogs(logPaths)
+      columns['clean'][rows] = [logPath not in noisy for logPath in logPaths]
+      expressions = configMetricExpressions(config, cls.metricNames)
+      try:
+        values = evalMetrics(logPaths, expressions)
+      except ValueError:
+        # Some counters are missing, so gather the metrics one at a time.
+        values = np.full((len(reps), len(expressions)), np.nan)
+        for j, expression in enumerate(expressions):
+          try:
+            values[:, j] = evalMetrics(logPaths, [expression])[:, 0]
+          except ValueError:
+            if j < len(statNames):
+              raise
+      for j, name in enumerate(cls.metricNames):
+        columns[name][rows] = values[:, j]
+      start = rows.stop
+
+    for column in columns.values():
+      column.flush()
+    del columns
+    with open(os.path.join(tmpPath, 'vocab.json'), 'w') as f:
+      json.dump({'version': cls.version, 'vocab': vocab,
+                 'source': _logFingerprint(logDir)}, f)
+
+    # Swap the finished store in place of the old one.
+    if os.path.exists(path):
+      shutil.rmtree(path)
+    os.replace(tmpPath, path)
+    return cls.load(path)
+
+  @classmethod
+  def load(cls, path):
+    '''
+    Takes the path of a store directory.
+    Returns the store with its columns memory-mapped read-only. Raises
+    ValueError if the store was written by another version.
+    '''
+    with open(os.path.join(path, 'vocab.json'), 'r') as f:
+      stored = json.load(f)
+    if stored.get('version') != cls.version:
+      raise ValueError(f'Store "{path}" has version {stored.get("version")}')
+    names = [*cls.dimDtypes, *cls.metricNames]
+    columns = {
+      name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r') for name in names
+    }
+    return cls(path, columns, stored['vocab'], stored['source'])
+
+  def code(self, dim, value):
+    '''
+    Returns the code of a categorical dimension's value, or -1 if the store
+    holds no such value.
+    '''
+    values = self.vocab[dim]
+    return values.index(value) if value in values else -1
+
+  def decode(self, dim, codes):
+    '''
+    Takes a dimension and an array of its column's values.
+    Returns the values, decoded for categorical dimensions.
+    '''
+    if dim in self.vocab:
+      return np.array(self.vocab[dim], dtype=object)[np.asarray(codes)]
+    return np.asarray(codes)
+
+  def mask(self, **dims):
+    '''
+    Takes dimensions to match, e.g. mask(type='i8', layout=(2, 4), m=[8, 16]),
+    each a value or a list of values. Layouts are matched as (v, h) tuples,
+    None for the default layout, or by v and h. Multi-threaded records are
+    only matched when threads is given, and clean=True matches only runs
+    filterLogs keeps.
+    Returns a boolean array over the store's records.
+    '''
+    dims.setdefault('threads', 1)
+    selected = np.ones(len(self), dtype=bool)
+    if 'layout' in dims:
+      layouts = dims.pop('layout')
+      layouts = layouts if isinstance(layouts, list) else [layouts]
+      layoutMask = np.zeros(len(self), dtype=bool)
+      for layout in layouts:
+        v, h = layout or (0, 0)
+        layoutMask |= (self.columns['v'] == v) & (self.columns['h'] == h)
+      selected &= layoutMask
+
+    for dim, values in dims.items():
+      assert dim in self.dimDtypes, f'Unknown store dimension: {dim}'
+      values = values if isinstance(values, list) else [values]
+      if dim in self.vocab:
+        values = [self.code(dim, value) for value in values]
+      selected &= np.isin(self.columns[dim], values)
+    return selected
+
+  def aggregate(self, metric, by, mask=None, confidence=0.95, estimator='mean',
+                interval='t', **bootstrapOptions):
+    '''
+    Takes a metric column, a list of dimensions to group records by,
+    optionally a mask of the records to use and the estimator and interval of
+    each group (see intervalStats).
+    Returns a tuple of (groups, counts, estimates, CI lower differences, CI
+    upper differences), where groups is a dict of dimension -> decoded value of
+    each group. Records whose metric is NaN are left out.
+    '''
+    values = self.columns[metric]
+    valid = ~np.isnan(values)
+    if mask is not None:
+      valid &= mask
+    rows = np.flatnonzero(valid)
+    values = values[rows]
+
+    # Combine the group dimensions into one key per record.
+    key = np.zeros(len(rows), dtype=np.int64)
+    uniques = []
+    for dim in by:
+      unique, inverse = np.unique(self.columns[dim][rows], return_inverse=True)
+      uniques.append(unique)
+      key = key * len(unique) + inverse
+    groupKeys, group = np.unique(key, return_inverse=True)
+
+    counts = np.bincount(group, minlength=len(groupKeys))
+    if interval == 't':
+      # Two-pass per-group moments.
+      assert estimator == 'mean', 'Student-t intervals are only for means'
+      estimates = np.bincount(group, values, len(groupKeys)) / counts
+      sq = np.bincount(group, (values - estimates[group]) ** 2, len(groupKeys))
+      with np.errstate(divide='ignore', invalid='ignore'):
+        sems = np.sqrt(sq / (counts - 1) / counts)
+        lower = upper = st.t.ppf((1 + confidence) / 2, counts - 1) * sems
+    else:
+      # Lay the groups out as rows of samples for the bootstrap.
+      order = np.argsort(group, kind='stable')
+      starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+      samples = np.full((len(groupKeys), counts.max(initial=0)), np.nan)
+      samples[group[order], np.arange(len(order)) - starts[group[order]]] = values[order]
+      estimates, lower, upper = intervalStats(samples, confidence=confidence,
+                                              estimator=estimator, interval=interval,
+                                              **bootstrapOptions)
+
+    # Split the keys back into each dimension's values.
+    groups = {}
+    for dim, unique in reversed(list(zip(by, uniques))):
+      groups[dim] = self.decode(dim, unique[groupKeys % len(unique)])
+      groupKeys = groupKeys // len(unique)
+    groups = {dim: groups[dim] for dim in by}
+    return (groups, counts, estimates, lower, upper)
+
+  def _axisKeys(self, groups, axis):
+    '''
+    Takes aggregate's groups and a pivot axis, a dimension or a tuple of them.
+    Returns each group's value on the axis, tuples for tuples of dimensions.
+    '''
+    if isinstance(axis, tuple):
+      return list(zip(*(groups[dim].tolist() for dim in axis)))
+    return groups[axis].tolist()
+
+  def pivot(self, metric, rows, cols, facet=None, mask=None, confidence=0.95,
+            rowValues=None, colValues=None, facetValues=None, **statOptions):
+    '''
+    Takes a metric column and the dimensions laid out as plotGroupedData's
+    groups (rows) and bars (cols), optionally a facet dimension splitting them
+    into subplots, a mask of the records to use and the estimator and
+    interval options of aggregate. Each axis is a dimension or a tuple of
+    dimensions, e.g. ('v', 'h') for layouts. The values and order of each axis
+    can be given, otherwise they are the sorted values present.
+
+    Returns a tuple of (facet values, row values, column values, means, errs).
+    means is a masked array shaped (facets, columns, rows) and errs one shaped
+    (facets, columns, 2, rows) of the lower and upper CI differences, as bars
+    and errs of plotGroupedData for each facet. Cells without records are
+    masked. Without a facet, the facet axis is left out.
+    '''
+    axes = [facet, cols, rows]
+    dims = []
+    for axis in axes:
+      if axis is not None:
+        dims.extend(axis if isinstance(axis, tuple) else [axis])
+    groups, _, means, lower, upper = self.aggregate(metric, dims, mask, confidence,
+                                                   **statOptions)
+
+    # Find each group's cell, dropping groups outside the given axis values.
+    cells = []
+    keep = np.ones(len(means), dtype=bool)
+    values = []
+    for axis, given in zip(axes, [facetValues, colValues, rowValues]):
+      if axis is None:
+        values.append([None])
+        cells.append(np.zeros(len(means), dtype=np.int64))
+        continue
+      keys = self._axisKeys(groups, axis)
+      axisValues = list(given) if given is not None else sorted(set(keys), key=str)
+      index = {value: i for i, value in enumerate(axisValues)}
+      keep &= np.array([key in index for key in keys], dtype=bool)
+      cells.append(np.array([index.get(key, 0) for key in keys], dtype=np.int64))
+      values.append(axisValues)
+
+    shape = tuple(len(axisValues) for axisValues in values)
+    pivotMeans = np.ma.masked_all(shape)
+    pivotErrs = np.ma.masked_all((*shape[:2], 2, shape[2]))
+    f, c, r = (cell[keep] for cell in cells)
+    pivotMeans[f, c, r] = means[keep]
+    pivotErrs[f, c, 0, r] = lower[keep]
+    pivotErrs[f, c, 1, r] = upper[keep]
+
+    if facet is None:
+      return (None, values[2], values[1], pivotMeans[0], pivotErrs[0])
+    return (values[0], values[2], values[1], pivotMeans, pivotErrs)
+
+def _logFingerprint(logDir):
+  '''
+  Returns a digest of the names, mtimes and sizes of the logs cached for a
+  log directory.
+  '''
+  files = getLogCache(logDir).files
+  digest = hashlib.sha256()
+  for name in ('fileName', 'mtime', 'size'):
+    digest.update(np.ascontiguousarray(files[name]).tobytes())
+  return digest.hexdigest()
+
+def getResultStore(logDir=logDir):
+  '''
+  Takes a log directory.
+  Returns its ResultStore, memory-mapped from disk, rebuilding it first if
+  logs changed since it was written.
+  '''
+  path = os.path.normpath(logDir) + '.store'
+
+  # Anything read from the store may depend on any of its logs.
+  if _trackedLogs is not None:
+    for reps in getLogCatalog(logDir).configs.values():
+      _trackedLogs.update(os.path.normpath(logPath) for logPath in reps.values())
+
+  if os.path.exists(os.path.join(path, 'vocab.json')):
+    try:
+      store = ResultStore.load(path)
+    except ValueError:
+      store = None
+    if store is not None and store.source == _logFingerprint(logDir):
+      return store
+  return ResultStore.build(logDir, path)
+
+def plotGroupedData(ax, groupLabels, barLabels, bars, errs, metric=None):
   '''
   Plots grouped data using pyplot.
-  Takes a pyplot-axis-like object, labels, and data and plots it.
+  Takes a pyplot-axis-like object, labels, and data and plots it. When the
+  name of the plotted metric is given (see metricLabels), labels the y axis
+  with it.
 
   groupLabels: labels for the groups -- i.e. on the x axis.
   barLabels: labels for the bars -- i.e. in the legend.
   bars: data points, bar heights. A list of lists of data points for each bar
-        type.
+        type. Masked or NaN points are left empty, as from ResultStore.pivot.
   errs: error bounds. A list of lists of endpoints for each bar type
   '''
   # Sanity check.
@@ -222,6 +2263,8 @@ def plotGroupedData(ax, groupLabels, barLabels, bars, errs):
   axisData = zip(bars, errs)
   for i, (barData, barErrs) in enumerate(axisData):
     barPos = [i * barWidth + j * secWidth for j in range(len(barData))]
+    barData = np.ma.filled(np.ma.asarray(barData, dtype=np.float64), np.nan)
+    barErrs = np.ma.filled(np.ma.asarray(barErrs, dtype=np.float64), np.nan)
     ax.bar(barPos, barData, width=barWidth, label=barLabels[i], yerr=barErrs,
       capsize=.75)
 
@@ -232,16 +2275,19 @@ def plotGroupedData(ax, groupLabels, barLabels, bars, errs):
   ax.set_xlim(left=-barWidth/2, right=groupsCount * secWidth - barWidth)
 
   # Setup y axis.
-  maximum = max(max(barData) for barData in bars) * 1.1
+  maximum = np.nanmax(np.ma.filled(np.ma.asarray(bars, dtype=np.float64), np.nan)) * 1.1
   yInterval = round(maximum / 4, -(math.floor(math.log10(maximum)) - 1))
   ax.set_ylim(0, maximum)
   ax.set_yticks(np.arange(0, maximum, yInterval))
+  if metric is not None:
+    ax.set_ylabel(metricLabels[metric])
 
-def tableData(rows):
+def tableData(rows, metric='cycles'):
   '''
   Takes a 2-tuple of (name, data) where data is a 6-tuple of (mean iterations,
   95% CI difference, mean cpu time, 95% CI difference, mean cycles, 95% CI
-  difference).
+  difference). When the name of another metric in metricFormats is given, the
+  last pair holds that metric instead of cycles.
 
   Returns a fully formed tabular environment with four columns:
   --------------------------------
@@ -254,7 +2300,8 @@ def tableData(rows):
     '\\makebox[\\textwidth][c]{\n' \
     '  \\begin{tabular}{| c | c | c | c |}\n' \
     '    \hline\n' \
-    '    Name & $n$ & CPU Time (\\SI{}{\\textit{\\nano\\second}}) & Cycles\\\\\\hline\n'
+    f'    Name & $n$ & CPU Time (\\SI{{}}{{\\textit{{\\nano\\second}}}}) & {metricLabels[metric]}\\\\\\hline\n'
+  metricFormat = metricFormats[metric]
   footer = \
     '  \\end{tabular}\n}'
 
@@ -263,9 +2310,55 @@ def tableData(rows):
   for name, (iters, itersCI, cpuTime, cpuCI, cycles, cyclesCI) in rows:
     table += \
       f'    {name} & ${iters / 1e6:0.1f} \pm {itersCI / 1e6:0.2f}$ & ' \
-      f'${cpuTime:0.2f} \pm {cpuCI:0.2f}$ & ${cycles:0.2f} \pm ' \
-      f'{cyclesCI:0.2f}$ \\\\\\hline\n'
+      f'${cpuTime:0.2f} \pm {cpuCI:0.2f}$ & ${cycles:{metricFormat}} \pm ' \
+      f'{cyclesCI:{metricFormat}}$ \\\\\\hline\n'
 
   table += footer
 
   return table
+
+def _renderJob(job, defaultBackend):
+  '''
+  Takes a figure job as renderFigures and the matplotlib backend to reset to.
+  Runs the job from a clean matplotlib state, tracking the logs it reads.
+  Returns a tuple of (sorted log paths read, error message or None).
+  '''
+  import runpy
+  import traceback
+  import matplotlib
+  from matplotlib import pyplot as plt
+
+  # Start every job from the state a fresh interpreter would give it.
+  plt.close('all')
+  matplotlib.rcdefaults()
+  plt.switch_backend(defaultBackend)
+
+  startLogTracking()
+  try:
+    if callable(job):
+      job()
+    else:
+      script, function = job if isinstance(job, tuple) else (job, 'generatePlot')
+      runpy.run_path(script, run_name='renderFigures')[function]()
+    error = None
+  except Exception:
+    error = traceback.format_exc().strip().splitlines()[-1]
+  finally:
+    plt.close('all')
+  return (stopLogTracking(), error)
+
+def renderFigures(jobs):
+  '''
+  Takes a list of figure jobs, each a script path whose generatePlot() is run,
+  a (script path, function name) tuple or a callable.
+
+  Renders every job in this process, so matplotlib, the pgf LaTeX process and
+  the log cache are set up once and shared by all jobs. Each job starts from
+  default rcParams and the default backend, as if its script were run alone.
+
+  Returns a list of (log paths read, error message or None) per job.
+  '''
+  import matplotlib
+
+  defaultBackend = matplotlib.rcParamsOrig['backend']
+  return [_renderJob(job, defaultBackend) for job in jobs]
@@ -0,0 +1,99 @@
+import argparse
+
+import numpy as np
+from matplotlib import pyplot as plt
+
+import thesUtils as tu
+
+# Log dimensions of each kernel, as mmaVsx.py.
+logDims = dict(m=8, d=32, n=16, layout=None, sink=False, merge=False)
+variants = [
+  ('MMA', dict(order='CRR', variant='mma', **logDims)),
+  ('VSX', dict(order='CCC', variant='vector', **logDims)),
+]
+
+def getScaling(logDir=tu.logDir, confidence=0.95, interval='fieller'):
+  '''
+  Gathers the thread scaling of every type of each variant.
+  Returns a dict of (variant name, type) -> (thread counts, cycle stats,
+  speedups, efficiencies), each stats a tuple of (values, CI lower
+  differences, CI upper differences), for kernels run at more than one thread
+  count.
+  '''
+  catalog = tu.getLogCatalog(logDir)
+  scaling = {}
+  for variantName, dims in variants:
+    for type in tu.orderedTypes:
+      selected = catalog.select(type=type, **dims)
+      if not selected:
+        continue
+      config, = selected
+      threadCounts = tu.configThreadCounts(config, logDir)
+      if len(threadCounts) < 2:
+        continue
+
+      cycles = tu.threadSamples(config, threadCounts, tu.repCount, logDir)
+      cycles = cycles[..., tu.statNames.index('cycles')]
+      means, _, halfWidths = tu.batchStats(cycles, confidence=confidence)
+      speedups, efficiencies = tu.threadScalingStats(cycles, threadCounts, confidence,
+                                                     interval)
+      scaling[variantName, type] = (threadCounts, (means, halfWidths, halfWidths),
+                                    speedups, efficiencies)
+  return scaling
+
+def generatePlot(logDir=tu.logDir):
+  scaling = getScaling(logDir)
+  assert scaling, 'No kernels were run at more than one thread count'
+
+  # Set up figure and axes, the variants side by side.
+  fig = plt.figure()
+  figWidth = len(variants)
+  figHeight = 1
+
+  maxThreads = max(max(threadCounts) for threadCounts, *_ in scaling.values())
+  axes = []
+  for i, (variantName, _) in enumerate(variants):
+    ax = fig.add_subplot(figHeight, figWidth, i + 1, sharey=axes[0] if axes else None)
+    axes.append(ax)
+    ax.plot([1, maxThreads], [1, maxThreads], color='gray', linewidth=.5,
+            linestyle='--', label='Ideal')
+    for type in tu.orderedTypes:
+      if (variantName, type) not in scaling:
+        continue
+      threadCounts, _, (speedups, lower, upper), _ = scaling[variantName, type]
+      ax.errorbar(threadCounts, speedups, yerr=[lower, upper], marker='o',
+                  markersize=3, capsize=2, label=type)
+
+    ax.set_title(variantName)
+    ax.set_xlabel('Threads')
+    ax.set_xticks(range(1, maxThreads + 1))
+    if i == 0:
+      ax.set_ylabel('Throughput Speedup')
+    ax.legend(fontsize='small')
+
+  fig.suptitle('Scaling of Kernels Across Threads Sharing a Core')
+  fig.set_size_inches(tu.textWidth, 3)
+  fig.tight_layout()
+  fig.savefig('threadScaling.png')
+  fig.savefig('threadScaling.pgf')
+
+def generateTable(logDir=tu.logDir):
+  for (variantName, type), (threadCounts, cycles, speedups, efficiencies) in \
+      getScaling(logDir).items():
+    print(f'{variantName}, {type}')
+    for i, threads in enumerate(threadCounts):
+      print(f'  {threads:>3} threads: {cycles[0][i]:10.2f} +- {cycles[1][i]:.2f} cycles, '
+            f'speedup {speedups[0][i]:.3f} [-{speedups[1][i]:.3f}, +{speedups[2][i]:.3f}], '
+            f'efficiency {efficiencies[0][i]:.3f} '
+            f'[-{efficiencies[1][i]:.3f}, +{efficiencies[2][i]:.3f}]')
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(
+    description='Report how kernels scale across threads sharing a core.')
+  parser.add_argument('logDir', nargs='?', default=tu.logDir)
+  parser.add_argument('--plot', action='store_true', help='also plot the scaling')
+  args = parser.parse_args()
+
+  generateTable(args.logDir)
+  if args.plot:
+    generatePlot(args.logDir)
@@ -8,11 +8,13 @@ matplotlib.rcParams.update({
     'pgf.rcfonts': False,
 })
 
+import numpy as np
 from matplotlib import pyplot as plt
 
 import thesUtils as tu
 
-logNameFormat = '{type}.{ve}x32x{he}.v{v}h{h}.CRR.O3.bench.{c}.json'
+# Log dimensions shared by every configuration.
+logDims = dict(d=32, order='CRR', variant='mma')
 
 layouts = [
   ((2, 4), '$2 \\times 4$'),
@@ -21,23 +23,16 @@ layouts = [
   ((8, 1), '$8 \\times 1$')
 ]
 def generatePlot():
-  # Get data.
-  data = {}
-  for type in tu.orderedTypes:
-    # Holding place ACC data.
-    accData = {}
-
-    # Get the data for each ACC layout.
-    for (v, h), layoutName in layouts:
-      # Read logs for data.
-      log = logNameFormat.format(type=type, v=v, h=h, ve=v * 4, he=h * 4, c='{}')
-
-      # Save layout data.
-      _, _, cycleStats = tu.getJsonCumulativeStats('logs/all/' + log, 25)
-      accData[layoutName] = cycleStats
-
-    # Save type data.
-    data[type] = accData
+  # Get data: cycles per ACC layout, one subplot per type. Each layout's
+  # kernel is sized to fit its accumulators tightly.
+  store = tu.getResultStore()
+  records = np.logical_or.reduce([
+    store.mask(rep=list(range(tu.repCount)), m=v * 4, n=h * 4, layout=(v, h), **logDims)
+    for (v, h), _ in layouts
+  ])
+  _, _, _, bars, errs = store.pivot('cycles', ('v', 'h'), 'variant', 'type', records,
+                                    rowValues=[layout for layout, _ in layouts],
+                                    facetValues=tu.orderedTypes)
 
   # Set up figure and axes.
   fig = plt.figure()
@@ -48,25 +43,9 @@ def generatePlot():
   groupLabels = [layout[1] for layout in layouts]
   barLabels = ['cycles']
   for i, type in enumerate(tu.orderedTypes):
-    # Get data for this type.
-    accData = data[type]
-
-    # Set up bar data points.
-    bars = [
-      [accData[layout][0] for layout in accData]
-    ]
-
-    # Set up error data for the bars.
-    errs = [
-      [
-        [accData[layout][1] for layout in accData],
-        [accData[layout][2] for layout in accData]
-      ]
-    ]
-
     # Get axis and start plotting.
     ax = fig.add_subplot(figHeight, figWidth, i + 1)
-    tu.plotGroupedData(ax, groupLabels, barLabels, bars, errs)
+    tu.plotGroupedData(ax, groupLabels, barLabels, bars[i], errs[i])
     ax.set_title('\\texttt{{{}}}'.format(type))
 
     ax.set_xlabel('Accumulator Layout')
@@ -86,11 +65,11 @@ def generateTable():
     # Get the data for each ACC layout.
     for (v, h), layoutName in layouts:
       # Read logs for data.
-      log = logNameFormat.format(type=type, v=v, h=h, ve=v * 4, he=h * 4, c='{}')
+      logs = tu.selectOne(tu.repCount, type=type, m=v * 4, n=h * 4,
+                          layout=(v, h), **logDims)
 
       # Save layout data.
-      iterStats, timeStats, cycleStats = \
-        tu.getJsonCumulativeStats('logs/all/' + log, 25)
+      iterStats, timeStats, cycleStats = tu.getJsonListStats(logs)
 
       # Add row with name and data.
       rows.append(
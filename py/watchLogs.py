@@ -0,0 +1,141 @@
+import argparse
+import os
+import time
+
+import thesUtils as tu
+
+class LogWatcher:
+  '''
+  Follows a log directory and keeps running stats of every configuration as
+  repetitions appear, measured as the figures measure it (handwritten kernels
+  as the difference of their two benchmarks, see configMetrics).
+  '''
+  def __init__(self, logDir):
+    self.logDir = logDir
+    self.cache = tu.getLogCache(logDir)
+
+    # Running (iterations, cpu time, cycles) stats of each configuration name.
+    self.stats = {}
+
+    # Files folded into the stats, mapped to their (mtime, size), and the
+    # repetition files seen for each configuration.
+    self.seen = {}
+    self.configFiles = {}
+
+    # Whether polls refreshed the cache since it was last written to disk.
+    self.dirty = False
+
+  def _fileStamp(self, name):
+    i, _ = self.cache.index[name]
+    return (self.cache.files['mtime'][i], self.cache.files['size'][i])
+
+  def _addFile(self, name):
+    config, _ = tu.parseLogName(name)
+    key = tu.configName(config)
+    if key not in self.stats:
+      self.stats[key] = tu.RunningStats(len(tu.statNames))
+    sample, = tu.evalMetrics([os.path.join(self.logDir, name)], tu.configMetrics(config))
+    self.stats[key].add(sample)
+
+  def _rebuild(self, config):
+    '''
+    Rebuilds a configuration's stats from its current files. Welford
+    accumulators cannot remove a sample, so this is how reruns and deleted
+    repetitions drop their old samples.
+    '''
+    self.stats.pop(config, None)
+    for name in sorted(self.configFiles.get(config, ())):
+      self._addFile(name)
+
+  def poll(self):
+    '''
+    Folds every new or rerun repetition into the running stats and drops
+    deleted ones. The cache is only refreshed in memory; see save.
+    Returns the names of the configurations that changed.
+    '''
+    self.dirty |= self.cache.refresh()
+
+    changed = set()
+    rebuild = set()
+
+    # Repetitions deleted since the last poll.
+    for name in [name for name in self.seen if name not in self.cache.index]:
+      config = tu.configName(tu.parseLogName(name)[0])
+      del self.seen[name]
+      self.configFiles[config].discard(name)
+      rebuild.add(config)
+
+    for name in self.cache.index:
+      parsed = tu.parseLogName(name)
+      if parsed is None:
+        continue
+      stamp = self._fileStamp(name)
+      if self.seen.get(name) == stamp:
+        continue
+
+      config = tu.configName(parsed[0])
+      if name in self.seen:
+        # A repetition was rerun, so its old sample must be dropped.
+        rebuild.add(config)
+      elif config not in rebuild:
+        self._addFile(name)
+      self.seen[name] = stamp
+      self.configFiles.setdefault(config, set()).add(name)
+      changed.add(config)
+
+    for config in rebuild:
+      self._rebuild(config)
+      if not self.configFiles[config]:
+        del self.configFiles[config]
+    return changed | rebuild
+
+  def save(self):
+    '''
+    Writes the cache to disk if polls changed it since it was last written.
+    '''
+    if self.dirty:
+      self.cache.save()
+      self.dirty = False
+
+  def report(self, confidence=0.95):
+    '''
+    Returns a table of the live stats of every configuration.
+    '''
+    cycles = tu.statNames.index('cycles')
+    lines = [f'{"Configuration":<48} {"n":>3} {"Cycles":>12} {"+-":>10} {"CI %":>7}']
+    for config, stats in sorted(self.stats.items()):
+      mean = stats.mean[cycles]
+      halfWidth = stats.halfWidth(confidence)[cycles]
+      lines.append(
+        f'{config:<48} {stats.n:>3} {mean:>12.2f} '
+        f'{halfWidth:>10.2f} {100 * halfWidth / mean:>6.2f}%'
+      )
+    return '\n'.join(lines)
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(
+    description='Watch a log directory and report running stats as repetitions land.')
+  parser.add_argument('logDir', nargs='?', default=tu.logDir)
+  parser.add_argument('--interval', type=float, default=10,
+                      help='seconds between polls of the log directory')
+  parser.add_argument('--confidence', type=float, default=0.95)
+  parser.add_argument('--once', action='store_true',
+                      help='report the current stats and exit')
+  args = parser.parse_args()
+
+  watcher = LogWatcher(args.logDir)
+  try:
+    while True:
+      changed = watcher.poll()
+      if changed:
+        print(time.strftime('%H:%M:%S'), f'{len(changed)} configuration(s) updated')
+        print(watcher.report(args.confidence))
+        print()
+      if args.once:
+        break
+      time.sleep(args.interval)
+  except KeyboardInterrupt:
+    pass
+  finally:
+    # Keep what was parsed for the next reader of the cache.
+    watcher.save()